@@ -0,0 +1,55 @@
+"""
+	Compares how long it takes to find each image's tiles in a Drive export folder holding 100,000 files - once the
+	way Drive downloads used to (listing the whole folder and checking every name, for every image), and once with a
+	DriveSyncWatcher, which scans the folder once per poll and looks each image up in a sorted index.
+
+	Run with :code:`python benchmarks/drive_folder_index.py`. Creating the synthetic folder takes a little while. On a
+	FUSE or sync-client filesystem, each listing is much slower than on local disk, so the gap is larger there.
+"""
+
+import os
+import tempfile
+import time
+
+from eedl.drive import DriveSyncWatcher
+
+TOTAL_IMAGES = 25_000
+TILES_PER_IMAGE = 4
+IMAGES_TO_FIND = 1_000
+
+
+def _tile_names(image: int):
+	return [f"image_{image}-{row:010d}-{column:010d}.tif" for row in (0, 12800) for column in (0, 12800)]
+
+
+def listdir_per_image(folder: str) -> float:
+	start = time.perf_counter()
+	for image in range(IMAGES_TO_FIND):
+		prefix = f"image_{image}"
+		files = [filename for filename in os.listdir(folder) if filename.startswith(prefix)]
+		assert len(files) >= TILES_PER_IMAGE
+	return time.perf_counter() - start
+
+
+def shared_index(folder: str) -> float:
+	start = time.perf_counter()
+	watcher = DriveSyncWatcher(folder, poll_interval=60)
+	for image in range(IMAGES_TO_FIND):
+		assert len(watcher.export_files(f"image_{image}")) == TILES_PER_IMAGE
+	assert watcher.scans == 1
+	return time.perf_counter() - start
+
+
+def main() -> None:
+	with tempfile.TemporaryDirectory() as folder:
+		for image in range(TOTAL_IMAGES):
+			for name in _tile_names(image):
+				open(os.path.join(folder, name), 'wb').close()
+
+		print(f"{'files':>8} {'lookups':>8} {'method':>18} {'seconds':>9}")
+		for name, method in (("listdir per image", listdir_per_image), ("shared index", shared_index)):
+			print(f"{TOTAL_IMAGES * TILES_PER_IMAGE:>8} {IMAGES_TO_FIND:>8} {name:>18} {method(folder):>9.3f}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,88 @@
+"""
+	Compares the mosaic compression profiles on synthetic tiles that look like Earth Engine evapotranspiration exports -
+	float32, a smooth field with fine scale noise, and a nodata area outside the region of interest. For each profile,
+	reports how long the mosaic takes to write, how long zonal-style reads of random windows take to decode, and the
+	size of the file.
+
+	Needs GDAL's Python bindings (osgeo) and numpy. Run with :code:`python benchmarks/mosaic_compression.py`
+"""
+
+import os
+import shutil
+import tempfile
+import time
+
+import numpy
+from osgeo import gdal, osr
+
+from eedl.mosaic_rasters import COMPRESSION_PROFILES, mosaic_rasters
+
+TILES_PER_SIDE = 3
+TILE_SIZE = 2048  # pixels
+PIXEL_SIZE = 30
+NODATA = -9999
+WINDOW_READS = 500
+WINDOW_SIZE = 64  # pixels - about the size of a field
+
+
+def make_tiles(folder: str) -> list:
+	spatial_reference = osr.SpatialReference()
+	spatial_reference.ImportFromEPSG(5070)
+	random = numpy.random.default_rng(0)
+	rows, columns = numpy.mgrid[0:TILE_SIZE, 0:TILE_SIZE]
+	driver = gdal.GetDriverByName("GTiff")
+	full_size = TILES_PER_SIDE * TILE_SIZE
+
+	paths = []
+	for tile_row in range(TILES_PER_SIDE):
+		for tile_column in range(TILES_PER_SIDE):
+			path = os.path.join(folder, f"et-{tile_row * TILE_SIZE:010d}-{tile_column * TILE_SIZE:010d}.tif")
+			y = rows + tile_row * TILE_SIZE
+			x = columns + tile_column * TILE_SIZE
+			et = 3 + 2 * numpy.sin(x / 700) * numpy.cos(y / 900) + random.gamma(2, 0.15, x.shape)  # mm/day
+			et = numpy.round(et, 3).astype(numpy.float32)  # Earth Engine outputs are usually rounded like this
+			et[(x - full_size / 2) ** 2 + (y - full_size / 2) ** 2 > (full_size / 2) ** 2] = NODATA  # outside the region
+
+			dataset = driver.Create(path, TILE_SIZE, TILE_SIZE, 1, gdal.GDT_Float32, ["COMPRESS=DEFLATE"])
+			dataset.SetGeoTransform((tile_column * TILE_SIZE * PIXEL_SIZE, PIXEL_SIZE, 0, -tile_row * TILE_SIZE * PIXEL_SIZE, 0, -PIXEL_SIZE))
+			dataset.SetProjection(spatial_reference.ExportToWkt())
+			dataset.GetRasterBand(1).SetNoDataValue(NODATA)
+			dataset.GetRasterBand(1).WriteArray(et)
+			dataset = None
+			paths.append(path)
+
+	return paths
+
+
+def time_window_reads(path: str) -> float:
+	gdal.SetCacheMax(0)  # so every read decodes from the file
+	random = numpy.random.default_rng(1)
+	dataset = gdal.Open(path)
+	band = dataset.GetRasterBand(1)
+	start = time.perf_counter()
+	for _ in range(WINDOW_READS):
+		x = int(random.integers(0, dataset.RasterXSize - WINDOW_SIZE))
+		y = int(random.integers(0, dataset.RasterYSize - WINDOW_SIZE))
+		band.ReadAsArray(x, y, WINDOW_SIZE, WINDOW_SIZE)
+	return time.perf_counter() - start
+
+
+def main() -> None:
+	folder = tempfile.mkdtemp(prefix="eedl_compression_benchmark_")
+	try:
+		tiles = make_tiles(folder)
+		print(f"{len(tiles)} tiles of {TILE_SIZE}x{TILE_SIZE} float32 pixels, {WINDOW_READS} reads of {WINDOW_SIZE}x{WINDOW_SIZE} windows")
+		print(f"{'profile':>10} {'write (s)':>10} {'reads (s)':>10} {'MB':>8}")
+		for profile in COMPRESSION_PROFILES:
+			output_path = os.path.join(folder, f"mosaic_{profile}.tif")
+			start = time.perf_counter()
+			mosaic_rasters(tiles, output_path, add_overviews=False, compression=profile)
+			write_time = time.perf_counter() - start
+			read_time = time_window_reads(output_path)
+			print(f"{profile:>10} {write_time:>10.2f} {read_time:>10.2f} {os.path.getsize(output_path) / 1e6:>8.1f}")
+	finally:
+		shutil.rmtree(folder)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,77 @@
+"""
+	Measures how long mosaic_rasters takes to mosaic a synthetic set of tiles, once per thread count from 1 up to the
+	number of CPUs, with and without overviews. The tiles are smooth float32 surfaces with some noise, so they compress
+	about as well as real elevation or reflectance data.
+
+	Needs GDAL's Python bindings (osgeo) and numpy. Run with :code:`python benchmarks/mosaic_threads.py`
+"""
+
+import os
+import shutil
+import tempfile
+import time
+
+import numpy
+from osgeo import gdal, osr
+
+from eedl.mosaic_rasters import mosaic_rasters
+
+TILES_PER_SIDE = 4
+TILE_SIZE = 2048  # pixels
+PIXEL_SIZE = 30
+
+
+def make_tiles(folder: str) -> list:
+	spatial_reference = osr.SpatialReference()
+	spatial_reference.ImportFromEPSG(5070)
+	random = numpy.random.default_rng(0)
+	rows, columns = numpy.mgrid[0:TILE_SIZE, 0:TILE_SIZE]
+	driver = gdal.GetDriverByName("GTiff")
+
+	paths = []
+	for tile_row in range(TILES_PER_SIDE):
+		for tile_column in range(TILES_PER_SIDE):
+			path = os.path.join(folder, f"tile-{tile_row * TILE_SIZE:010d}-{tile_column * TILE_SIZE:010d}.tif")
+			surface = numpy.sin((rows + tile_row * TILE_SIZE) / 300) * numpy.cos((columns + tile_column * TILE_SIZE) / 500) * 1000
+			data = (surface + random.normal(0, 5, surface.shape)).astype(numpy.float32)
+
+			dataset = driver.Create(path, TILE_SIZE, TILE_SIZE, 1, gdal.GDT_Float32, ["COMPRESS=DEFLATE"])
+			dataset.SetGeoTransform((tile_column * TILE_SIZE * PIXEL_SIZE, PIXEL_SIZE, 0, -tile_row * TILE_SIZE * PIXEL_SIZE, 0, -PIXEL_SIZE))
+			dataset.SetProjection(spatial_reference.ExportToWkt())
+			dataset.GetRasterBand(1).WriteArray(data)
+			dataset = None
+			paths.append(path)
+
+	return paths
+
+
+def thread_counts() -> list:
+	cpus = os.cpu_count() or 1
+	counts = [1]
+	while counts[-1] * 2 <= cpus:
+		counts.append(counts[-1] * 2)
+	if counts[-1] != cpus:
+		counts.append(cpus)
+	return counts
+
+
+def main() -> None:
+	folder = tempfile.mkdtemp(prefix="eedl_mosaic_benchmark_")
+	try:
+		tiles = make_tiles(folder)
+		print(f"{len(tiles)} tiles of {TILE_SIZE}x{TILE_SIZE} float32 pixels")
+		print(f"{'threads':>8} {'overviews':>10} {'seconds':>9} {'MB written':>11}")
+		for add_overviews in (False, True):
+			for threads in thread_counts():
+				output_path = os.path.join(folder, f"mosaic_{threads}_{add_overviews}.tif")
+				start = time.perf_counter()
+				mosaic_rasters(tiles, output_path, add_overviews=add_overviews, num_threads=threads)
+				elapsed = time.perf_counter() - start
+				size = sum(os.path.getsize(os.path.join(folder, name)) for name in os.listdir(folder) if name.startswith(os.path.basename(output_path)))
+				print(f"{threads:>8} {str(add_overviews):>10} {elapsed:>9.2f} {size / 1e6:>11.1f}")
+	finally:
+		shutil.rmtree(folder)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,63 @@
+"""
+	Measures how much memory a TaskRegistry holds on to once 100,000 images have been exported, downloaded, and
+	had their callback run - once keeping every EEDLImage (:code:`evict_completed = False`, how the registry always
+	used to behave) and once swapping finished images for CompletedImageRecords.
+
+	Images use FakeTasks, so no Earth Engine access is needed. Each image is given a stand-in for its Earth Engine
+	image expression about the size of a small serialized expression graph, since real ee.Image objects can't be built
+	without Earth Engine credentials.
+
+	Run with :code:`python benchmarks/registry_memory.py`
+"""
+
+import contextlib
+import gc
+import io
+import tracemalloc
+
+from eedl.image import TaskRegistry
+from eedl.testing import FakeTaskBackend, add_fake_image
+
+TOTAL_IMAGES = 100_000
+EXPRESSION_SIZE = 2_000  # bytes
+
+
+def _download(download_location, callback=None):
+	pass
+
+
+def run(evict_completed: bool) -> int:
+	gc.collect()
+	tracemalloc.start()
+
+	backend = FakeTaskBackend()
+	registry = TaskRegistry(status_backend=backend)
+	registry.evict_completed = evict_completed
+	registry.download_workers = 8
+	for i in range(TOTAL_IMAGES):
+		image = add_fake_image(registry, backend, f"image_{i}")
+		image._ee_image = f"{i:0{EXPRESSION_SIZE}d}"  # stand-in for the expression graph
+		image.download_results = _download
+		backend.set_state(image.task.id, "COMPLETED")
+
+	registry.update_task_statuses()
+	with contextlib.redirect_stdout(io.StringIO()):  # skip the "ready for download" message for each image
+		registry.download_ready_images("unused")
+	del image
+	backend.tasks.clear()  # the fake backend's own copies of the tasks aren't part of the registry's footprint
+
+	gc.collect()
+	current, _ = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+	assert len(registry.images) == TOTAL_IMAGES
+	return current
+
+
+def main() -> None:
+	print(f"{'images':>8} {'evict':>6} {'MB held':>10}")
+	for evict_completed in (False, True):
+		print(f"{TOTAL_IMAGES:>8} {str(evict_completed):>6} {run(evict_completed) / 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+	main()
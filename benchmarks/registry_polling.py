@@ -0,0 +1,54 @@
+"""
+	Measures the per-cycle overhead of the TaskRegistry as the number of tracked images grows. Each
+	cycle does what wait_for_images does on every loop - refreshes statuses and checks for downloadable
+	and failed images - against a FakeTaskBackend, so no Earth Engine access is needed.
+
+	The number of images still running is held constant while the number of finished ones grows to
+	50,000. Since the registry indexes images by lifecycle state, the time per cycle should stay flat.
+
+	Run with :code:`python benchmarks/registry_polling.py`
+"""
+
+import time
+
+from eedl.image import TaskRegistry
+from eedl.testing import FakeTaskBackend, add_fake_image
+
+RUNNING_IMAGES = 500
+TOTAL_IMAGES = (1_000, 5_000, 10_000, 25_000, 50_000)
+CYCLES = 20
+
+
+def build_registry(total_images: int):
+	backend = FakeTaskBackend()
+	registry = TaskRegistry(status_backend=backend)
+	images = [add_fake_image(registry, backend, f"image_{i}") for i in range(total_images)]
+
+	for image in images[RUNNING_IMAGES:]:  # everything but the first RUNNING_IMAGES has finished and been downloaded
+		backend.set_state(image.task.id, "COMPLETED")
+	registry.update_task_statuses()
+	for image in images[RUNNING_IMAGES:]:
+		image.task_data_downloaded = True
+
+	return registry
+
+
+def time_cycles(registry: TaskRegistry) -> float:
+	start = time.perf_counter()
+	for _ in range(CYCLES):
+		registry.update_task_statuses()
+		_ = registry.has_pending_work
+		_ = registry.downloadable_tasks
+		_ = registry.failed_tasks
+	return (time.perf_counter() - start) / CYCLES
+
+
+def main() -> None:
+	print(f"{'images':>8} {'running':>8} {'ms/cycle':>10}")
+	for total in TOTAL_IMAGES:
+		registry = build_registry(total)
+		print(f"{total:>8} {RUNNING_IMAGES:>8} {time_cycles(registry) * 1000:>10.3f}")
+
+
+if __name__ == "__main__":
+	main()
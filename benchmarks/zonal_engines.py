@@ -0,0 +1,71 @@
+"""
+	Compares how long the "rasterstats" and "label" zonal stats engines take to compute the default statistics for a
+	grid of small, irregular field polygons over a synthetic float32 raster, with and without all_touched. Neighboring
+	fields share edges, so with all_touched they share pixels too, which the label engine handles by burning them in
+	separate layers.
+
+	Needs rasterio and numpy. Run with :code:`python benchmarks/zonal_engines.py`
+"""
+
+import os
+import tempfile
+import time
+
+import numpy
+import rasterio
+from rasterio.transform import from_origin
+
+from eedl import zonal
+
+RASTER_SIZE = 4096  # pixels
+PIXEL_SIZE = 30
+FIELDS_PER_SIDE = 150
+STATS = ('min', 'max', 'mean', 'median', 'std', 'count', 'percentile_10', 'percentile_90')
+
+
+def make_raster(path: str) -> None:
+	random = numpy.random.default_rng(0)
+	rows, columns = numpy.mgrid[0:RASTER_SIZE, 0:RASTER_SIZE]
+	data = (numpy.sin(rows / 300) * numpy.cos(columns / 500) * 1000 + random.normal(0, 5, rows.shape)).astype(numpy.float32)
+	data[random.random(data.shape) < 0.01] = -9999
+
+	with rasterio.open(path, "w", driver="GTiff", width=RASTER_SIZE, height=RASTER_SIZE, count=1, dtype="float32",
+						crs="EPSG:5070", transform=from_origin(0, 0, PIXEL_SIZE, PIXEL_SIZE), nodata=-9999) as dataset:
+		dataset.write(data, 1)
+
+
+def make_fields() -> list:
+	"""A grid of quadrilaterals whose shared corners are jittered, so the fields aren't aligned with the pixels"""
+	random = numpy.random.default_rng(1)
+	spacing = RASTER_SIZE * PIXEL_SIZE / FIELDS_PER_SIDE
+	xs, ys = numpy.meshgrid(numpy.arange(FIELDS_PER_SIDE + 1) * spacing, -numpy.arange(FIELDS_PER_SIDE + 1) * spacing)
+	xs[1:-1, 1:-1] += random.uniform(-spacing / 4, spacing / 4, (FIELDS_PER_SIDE - 1, FIELDS_PER_SIDE - 1))
+	ys[1:-1, 1:-1] += random.uniform(-spacing / 4, spacing / 4, (FIELDS_PER_SIDE - 1, FIELDS_PER_SIDE - 1))
+
+	fields = []
+	for row in range(FIELDS_PER_SIDE):
+		for column in range(FIELDS_PER_SIDE):
+			corners = [(row, column), (row, column + 1), (row + 1, column + 1), (row + 1, column), (row, column)]
+			ring = [(float(xs[corner]), float(ys[corner])) for corner in corners]
+			fields.append({"type": "Feature", "geometry": {"type": "Polygon", "coordinates": [ring]}, "properties": {"UniqueID": len(fields)}})
+	return fields
+
+
+def main() -> None:
+	with tempfile.TemporaryDirectory() as folder:
+		raster = os.path.join(folder, "raster.tif")
+		make_raster(raster)
+		fields = make_fields()
+
+		print(f"{len(fields)} fields over {RASTER_SIZE}x{RASTER_SIZE} float32 pixels")
+		print(f"{'engine':>12} {'all_touched':>12} {'seconds':>9}")
+		for all_touched in (False, True):
+			for engine in zonal.ZONAL_ENGINES:
+				start = time.perf_counter()
+				zonal.zonal_stats(fields, raster, folder, f"{engine}_{all_touched}", ("UniqueID",), STATS, report_threshold=0,
+									engine=engine, all_touched=all_touched)
+				print(f"{engine:>12} {str(all_touched):>12} {time.perf_counter() - start:>9.2f}")
+
+
+if __name__ == "__main__":
+	main()
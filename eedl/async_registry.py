@@ -0,0 +1,149 @@
+import asyncio
+import functools
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Union
+
+import ee
+
+from .image import EEDLImage, TaskRegistry, _run_callback_in_process
+from .scheduler import AdaptivePollScheduler, PollScheduler
+
+
+class AsyncTaskRegistry:
+	"""
+	An asyncio front end for a TaskRegistry, for programs that are already running an event loop. Exports, status polling,
+	downloads, and callbacks are all awaitable, and anything that blocks (Earth Engine requests, file moves, GDAL) runs
+	in executors so that the event loop stays free. Since nothing here blocks the loop, one event loop can drive many
+	registries at the same time - for example with :code:`asyncio.gather(*(registry.wait_for_images(...) for registry in registries))`.
+
+	The state of the images lives on the wrapped TaskRegistry, so all of its properties (:code:`images`,
+	:code:`failed_tasks`, etc) and settings (:code:`download_workers`, :code:`callback_workers`, :code:`callback_executor`,
+	:code:`status_backend`, the error log) apply here too.
+
+	Args:
+		registry (Optional[TaskRegistry]): The registry to drive. A new TaskRegistry is created if one isn't provided.
+	"""
+
+	def __init__(self, registry: Optional[TaskRegistry] = None) -> None:
+		self.registry = registry if registry is not None else TaskRegistry()
+		self._download_pool: Optional[Executor] = None
+		self._callback_pool: Optional[Executor] = None
+
+	async def export(self, image: EEDLImage, ee_image: ee.image.Image, filename_suffix: str, **export_kwargs: Any) -> None:
+		"""
+		Awaitable version of :code:`EEDLImage.export` that tracks the image in this registry. See that method for the arguments.
+
+		Args:
+			image (EEDLImage): The EEDLImage to run the export with.
+			ee_image (ee.image.Image): The Earth Engine image to export.
+			filename_suffix (str): The unique identifier used internally to identify images.
+			export_kwargs: Passed through to :code:`EEDLImage.export`.
+
+		Returns:
+			None
+		"""
+		image.task_registry = self.registry
+		await self._run(None, functools.partial(image.export, ee_image, filename_suffix, **export_kwargs))
+
+	async def update_task_statuses(self) -> None:
+		"""
+		Awaitable version of :code:`TaskRegistry.update_task_statuses`.
+		"""
+		await self._run(None, self.registry.update_task_statuses)
+
+	async def download_image(self, image: EEDLImage, download_location: Union[str, Path]) -> None:
+		"""
+		Downloads a single image on the download pool (sized by the registry's :code:`download_workers`).
+		"""
+		if self._download_pool is None:
+			self._download_pool = ThreadPoolExecutor(max_workers=self.registry.download_workers, thread_name_prefix="eedl_download")
+		await self._run(self._download_pool, functools.partial(image.download_results, download_location=download_location))
+
+	async def run_callback(self, image: EEDLImage, callback: str) -> None:
+		"""
+		Runs a callback for an image on the callback pool - threads or processes depending on the registry's :code:`callback_executor`.
+		"""
+		if self.registry.callback_executor == "process":
+			if self._callback_pool is None:
+				self._callback_pool = ProcessPoolExecutor(max_workers=self.registry.callback_workers)
+			results: Dict[str, Any] = await self._run(self._callback_pool, functools.partial(_run_callback_in_process, image, callback))
+			image._apply_callback_results(results)
+		elif self.registry.callback_executor == "thread":
+			if self._callback_pool is None:
+				self._callback_pool = ThreadPoolExecutor(max_workers=self.registry.callback_workers, thread_name_prefix="eedl_callback")
+			await self._run(self._callback_pool, functools.partial(image.run_callback, callback))
+		else:
+			raise ValueError("Invalid value for callback_executor. Did you mean \"thread\" or \"process\"?")
+
+	async def _process_image(self, image: EEDLImage, download_location: Union[str, Path], callback: Optional[str]) -> None:
+		print(f"{image.filename} is ready for download")
+		await self.download_image(image, download_location)
+		if callback:
+			await self.run_callback(image, callback)
+		self.registry._finish(image)
+
+	async def wait_for_images(self,
+								download_location: Union[str, Path],
+								sleep_time: int = 10,
+								callback: Optional[str] = None,
+								try_again_disk_full: bool = True,
+								on_failure: str = "log",
+								scheduler: Optional[PollScheduler] = None) -> None:
+		"""
+		Awaitable version of :code:`TaskRegistry.wait_for_images` - see that method for the arguments. Between polls, this
+		waits on the event loop rather than sleeping, and it wakes up as soon as any download or callback finishes.
+		"""
+		registry = self.registry
+		registry._configure_errors(on_failure)
+
+		registry.callback = callback
+		if scheduler is None:
+			scheduler = AdaptivePollScheduler(min_interval=min(2, sleep_time), max_interval=sleep_time)
+		registry.scheduler = scheduler
+
+		in_progress: Dict[EEDLImage, asyncio.Task] = {}
+		retry_at: Dict[EEDLImage, float] = {}  # images that failed to download wait for a polling interval before trying again
+		loop = asyncio.get_running_loop()
+		try:
+			while registry.has_pending_work or in_progress:
+				if scheduler.poll_due():
+					await self.update_task_statuses()
+
+				for image in registry.downloadable_tasks:
+					if image not in in_progress and retry_at.get(image, 0) <= loop.time():
+						in_progress[image] = asyncio.ensure_future(self._process_image(image, download_location, callback))
+
+				if in_progress:
+					await asyncio.wait(in_progress.values(), timeout=scheduler.next_poll_delay(), return_when=asyncio.FIRST_COMPLETED)
+				elif registry.has_pending_work:
+					await asyncio.sleep(scheduler.next_poll_delay())
+
+				for image, task in list(in_progress.items()):
+					if not task.done():
+						continue
+					del in_progress[image]
+
+					error = task.exception()
+					if error is not None and not image.task_data_downloaded:
+						retry_at[image] = loop.time() + scheduler.interval
+						if isinstance(error, OSError) and try_again_disk_full:
+							print("OSError reported. Invalid disk or the disk may be full - will try again - clear space")
+							continue
+					registry._handle_failure(image, error)
+		finally:
+			for task in in_progress.values():
+				task.cancel()
+			self._shutdown_pools()
+
+		registry._report_failed_tasks(on_failure)
+
+	async def _run(self, executor: Optional[Executor], func: Callable[[], Any]) -> Any:
+		return await asyncio.get_running_loop().run_in_executor(executor, func)
+
+	def _shutdown_pools(self) -> None:
+		for pool in (self._download_pool, self._callback_pool):
+			if pool is not None:
+				pool.shutdown(wait=False)
+		self._download_pool = None
+		self._callback_pool = None
@@ -0,0 +1,352 @@
+import bisect
+import errno
+import math
+import os
+import re
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .google_cloud import export_base_name, forget_verification
+
+DRIVE_POLL_INTERVAL = 1  # seconds between scans of a Drive sync folder
+DRIVE_SETTLE_TIME = 3  # seconds a file's size must stay the same before it's considered fully synced
+DRIVE_SYNC_TIMEOUT = 600  # seconds to wait for an export's tiles to show up before giving up
+
+RELOCATION_MODES = ("move", "link", "copy", "none")
+RELOCATION_WORKERS = 8  # files copied at once when they have to be copied between filesystems
+
+TILE_OFFSETS_PATTERN = re.compile(r"-(\d+)-(\d+)\.[^./]+$")
+
+
+class DriveSyncTimeout(TimeoutError):
+	"""
+	Raised when an export's tiles haven't all synced into the Drive folder before the timeout.
+	"""
+
+
+def expected_tile_count(width: int, height: int, file_dimensions: Union[int, Sequence[int]]) -> int:
+	"""
+	How many tiles Earth Engine splits an export into.
+
+	Args:
+		width (int): The width of the export, in pixels.
+		height (int): The height of the export, in pixels.
+		file_dimensions (Union[int, Sequence[int]]): The :code:`fileDimensions` export parameter - the size of each tile,
+			either as a single number for square tiles or as (width, height).
+
+	Returns:
+		int: The number of tiles.
+	"""
+	if isinstance(file_dimensions, int):
+		tile_width = tile_height = file_dimensions
+	else:
+		tile_width, tile_height = file_dimensions
+	return max(1, math.ceil(width / tile_width)) * max(1, math.ceil(height / tile_height))
+
+
+def tile_grid_complete(names: Sequence[str]) -> bool:
+	"""
+	Checks that a set of tiles from one export has no holes in it - every combination of the row and column offsets in
+	the tile names needs to be present. This can't tell whether a whole row or column at the edge is missing - that
+	needs the number of tiles expected - but it catches tiles that are still syncing in the middle of the set.
+
+	Args:
+		names (Sequence[str]): The tile filenames.
+
+	Returns:
+		bool: True if the tiles form a complete grid.
+	"""
+	if not names:
+		return False
+
+	offsets = set()
+	for name in names:
+		match = TILE_OFFSETS_PATTERN.search(name)
+		if match is None:  # a single tile export, with no offsets in its name
+			return len(names) == 1
+		offsets.add((int(match.group(1)), int(match.group(2))))
+
+	rows = {row for row, _ in offsets}
+	columns = {column for _, column in offsets}
+	return len(offsets) == len(rows) * len(columns)
+
+
+class DriveFolderIndex:
+	"""
+	The names in a folder, sorted so that the files starting with a prefix can be found with a binary search rather
+	than by checking every name - with thousands of images exporting to one folder, checking every name for every
+	image adds up to millions of comparisons per poll.
+
+	Args:
+		names (Iterable[str]): The names of the files in the folder.
+	"""
+
+	def __init__(self, names: Iterable[str]) -> None:
+		self.names = sorted(names)
+
+	def __len__(self) -> int:
+		return len(self.names)
+
+	def __contains__(self, name: object) -> bool:
+		position = bisect.bisect_left(self.names, name)  # type: ignore
+		return position < len(self.names) and self.names[position] == name
+
+	def with_prefix(self, prefix: str) -> List[str]:
+		"""
+		Args:
+			prefix (str): The start of the names to find.
+
+		Returns:
+			List[str]: The names starting with prefix, in sorted order.
+		"""
+		start = bisect.bisect_left(self.names, prefix)
+		end = start
+		while end < len(self.names) and self.names[end].startswith(prefix):
+			end += 1
+		return self.names[start:end]
+
+	def export_files(self, prefix: str) -> List[str]:
+		"""
+		Args:
+			prefix (str): An export's :code:`fileNamePrefix`.
+
+		Returns:
+			List[str]: The names of the export's files - only its own, not those of other exports whose names start the same way.
+		"""
+		return [name for name in self.with_prefix(prefix) if export_base_name(name) == prefix]
+
+	@classmethod
+	def scan(cls, folder: Union[str, Path]) -> "DriveFolderIndex":
+		"""
+		Args:
+			folder (Union[str, Path]): The folder to index.
+
+		Returns:
+			DriveFolderIndex: An index of the folder's files, or an empty one if the folder doesn't exist (yet).
+		"""
+		try:
+			with os.scandir(folder) as entries:
+				return cls([entry.name for entry in entries])
+		except FileNotFoundError:  # the Drive client hasn't created the folder yet
+			return cls([])
+
+
+class DriveSyncWatcher:
+	"""
+	Watches a Google Drive sync folder for exported tiles to arrive. Earth Engine reports a Drive export as complete
+	well before the Drive client has finished syncing its files, so rather than sleeping for a fixed time and taking
+	whatever is there, :code:`wait_for_export` returns as soon as an export's full set of tiles is present and their
+	sizes have stopped changing.
+
+	The folder is polled with a single directory scan per poll interval, which is shared by every image waiting on the
+	same folder (use :code:`get_watcher` to get the shared watcher for a folder). Each scan builds a DriveFolderIndex, so
+	each image finds its tiles with a binary search, and only the files of exports being checked have their sizes read.
+
+	Args:
+		folder (Union[str, Path]): The folder the exports sync into.
+		poll_interval (float): The most often the folder is scanned, in seconds.
+		settle_time (float): How long a file's size needs to stay the same before it's treated as fully synced.
+		clock (Callable[[], float]): Returns the current time in seconds - replaceable for testing.
+		sleep (Callable[[float], None]): Waits for the given number of seconds - replaceable for testing.
+	"""
+
+	def __init__(self,
+					folder: Union[str, Path],
+					poll_interval: float = DRIVE_POLL_INTERVAL,
+					settle_time: float = DRIVE_SETTLE_TIME,
+					clock: Callable[[], float] = time.time,
+					sleep: Callable[[float], None] = time.sleep) -> None:
+
+		self.folder = folder
+		self.poll_interval = poll_interval
+		self.settle_time = settle_time
+		self.clock = clock
+		self.sleep = sleep
+		self.scans = 0
+		self.index = DriveFolderIndex([])
+		self._sizes: Dict[str, Tuple[int, float]] = {}  # filename: (size, when it was first seen at that size)
+		self._checked: Dict[str, Tuple[int, float]] = {}  # sizes already read since the latest scan
+		self._last_scan: Optional[float] = None
+		self._lock = threading.Lock()
+
+	def _scan(self) -> DriveFolderIndex:
+		with self._lock:
+			now = self.clock()
+			if self._last_scan is not None and now - self._last_scan < self.poll_interval:
+				return self.index
+
+			self.index = DriveFolderIndex.scan(self.folder)
+			self._sizes = {name: size for name, size in self._sizes.items() if name in self.index}
+			self._checked = {}
+			self._last_scan = now
+			self.scans += 1
+			return self.index
+
+	def _file_sizes(self, names: Sequence[str]) -> Dict[str, Tuple[int, float]]:
+		"""
+		Reads the sizes of files, at most once per scan, and keeps track of how long each has been at its current size.
+		"""
+		sizes = {}
+		with self._lock:
+			now = self.clock()
+			for name in names:
+				if name not in self._checked:
+					try:
+						stat = os.stat(os.path.join(self.folder, name))
+					except FileNotFoundError:  # moved away since the folder was scanned
+						continue
+					previous = self._sizes.get(name)
+					if previous is not None and previous[0] == stat.st_size:
+						self._checked[name] = previous
+					elif previous is None:  # files that were already there when first seen have been unchanged since they were last modified
+						self._checked[name] = (stat.st_size, min(now, stat.st_mtime))
+					else:
+						self._checked[name] = (stat.st_size, now)
+					self._sizes[name] = self._checked[name]
+				sizes[name] = self._checked[name]
+		return sizes
+
+	def export_files(self, prefix: str) -> List[str]:
+		"""
+		Args:
+			prefix (str): The export's :code:`fileNamePrefix`.
+
+		Returns:
+			List[str]: The names of the files in the folder that belong to the export, as of the latest scan.
+		"""
+		return self._scan().export_files(prefix)
+
+	def is_complete(self, prefix: str, expected_tiles: Optional[int] = None) -> bool:
+		"""
+		Args:
+			prefix (str): The export's :code:`fileNamePrefix`.
+			expected_tiles (Optional[int]): How many tiles the export should have, if known. When it isn't known, the export
+				is considered complete once its tiles form a complete grid.
+
+		Returns:
+			bool: True once the export's tiles have all arrived and stopped changing size.
+		"""
+		names = self.export_files(prefix)
+		if not tile_grid_complete(names) or (expected_tiles is not None and len(names) < expected_tiles):
+			return False
+
+		sizes = self._file_sizes(names)
+		now = self.clock()
+		return len(sizes) == len(names) and all(size > 0 and now - since >= self.settle_time for size, since in sizes.values())
+
+	def wait_for_export(self, prefix: str, expected_tiles: Optional[int] = None, timeout: float = DRIVE_SYNC_TIMEOUT) -> List[str]:
+		"""
+		Waits until an export's tiles have all synced into the folder.
+
+		Args:
+			prefix (str): The export's :code:`fileNamePrefix`.
+			expected_tiles (Optional[int]): How many tiles the export should have, if known - see :code:`expected_tile_count`.
+			timeout (float): How long to wait, in seconds, before raising DriveSyncTimeout.
+
+		Returns:
+			List[str]: The full paths of the export's tiles.
+		"""
+		deadline = self.clock() + timeout
+		while not self.is_complete(prefix, expected_tiles):
+			if self.clock() >= deadline:
+				found = self.export_files(prefix)
+				raise DriveSyncTimeout(f"Only {len(found)} of {expected_tiles if expected_tiles is not None else 'the'} tiles for {prefix}"
+										f" synced into {self.folder} within {timeout} seconds. Found: {found}")
+			self.sleep(self.poll_interval)
+
+		return [os.path.join(self.folder, name) for name in self.export_files(prefix)]
+
+
+_watchers: Dict[str, DriveSyncWatcher] = {}
+_watchers_lock = threading.Lock()
+
+
+def get_watcher(folder: Union[str, Path]) -> DriveSyncWatcher:
+	"""
+	Args:
+		folder (Union[str, Path]): A Drive sync folder.
+
+	Returns:
+		DriveSyncWatcher: The watcher for the folder, shared by every image exporting to it.
+	"""
+	key = os.path.abspath(folder)
+	with _watchers_lock:
+		if key not in _watchers:
+			_watchers[key] = DriveSyncWatcher(folder)
+		return _watchers[key]
+
+
+def relocate_files(paths: Sequence[Union[str, Path]],
+					destination: Union[str, Path],
+					mode: str = "move",
+					max_workers: int = RELOCATION_WORKERS,
+					on_file: Optional[Callable[[str], None]] = None) -> List[str]:
+	"""
+	Moves, links, or copies files into a folder, as cheaply as the filesystems allow. When the files and the destination
+	are on the same filesystem, "move" renames them and "link" hard links them, so no data is copied. Otherwise, both
+	copy the files :code:`max_workers` at a time (each to a temporary name first, so a partial copy is never mistaken for a
+	tile), and "move" then removes the originals.
+
+	Args:
+		paths (Sequence[Union[str, Path]]): The files to relocate.
+		destination (Union[str, Path]): The folder to put them in. Created if it doesn't exist.
+		mode (str): "move" (the default) to take the files out of their current folder, "link" or "copy" to leave the
+			originals where they are, or "none" to leave the files alone altogether.
+		max_workers (int): How many files to copy at once when they need to be copied.
+		on_file (Optional[Callable[[str], None]]): Called with each file's new path as soon as it's in place - from the copy
+			threads when files are copied.
+
+	Returns:
+		List[str]: The paths of the files after relocating them - the original paths for "none".
+	"""
+	if mode not in RELOCATION_MODES:
+		raise ValueError(f"Unknown relocation mode {mode} - must be one of {RELOCATION_MODES}")
+	if mode == "none":
+		if on_file is not None:
+			for path in paths:
+				on_file(str(path))
+		return [str(path) for path in paths]
+
+	os.makedirs(destination, exist_ok=True)
+	targets = [os.path.join(destination, os.path.basename(path)) for path in paths]
+	if not paths:
+		return targets
+
+	same_device = os.stat(paths[0]).st_dev == os.stat(destination).st_dev
+
+	def _relocate(source: Union[str, Path], target: str) -> None:
+		if same_device and mode != "copy":
+			try:
+				if mode == "move":
+					os.replace(source, target)
+					forget_verification(source)
+				else:
+					if os.path.exists(target):
+						os.remove(target)
+					os.link(source, target)
+				if on_file is not None:
+					on_file(target)
+				return
+			except OSError as error:  # some filesystems (and sync clients' FUSE mounts) don't support hard links
+				if error.errno not in (errno.EXDEV, errno.EPERM, errno.ENOTSUP, errno.EMLINK):
+					raise
+
+		part_path = f"{target}.part"
+		shutil.copyfile(source, part_path)
+		os.replace(part_path, target)
+		if mode == "move":
+			os.remove(source)
+			forget_verification(source)
+		if on_file is not None:
+			on_file(target)
+
+	with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="eedl_relocate") as pool:
+		futures = [pool.submit(_relocate, source, target) for source, target in zip(paths, targets)]
+	for future in futures:
+		future.result()  # raise the first error, if there was one
+
+	return targets
@@ -1,75 +1,616 @@
+import base64
+import hashlib
 import os
 import re
+import threading
+import time
+import xml.etree.ElementTree as ElementTree
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar, Union
 
+import google_crc32c
 import requests
+from requests.adapters import HTTPAdapter
 
 
 from google.cloud import storage  # type: ignore
 
+PUBLIC_BASE_URL = "https://storage.googleapis.com/"  # where public buckets are read from - can be pointed elsewhere for testing
+DOWNLOAD_BUFFER_SIZE = 1024 * 1024  # bytes read from the network and written to disk at a time
+RETRY_STATUSES = (408, 429, 500, 502, 503, 504)  # responses worth trying again after a pause
 
-def get_public_export_urls(bucket_name: str, prefix: str = "") -> List[str]:
+LISTING_TTL = 30  # seconds a bucket listing is reused for before being requested again
+
+# Once a downloaded file has been checked against its hash, a hidden ".<name>.verified" file next to it records its size,
+# modification time, and hash, so later runs can tell it's intact without reading it all again
+VERIFIED_SUFFIX = ".verified"
+
+# Earth Engine names tiles <fileNamePrefix>-<row offset>-<column offset>.tif, or just <fileNamePrefix>.tif for single tiles
+TILE_SUFFIX_PATTERN = re.compile(r"(-\d+-\d+)?\.[^./]+$")
+
+T = TypeVar("T")
+
+
+class DownloadIntegrityError(IOError):
+	"""
+	Raised when a downloaded file doesn't match the size the bucket listing reported for it, or the MD5 or CRC32C hash
+	the bucket has for it.
+	"""
+
+
+class BucketObject:
+	"""
+	An object in a bucket listing.
+	"""
+
+	__slots__ = ("key", "size", "md5", "crc32c")
+
+	def __init__(self, key: str, size: int, md5: Optional[str] = None, crc32c: Optional[str] = None) -> None:
+		self.key = key
+		self.size = size
+		self.md5 = md5  # hex digest, when the bucket reports one (objects uploaded in one piece)
+		self.crc32c = crc32c  # base64 digest, as Cloud Storage reports it - bucket listings don't include it, but downloads do
+
+	def __repr__(self) -> str:
+		return f"BucketObject({self.key!r}, {self.size})"
+
+
+def export_base_name(key: str) -> str:
+	"""
+	Args:
+		key (str): The name of a tile in a bucket, e.g. :code:`folder/image-0000000000-0000000256.tif`
+
+	Returns:
+		str: The export prefix the tile belongs to, e.g. :code:`folder/image`
+	"""
+	return TILE_SUFFIX_PATTERN.sub("", key)
+
+
+class ExportListingCache:
+	"""
+	Keeps recent listings of export folders in memory so that downloading many images from the same folder
+	only lists the folder once, instead of once per image. Each listing is indexed by export prefix
+	(:code:`<export_folder>/<filename>`), so finding an image's tiles is a dictionary lookup. Listings expire after
+	:code:`ttl` seconds. If an image's tiles aren't in a cached listing (they may have landed after it was made), the
+	folder is listed again once before concluding there's nothing to download. Callers that know when an export finished
+	should pass it as :code:`listed_after` so that a listing made while the export was still writing tiles isn't used.
+
+	Args:
+		downloader (PublicExportDownloader): Used to make the listing requests.
+		ttl (float): Seconds to reuse a listing for.
+		clock (Callable[[], float]): The time function used for expiry - seconds since the epoch, comparable with :code:`listed_after`.
+	"""
+
+	def __init__(self, downloader: "PublicExportDownloader", ttl: float = LISTING_TTL, clock: Callable[[], float] = time.time) -> None:
+		self.downloader = downloader
+		self.ttl = ttl
+		self.clock = clock
+		self._listings: Dict[Tuple[str, str, str], Tuple[float, List[BucketObject], Dict[str, List[BucketObject]]]] = {}
+		self._locks: Dict[Tuple[str, str, str], threading.Lock] = {}
+		self._locks_lock = threading.Lock()
+
+	def objects(self, bucket_name: str, prefix: str, base_url: str, listed_after: Optional[float] = None, exact: bool = True) -> List[BucketObject]:
+		"""
+		Args:
+			bucket_name (str): The bucket.
+			prefix (str): An export prefix (:code:`<export_folder>/<filename>`), which only matches that export's tiles - not
+				those of another export whose name starts the same way - or a folder (ending in "/", or empty for the top of
+				the bucket), which matches everything in it.
+			base_url (str): The storage endpoint.
+			listed_after (Optional[float]): Only use a cached listing made after this time (seconds since the epoch).
+			exact (bool): When False, :code:`prefix` is a plain name prefix (such as :code:`exports/image_`) and matches every
+				object whose name starts with it, as a bucket listing would.
+
+		Returns:
+			List[BucketObject]: The objects matching the prefix. If there are none in the cached listing, the folder is
+				listed again before returning an empty list.
+		"""
+		folder = prefix[:prefix.rfind("/") + 1]
+		key = (base_url, bucket_name, folder)
+		with self._locks_lock:
+			lock = self._locks.setdefault(key, threading.Lock())
+
+		with lock:  # one listing per folder at a time - other images from the folder wait for it rather than listing too
+			listing = self._listings.get(key)
+			fresh = listing is None or self.clock() - listing[0] > self.ttl or (listed_after is not None and listing[0] < listed_after)
+			if fresh:
+				listing = self._list(key)
+
+			found = self._match(listing, prefix, exact)  # type: ignore
+			if not found and not fresh:
+				listing = self._list(key)
+				found = self._match(listing, prefix, exact)
+
+		return found
+
+	def invalidate(self) -> None:
+		"""
+		Forgets all cached listings.
+		"""
+		self._listings.clear()
+
+	def _list(self, key: Tuple[str, str, str]) -> Tuple[float, List[BucketObject], Dict[str, List[BucketObject]]]:
+		base_url, bucket_name, folder = key
+		objects = self.downloader.list_objects(bucket_name, folder, base_url=base_url)
+		index: Dict[str, List[BucketObject]] = {}
+		for bucket_object in objects:
+			index.setdefault(export_base_name(bucket_object.key), []).append(bucket_object)
+
+		listing = (self.clock(), objects, index)
+		self._listings[key] = listing
+		return listing
+
+	@staticmethod
+	def _match(listing: Tuple[float, List[BucketObject], Dict[str, List[BucketObject]]], prefix: str, exact: bool) -> List[BucketObject]:
+		_, objects, index = listing
+		if prefix.endswith("/") or not prefix:
+			return objects
+		if not exact:
+			return [bucket_object for bucket_object in objects if bucket_object.key.startswith(prefix)]
+		return index.get(prefix, [])
+
+
+class PublicExportDownloader:
+	"""
+	Downloads exports from *public* Google Cloud Storage buckets. All requests share one :code:`requests.Session`, so
+	connections (and their TLS handshakes) are reused across tiles and across images, and tiles are downloaded
+	:code:`max_workers` at a time on a thread pool. Requests that fail with a connection error or a transient server
+	error are retried with exponential backoff.
+
+	The module-level :code:`get_public_export_urls` and :code:`download_public_export` functions use a shared
+	downloader - see :code:`get_default_downloader` and :code:`set_default_downloader` to configure it.
+
+	Args:
+		max_workers (int): How many tiles to download at once. This is shared by every image using this downloader.
+		retries (int): How many times to retry a failed request before giving up.
+		backoff_factor (float): Seconds to wait before the first retry - doubles with each retry after that.
+		timeout (float): Seconds to wait for the server to respond (or send more data) before treating the request as failed.
+		listing_ttl (float): Seconds to reuse a listing of an export folder for - see ExportListingCache.
+	"""
+
+	def __init__(self, max_workers: int = 8, retries: int = 3, backoff_factor: float = 0.5, timeout: float = 60, listing_ttl: float = LISTING_TTL) -> None:
+		self.max_workers = max_workers
+		self.retries = retries
+		self.backoff_factor = backoff_factor
+		self.timeout = timeout
+		self.listing_cache = ExportListingCache(self, ttl=listing_ttl)
+
+		self.session = requests.Session()
+		adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)  # one pooled connection per worker
+		self.session.mount("http://", adapter)
+		self.session.mount("https://", adapter)
+		self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="eedl_tile_download")
+
+	def list_objects(self, bucket_name: str, prefix: str = "", base_url: Optional[str] = None) -> List[BucketObject]:
+		"""
+		Lists everything in the bucket starting with :code:`prefix`, following the listing across as many pages
+		as it takes (the storage API returns at most 1000 objects per page). Always makes new requests - see
+		:code:`list_urls` for the cached version.
+
+		Args:
+			bucket_name (str): Name of the Google Cloud Storage Bucket to pull data from.
+			prefix (str): Only objects whose name starts with this prefix are listed - defaults to all of them.
+			base_url (Optional[str]): The storage endpoint, ending in a slash. Defaults to PUBLIC_BASE_URL.
+
+		Returns:
+			List[BucketObject]: The objects, with their sizes and MD5 hashes.
+		"""
+		if base_url is None:
+			base_url = PUBLIC_BASE_URL
+		request_url = f"{base_url}{bucket_name}/"
+
+		objects: List[BucketObject] = []
+		marker = ""
+		while True:
+			params = {"prefix": prefix, "marker": marker}
+			page = ElementTree.fromstring(self._with_retries(lambda: self._get_text(request_url, params=params)))
+			namespace = page.tag[:page.tag.index("}") + 1] if page.tag.startswith("{") else ""
+
+			for contents in page.iter(f"{namespace}Contents"):
+				etag = (contents.findtext(f"{namespace}ETag") or "").strip('"')
+				objects.append(BucketObject(
+					key=contents.findtext(f"{namespace}Key") or "",
+					size=int(contents.findtext(f"{namespace}Size") or 0),
+					md5=etag if re.fullmatch("[0-9a-f]{32}", etag) else None,  # composite uploads have other kinds of ETags
+				))
+
+			if page.findtext(f"{namespace}IsTruncated") != "true" or not objects:
+				break
+			marker = page.findtext(f"{namespace}NextMarker") or objects[-1].key
+
+		return objects
+
+	def list_urls(self,
+					bucket_name: str,
+					prefix: str = "",
+					base_url: Optional[str] = None,
+					listed_after: Optional[float] = None,
+					exact: bool = True) -> List[str]:
+		"""
+		Args:
+			bucket_name (str): Name of the Google Cloud Storage Bucket to pull data from.
+			prefix (str): An export prefix (:code:`<export_folder>/<filename>`), to get that image's tiles, or a folder ending
+				in "/" to get everything in it - defaults to all files.
+			base_url (Optional[str]): The storage endpoint, ending in a slash. Defaults to PUBLIC_BASE_URL.
+			listed_after (Optional[float]): When the export finished (seconds since the epoch) - cached listings from before then aren't used.
+			exact (bool): Set to False to treat :code:`prefix` as a plain name prefix that matches every file starting with it,
+				rather than a single export.
+
+		Returns:
+			List[str]: The urls of the matching files.
+		"""
+		if base_url is None:
+			base_url = PUBLIC_BASE_URL
+		request_url = f"{base_url}{bucket_name}/"
+
+		return [f"{request_url}{bucket_object.key}" for bucket_object in self.listing_cache.objects(bucket_name, prefix, base_url, listed_after, exact)]
+
+	def download_export(self,
+						bucket_name: str,
+						output_folder: Union[str, Path],
+						prefix: str = "",
+						base_url: Optional[str] = None,
+						buffer_size: int = DOWNLOAD_BUFFER_SIZE,
+						listed_after: Optional[float] = None,
+						on_file: Optional[Callable[[str], None]] = None,
+						exact: bool = True) -> List[Path]:
+		"""
+		Downloads an export's tiles (or everything in a folder) into :code:`output_folder`, in parallel.
+		If any tile can't be downloaded, the first error is raised once the rest have finished.
+
+		Running it again for the same export picks up where it left off - tiles already in :code:`output_folder` that
+		match the size and MD5 hash in the bucket listing are skipped, and partially downloaded tiles are resumed.
+
+		Args:
+			bucket_name (str): Name of the Google Cloud Storage Bucket to pull data from.
+			output_folder (Union[str, Path]): Destination folder for exported data.
+			prefix (str): An export prefix (:code:`<export_folder>/<filename>`), to download that image's tiles, or a folder ending
+				in "/" to download everything in it - defaults to all files.
+			base_url (Optional[str]): The storage endpoint, ending in a slash. Defaults to PUBLIC_BASE_URL.
+			buffer_size (int): How many bytes of each file to hold in memory at a time while downloading.
+			listed_after (Optional[float]): When the export finished (seconds since the epoch) - cached listings from before then aren't used.
+			on_file (Optional[Callable[[str], None]]): Called with each file's path as soon as it's downloaded, from the download thread.
+			exact (bool): Set to False to treat :code:`prefix` as a plain name prefix that matches every file starting with it,
+				rather than a single export.
+
+		Returns:
+			List[Path]: The paths of the downloaded files.
+		"""
+		if base_url is None:
+			base_url = PUBLIC_BASE_URL
+		objects = self.listing_cache.objects(bucket_name, prefix, base_url, listed_after, exact)
+
+		os.makedirs(output_folder, exist_ok=True)
+
+		output_paths = [Path(output_folder) / bucket_object.key.split("/")[-1] for bucket_object in objects]
+
+		def _download(bucket_object: BucketObject, output_path: Path) -> None:
+			self.download_file(f"{base_url}{bucket_name}/{bucket_object.key}", output_path, buffer_size, bucket_object)
+			if on_file is not None:
+				on_file(str(output_path))
+
+		futures = [self._pool.submit(_download, bucket_object, output_path) for bucket_object, output_path in zip(objects, output_paths)]
+
+		errors = [future.exception() for future in futures]  # waits for all of them, so nothing is left writing when we return
+		for error in errors:
+			if error is not None:
+				raise error
+
+		return output_paths
+
+	def download_file(self,
+						url: str,
+						output_path: Union[str, Path],
+						buffer_size: int = DOWNLOAD_BUFFER_SIZE,
+						expected: Optional[BucketObject] = None) -> None:
+		"""
+		Streams a file to disk with retries - see the module-level :code:`download_file`. If the listing entry for the
+		file is provided, its size and hash are used to skip or resume the download and to verify it.
+		"""
+		expected_size = expected.size if expected is not None else None
+		expected_md5 = expected.md5 if expected is not None else None
+		expected_crc32c = expected.crc32c if expected is not None else None
+		self._with_retries(lambda: download_file(url, output_path, buffer_size=buffer_size, session=self.session, timeout=self.timeout,
+													expected_size=expected_size, expected_md5=expected_md5, expected_crc32c=expected_crc32c))
+
+	def close(self) -> None:
+		self._pool.shutdown(wait=True)
+		self.session.close()
+
+	def _get_text(self, url: str, params: Optional[dict] = None) -> str:
+		response = self.session.get(url, params=params, timeout=self.timeout)
+		response.raise_for_status()
+		return response.text
+
+	def _with_retries(self, request: Callable[[], T]) -> T:
+		for attempt in range(self.retries + 1):
+			try:
+				return request()
+			except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError, DownloadIntegrityError) as error:
+				last_error: Exception = error
+			except requests.HTTPError as error:
+				if error.response is None or error.response.status_code not in RETRY_STATUSES:
+					raise
+				last_error = error
+
+			if attempt < self.retries:
+				time.sleep(self.backoff_factor * (2 ** attempt))
+
+		raise last_error
+
+
+_default_downloader: Optional[PublicExportDownloader] = None
+_default_downloader_lock = threading.Lock()
+
+
+def get_default_downloader() -> PublicExportDownloader:
+	"""
+	Returns:
+		PublicExportDownloader: The downloader used by :code:`get_public_export_urls` and :code:`download_public_export`, created on first use.
+	"""
+	global _default_downloader
+	with _default_downloader_lock:
+		if _default_downloader is None:
+			_default_downloader = PublicExportDownloader()
+		return _default_downloader
+
+
+def set_default_downloader(downloader: PublicExportDownloader) -> None:
+	"""
+	Replaces the downloader used by :code:`get_public_export_urls` and :code:`download_public_export` - for example,
+	to change how many tiles are downloaded at once with :code:`set_default_downloader(PublicExportDownloader(max_workers=16))`.
+
+	Args:
+		downloader (PublicExportDownloader): The new downloader.
+
+	Returns:
+		None
+	"""
+	global _default_downloader
+	with _default_downloader_lock:
+		_default_downloader = downloader
+
+
+def get_public_export_urls(bucket_name: str,
+							prefix: str = "",
+							base_url: Optional[str] = None,
+							listed_after: Optional[float] = None,
+							exact: bool = True) -> List[str]:
 	"""
 	Downloads items from a *public* Google Cloud Storage Bucket without using a GCloud login. Filters only to files.
 	with the specified prefix.
 
 	Args:
 		bucket_name (str): Name of the Google Cloud Storage Bucket to pull data from.
-		prefix (str): A prefix to use to filter items in the bucket - only URLs where the path matches this prefix will be returned - defaults to all files.
+		prefix (str): An export prefix (:code:`<export_folder>/<filename>`), to get just that image's tiles, or a folder
+			ending in "/" to get everything in it - defaults to all files.
+		base_url (Optional[str]): The storage endpoint, ending in a slash. Defaults to PUBLIC_BASE_URL.
+		listed_after (Optional[float]): When the export finished (seconds since the epoch) - cached listings of the export folder from before then aren't used.
+		exact (bool): Set to False to treat :code:`prefix` as a plain name prefix that matches every file starting with it,
+			rather than a single export.
 
 	Returns:
 		List[str]: A list of urls.
 	"""
+	return get_default_downloader().list_urls(bucket_name, prefix, base_url=base_url, listed_after=listed_after, exact=exact)
 
-	base_url = "https://storage.googleapis.com/"
-	request_url = f"{base_url}{bucket_name}/"
-	search_url = f"{request_url}?prefix={prefix}"  # need to include the prefix here or else we get failures after having more than 1k items
 
-	# get the content of the bucket (it needs to be public)
-	listing = requests.get(search_url).text
+def download_public_export(bucket_name: str,
+							output_folder: Union[str, Path],
+							prefix: str = "",
+							base_url: Optional[str] = None,
+							buffer_size: int = DOWNLOAD_BUFFER_SIZE,
+							listed_after: Optional[float] = None,
+							on_file: Optional[Callable[[str], None]] = None,
+							exact: bool = True) -> None:
+	"""
 
-	# Comes back as an XML listing - don't need to parse the XML, just need the values of the Key elements
-	pattern = re.compile("<Key>(.*?)</Key>")
-	items = pattern.findall(listing)
-	# Make them into full URLs with the bucket URL at the front and check if the files have the prefix specific
-	filtered = [f"{request_url}{item}" for item in items if item.startswith(prefix)]
+	Args:
+		bucket_name (str): Name of the Google Cloud Storage Bucket to pull data from.
+		output_folder (Union[str, Path]): Destination folder for exported data.
+		prefix (str): An export prefix (:code:`<export_folder>/<filename>`), to get just that image's tiles, or a folder
+			ending in "/" to get everything in it - defaults to all files.
+		base_url (Optional[str]): The storage endpoint, ending in a slash. Defaults to PUBLIC_BASE_URL.
+		buffer_size (int): How many bytes of each file to hold in memory at a time while downloading.
+		listed_after (Optional[float]): When the export finished (seconds since the epoch) - cached listings of the export folder from before then aren't used.
+		on_file (Optional[Callable[[str], None]]): Called with each file's path as soon as it's downloaded, from the download thread.
+		exact (bool): Set to False to treat :code:`prefix` as a plain name prefix that matches every file starting with it,
+			rather than a single export.
 
-	return filtered
+	Returns:
+		None
+	"""
+	get_default_downloader().download_export(bucket_name, output_folder, prefix, base_url=base_url, buffer_size=buffer_size,
+												listed_after=listed_after, on_file=on_file, exact=exact)
 
 
-def download_public_export(bucket_name: str, output_folder: Union[str, Path], prefix: str = "") -> None:
+def download_file(url: str,
+					output_path: Union[str, Path],
+					buffer_size: int = DOWNLOAD_BUFFER_SIZE,
+					session: Optional[requests.Session] = None,
+					timeout: Optional[float] = None,
+					expected_size: Optional[int] = None,
+					expected_md5: Optional[str] = None,
+					expected_crc32c: Optional[str] = None) -> bool:
 	"""
+	Streams a file to disk, holding no more than :code:`buffer_size` bytes of it in memory at once. The data is written
+	to a temporary :code:`.part` file next to the output and only renamed to the output path once it's complete, so an
+	interrupted download never leaves a truncated file behind under the real name.
+
+	Downloads are hashed as they stream in and checked against the file's MD5 hash, or its CRC32C hash when there's no
+	MD5 (objects uploaded in parts only have a CRC32C). Hashes that aren't provided are taken from the :code:`x-goog-hash`
+	header Cloud Storage sends with the file. A :code:`DownloadIntegrityError` is raised (and the partial file removed) if
+	the size or hash doesn't match. Once a file is verified, that's recorded next to it (see VERIFIED_SUFFIX).
+
+	When the expected size is known from the bucket listing:
+
+	* an existing file at :code:`output_path` of that size is kept, and nothing is downloaded, if it was already
+		verified and hasn't changed since, or if it matches the expected hash - files that can't be checked are downloaded again
+	* an existing :code:`.part` file from an interrupted download is resumed with an HTTP Range request
 
 	Args:
-		bucket_name (str): Name of the Google Cloud Storage Bucket to pull data from.
-		output_folder (Union[str, Path]): Destination folder for exported data.
-		prefix (str): A prefix to use to filter items in the bucket - only URLs where the path matches this prefix will be returned - defaults to all files.
+		url (str): The URL to download.
+		output_path (Union[str, Path]): Where to save the file.
+		buffer_size (int): How many bytes to read and write at a time.
+		session (Optional[requests.Session]): The session to make the request with, to reuse its connections.
+		timeout (Optional[float]): Seconds to wait for the server before giving up.
+		expected_size (Optional[int]): The size of the file in bytes, from the bucket listing.
+		expected_md5 (Optional[str]): The hex MD5 digest of the file, from the bucket listing.
+		expected_crc32c (Optional[str]): The base64 CRC32C digest of the file, as Cloud Storage reports it.
 
 	Returns:
-		None
+		bool: False if an existing file already matched and nothing was downloaded, True otherwise.
 	"""
-	# Get the urls of items in the bucket with the specified prefix
-	urls = get_public_export_urls(bucket_name, prefix)
+	expected_hash = ("md5", expected_md5) if expected_md5 is not None else ("crc32c", expected_crc32c) if expected_crc32c is not None else None
+	if expected_size is not None and os.path.exists(output_path) and os.path.getsize(output_path) == expected_size:
+		verified_hash = _verified_hash(output_path)
+		if verified_hash is not None and (expected_hash is None or verified_hash == expected_hash):
+			return False
+		if expected_hash is not None and _file_hash(output_path, expected_hash[0], buffer_size) == expected_hash[1]:
+			_mark_verified(output_path, expected_hash)
+			return False
 
-	os.makedirs(output_folder, exist_ok=True)
+	part_path = f"{output_path}.part"
+	offset = 0
+	if expected_size is not None and os.path.exists(part_path):
+		offset = os.path.getsize(part_path)
+		if offset > expected_size:  # not from this file - start over
+			offset = 0
+
+	check_hash = expected_hash
+	if offset == 0 or expected_size is None or offset < expected_size:  # otherwise the data all arrived last time, but wasn't moved into place
+		headers = {"Range": f"bytes={offset}-"} if offset > 0 else {}
+		getter = session.get if session is not None else requests.get
+		with getter(url, stream=True, timeout=timeout, headers=headers) as response:
+			response.raise_for_status()
+			if offset > 0 and response.status_code != 206:  # the server sent the whole file instead of the rest of it
+				offset = 0
+			if check_hash is None:
+				check_hash = _response_hash(response)
+
+			hasher = _new_hasher(check_hash[0]) if check_hash is not None else None
+			if hasher is not None and offset > 0:
+				_hash_file(part_path, hasher, buffer_size)  # pick the hash up where the download left off
+			with open(part_path, 'ab' if offset > 0 else 'wb') as output:
+				for chunk in response.iter_content(chunk_size=buffer_size):
+					output.write(chunk)
+					if hasher is not None:
+						hasher.update(chunk)
+		digest = _hex_or_base64(check_hash[0], hasher) if check_hash is not None and hasher is not None else None
+	else:
+		digest = _file_hash(part_path, check_hash[0], buffer_size) if check_hash is not None else None
+
+	size = os.path.getsize(part_path)
+	if (expected_size is not None and size != expected_size) or (check_hash is not None and digest != check_hash[1]):
+		os.remove(part_path)
+		raise DownloadIntegrityError(f"Download of {url} doesn't match the bucket (got {size} bytes, expected {expected_size}, "
+										f"{check_hash[0] if check_hash is not None else 'no'} hash {'matched' if check_hash is None or digest == check_hash[1] else 'differed'})")
+
+	os.replace(part_path, output_path)
+	if check_hash is not None:
+		_mark_verified(output_path, check_hash)
+	return True
+
+
+def _new_hasher(kind: str) -> Any:
+	return hashlib.md5() if kind == "md5" else google_crc32c.Checksum()
+
+
+def _hex_or_base64(kind: str, hasher: Any) -> str:
+	"""MD5 hashes are compared as hex, like bucket listing ETags, and CRC32C hashes as base64, like Cloud Storage reports them"""
+	return hasher.hexdigest() if kind == "md5" else base64.b64encode(hasher.digest()).decode("ascii")
+
+
+def _hash_file(path: Union[str, Path], hasher: Any, buffer_size: int = DOWNLOAD_BUFFER_SIZE) -> None:
+	with open(path, 'rb') as existing:
+		for chunk in iter(lambda: existing.read(buffer_size), b""):
+			hasher.update(chunk)
+
+
+def _file_hash(path: Union[str, Path], kind: str, buffer_size: int = DOWNLOAD_BUFFER_SIZE) -> str:
+	hasher = _new_hasher(kind)
+	_hash_file(path, hasher, buffer_size)
+	return _hex_or_base64(kind, hasher)
+
+
+def _response_hash(response: requests.Response) -> Optional[Tuple[str, str]]:
+	"""
+	The whole file's hash from Cloud Storage's :code:`x-goog-hash` header (e.g. :code:`crc32c=n03x6A==,md5=Ojk9c3dhfxgoKVVHYwFbHQ==`) -
+	the MD5 as hex if there is one, or else the CRC32C. None if the server didn't send either.
+	"""
+	hashes = {}
+	for part in response.headers.get("x-goog-hash", "").split(","):
+		kind, _, value = part.strip().partition("=")
+		if value:
+			hashes[kind] = value
+	if "md5" in hashes:
+		return "md5", base64.b64decode(hashes["md5"]).hex()
+	if "crc32c" in hashes:
+		return "crc32c", hashes["crc32c"]
+	return None
+
+
+def _verification_path(path: Union[str, Path]) -> str:
+	folder, name = os.path.split(str(path))
+	return os.path.join(folder, f".{name}{VERIFIED_SUFFIX}")  # hidden, so it doesn't look like one of the export's tiles
+
+
+def _verified_hash(path: Union[str, Path]) -> Optional[Tuple[str, str]]:
+	"""
+	Returns:
+		Optional[Tuple[str, str]]: The (kind, digest) the file was verified against, if it was and it hasn't changed since.
+	"""
+	try:
+		with open(_verification_path(path)) as record:
+			size, modified, kind, digest = record.read().split()
+		stat = os.stat(path)
+	except (OSError, ValueError):
+		return None
+	if int(size) != stat.st_size or int(modified) != stat.st_mtime_ns:
+		return None
+	return kind, digest
 
-	for url in urls:
-		filename = url.split("/")[-1]  # Get the filename
-		output_path = Path(output_folder) / filename  # Construct the output path
-		# Get the data - this could be a problem if it's larger than fits in RAM - I believe requests has a way to operate as a streambuffer - not looking into that at this moment
-		response = requests.get(url)
-		output_path.write_bytes(response.content)  # Write it to a file
+
+def _mark_verified(path: Union[str, Path], file_hash: Tuple[str, str]) -> None:
+	stat = os.stat(path)
+	with open(_verification_path(path), 'w') as record:
+		record.write(f"{stat.st_size} {stat.st_mtime_ns} {file_hash[0]} {file_hash[1]}\n")
+
+
+def forget_verification(path: Union[str, Path]) -> None:
+	"""
+	Removes the record that a downloaded file was verified (see VERIFIED_SUFFIX), if there is one. Call it whenever the
+	file is moved or deleted, so the record isn't left behind in its folder.
+
+	Args:
+		path (Union[str, Path]): The file's path before it was moved or deleted.
+
+	Returns:
+		None
+	"""
+	try:
+		os.remove(_verification_path(path))
+	except FileNotFoundError:
+		pass
 
 
 def download_export(bucket_name: str,
 					output_folder: Union[str, Path],
 					prefix: str,
 					delimiter: str = "/",
-					autodelete: bool = True) -> None:
+					autodelete: bool = True,
+					max_workers: int = 8,
+					delete_batch_size: int = 100,
+					client: Optional[storage.Client] = None,
+					on_file: Optional[Callable[[str], None]] = None) -> List[str]:
 
 	"""
-	Downloads a blob from the specified bucket.
+	Downloads an export from a Google Cloud Storage bucket using your Google Cloud credentials, so that it works
+	with private buckets. Blobs are downloaded :code:`max_workers` at a time into :code:`output_folder`, named by the
+	last part of their path. The client library checks each download's hash, and each file's size is checked against the blob's.
+	With :code:`autodelete`, blobs are deleted from the bucket only once all of them have downloaded successfully, in
+	batched requests of :code:`delete_batch_size`.
 
 	Modified from Google Cloud sample documentation at
 		https://cloud.google.com/storage/docs/samples/storage-download-file#storage_download_file-python
@@ -79,40 +620,95 @@ def download_export(bucket_name: str,
 	Args:
 		bucket_name (str): Name of the Google Cloud Storage Bucket to pull data from.
 		output_folder (Union[str, Path]): Destination folder for exported data.
-		prefix (str): A prefix to use to filter items in the bucket - only URLs where the path matches this prefix will be returned - defaults to all files.
+		prefix (str): The export prefix (:code:`<export_folder>/<filename>`) - only that image's tiles are downloaded (and
+			deleted), never another export's that happen to start with the same characters. A folder prefix ending in "/"
+			downloads everything in the folder.
 		delimiter (str): Delimiter used for getting the list of blobs in the Google Cloud Storage Bucket. Defaults to "/"
 		autodelete (bool): Bool for deleting blobs once contents have been installed. Defaults to True
+		max_workers (int): How many blobs to download at once.
+		delete_batch_size (int): How many blobs to delete per request.
+		client (Optional[storage.Client]): The storage client to use. Defaults to a new client with your default credentials.
+		on_file (Optional[Callable[[str], None]]): Called with each file's path as soon as it's downloaded, from the download thread.
+	Returns:
+		List[str]: The paths of the downloaded files.
+	"""
+	if client is None:
+		client = storage.Client()
+
+	blobs = _export_blobs(client, bucket_name, prefix, delimiter)
+
+	os.makedirs(output_folder, exist_ok=True)
+
+	def _download(blob: storage.Blob) -> str:
+		destination_file_name = os.path.join(output_folder, blob.name.split("/")[-1])
+		part_path = f"{destination_file_name}.part"
+		blob.download_to_filename(part_path)
+		if blob.size is not None and os.path.getsize(part_path) != blob.size:
+			os.remove(part_path)
+			raise DownloadIntegrityError(f"Download of {blob.name} doesn't match the size in the bucket")
+		os.replace(part_path, destination_file_name)
+		if on_file is not None:
+			on_file(destination_file_name)
+		return destination_file_name
+
+	with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="eedl_blob_download") as pool:
+		futures = [pool.submit(_download, blob) for blob in blobs]
+		errors = [future.exception() for future in futures]
+
+	for error in errors:
+		if error is not None:
+			raise error  # nothing gets deleted unless everything downloaded
+
+	if autodelete:
+		delete_blobs(client, blobs, batch_size=delete_batch_size)
+
+	return [future.result() for future in futures]
+
+
+def delete_blobs(client: storage.Client, blobs: List[storage.Blob], batch_size: int = 100) -> None:
+	"""
+	Deletes blobs in batched requests, rather than one request per blob.
+
+	Args:
+		client (storage.Client): The storage client.
+		blobs (List[storage.Blob]): The blobs to delete.
+		batch_size (int): How many deletions to send per request - the storage API accepts up to 100.
+
 	Returns:
 		None
 	"""
-	# The ID of your GCS bucket
-	# bucket_name = "your-bucket-name"
-
-	# The ID of your GCS object
-	# source_blob_name = "storage-object-name"
-
-	# The path to which the file should be downloaded
-	# destination_file_name = "local/path/to/file"
-
-	storage_client = storage.Client()
-
-	bucket = storage_client.bucket(bucket_name)
-	blobs = storage_client.list_blobs(bucket_name, prefix=prefix, delimiter=delimiter)
-
-	for blob in blobs:
-		if blob.name.startswith(prefix):
-			destination_file_name = os.path.join(output_folder, blob.name)
-			# Construct a client side representation of a blob.
-			# Note `Bucket.blob` differs from `Bucket.get_blob` as it doesn't retrieve
-			# any content from Google Cloud Storage. As we don't need additional data,
-			# using `Bucket.blob` is preferred here.
-			blob_data = bucket.blob(blob.name)
-			blob_data.download_to_filename(destination_file_name)
-			if autodelete:
-				blob_data.delete()
-
-# print(
-# "Downloaded storage object {} from bucket {} to local file {}.".format(
-# source_blob_name, bucket_name, destination_file_name
-# )
-# )
+	for start in range(0, len(blobs), batch_size):
+		with client.batch():
+			for blob in blobs[start:start + batch_size]:
+				blob.delete()
+
+
+def get_private_export_paths(bucket_name: str, prefix: str, delimiter: str = "/", client: Optional[storage.Client] = None) -> List[str]:
+	"""
+	Lists an export in a private bucket as GDAL :code:`/vsigs/` paths, for reading the tiles in place. GDAL needs its own
+	Google Cloud credentials for these - see its documentation for /vsigs/ (for example, :code:`GOOGLE_APPLICATION_CREDENTIALS`).
+
+	Args:
+		bucket_name (str): Name of the Google Cloud Storage Bucket.
+		prefix (str): The export prefix (:code:`<export_folder>/<filename>`), or a folder prefix ending in "/".
+		delimiter (str): Delimiter used for listing blobs. Defaults to "/"
+		client (Optional[storage.Client]): The storage client to use. Defaults to a new client with your default credentials.
+
+	Returns:
+		List[str]: The /vsigs/ paths of the export's blobs.
+	"""
+	if client is None:
+		client = storage.Client()
+	return [f"/vsigs/{bucket_name}/{blob.name}" for blob in _export_blobs(client, bucket_name, prefix, delimiter)]
+
+
+def _export_blobs(client: storage.Client, bucket_name: str, prefix: str, delimiter: str) -> List[storage.Blob]:
+	"""
+	Lists the blobs that make up an export - the ones whose export prefix (see :code:`export_base_name`) is exactly :code:`prefix`,
+	so image_1 never picks up (or deletes) image_10's tiles, and nothing at all if the export isn't there yet. A folder
+	prefix (ending in a "/") lists everything in the folder.
+	"""
+	blobs = client.list_blobs(bucket_name, prefix=prefix, delimiter=delimiter)
+	if prefix.endswith("/") or not prefix:
+		return list(blobs)
+	return [blob for blob in blobs if export_base_name(blob.name) == prefix]
@@ -1,10 +1,12 @@
 import os
+import asyncio
 import itertools
 import datetime
 from typing import Optional
 
 from .core import safe_fiona_open
 from .image import EEDLImage, TaskRegistry
+from .async_registry import AsyncTaskRegistry
 
 import ee
 from ee import ImageCollection
@@ -82,6 +84,7 @@ class GroupedCollectionExtractor():
 		self.zonal_inject_date: bool = False
 		self.zonal_inject_group_id: bool = False
 		self.zonal_nodata_value: int = 0
+		self.zonal_engine: str = "rasterstats"  # Or "label", to compute the stats for all the features at once - much faster with many features.
 
 		self.merge_sqlite = True  # Should we merge all outputs to a single SQLite database.
 		self.merge_grouped_csv = True  # Should we merge CSV by grouped item.
@@ -123,6 +126,7 @@ class GroupedCollectionExtractor():
 		export_image.zonal_keep_fields = self.zonal_features_preserve_fields
 		export_image.zonal_stats_to_calc = self.zonal_stats_to_calc
 		export_image.zonal_nodata_value = self.zonal_nodata_value
+		export_image.zonal_engine = self.zonal_engine
 		export_image.date_string = image_date
 
 		zonal_inject_constants = {}
@@ -158,49 +162,8 @@ class GroupedCollectionExtractor():
 			num_complete = 0
 			for feature in features:
 				print(f"Number of complete AOIs: {num_complete}")
-				task_registry = TaskRegistry()
-
-				ee_geom = ee.Geometry.Polygon(feature['geometry']['coordinates'][0])  # WARNING: THIS DOESN'T CHECK CRS
-				aoi_collection = collection.filterBounds(ee_geom)
-
-				# Get some variables defined for use in extracting the zonal stats.
-				aoi_attr = feature.properties[self.zonal_areas_of_interest_attr]  # This is the value we'll search for in the zonal features.
-				zonal_features_query = f"{self.zonal_features_area_of_interest_attr} = '{aoi_attr}'"
-				aoi_download_folder = os.path.join(self.download_folder, aoi_attr)
-
-				fiona_zonal_features = safe_fiona_open(self.zonal_features_path)
+				task_registry, fiona_zonal_features, aoi_download_folder = self._export_aoi(collection, feature)
 				try:
-					zonal_features_filtered = fiona_zonal_features.filter(where=zonal_features_query)
-
-					image_list = aoi_collection.toList(aoi_collection.size()).getInfo()
-					indicies_and_dates = [(im['properties']['system:index'], im['properties']['system:time_start']) for im in image_list]
-
-					"""
-					if len(zonal_features_filtered) < self.max_fiona_features_load:
-					#	zonal_features_filtered = list(zonal_features_filtered)  # this *would* be inefficient, but we're going to re-use it so many times, it's not terrible, exce
-					#	using_tee = False
-					# else:
-					# using an itertools tee may not be more efficient than a list, but it also might, because
-					# even if we iterate through all features and all features remain queued for other iterations
-					# it may not load all attributes, etc, for each feature if fiona lazy loads anything. It won't
-					# be that much slower in any case, though the complexity of maintaining the code here is something
-					# to consider
-					"""
-					zonal_features_filtered_tee = itertools.tee(zonal_features_filtered, len(image_list))
-					using_tee = True
-
-					for i, image_info in enumerate(indicies_and_dates):
-						if using_tee:
-							zonal_features = zonal_features_filtered_tee[i - 1]
-						else:
-							zonal_features = zonal_features_filtered
-
-						image = aoi_collection.filter(ee.Filter.eq("system:time_start", image_info[1])).first()  # Get the image from the collection again based on ID.
-						timestamp_in_seconds = int(str(image_info[1])[:-3])  # We could divide by 1000, but then we'd coerce back from a float. This is precise.
-						date_string = datetime.datetime.fromtimestamp(timestamp_in_seconds, tz=datetime.timezone.utc).strftime("%Y-%m-%d")
-
-						self._single_item_extract(image, task_registry, zonal_features, aoi_attr, ee_geom, date_string, aoi_download_folder)
-
 					# Ok, now that we have a collection for the AOI, we need to iterate through all the images
 					# in the collection as we normally would in a script, but also extract the features of interest for use
 					# in zonal stats. Right now the zonal stats code only accepts files. We might want to make it accept
@@ -220,6 +183,104 @@ class GroupedCollectionExtractor():
 		finally:
 			features.close()
 
+	async def extract_async(self, max_concurrent_aois: int = 4):
+		"""
+		Does the same work as :code:`extract`, but handles up to :code:`max_concurrent_aois` AOIs at the same time on
+		the running event loop, each with its own task registry. Exports for the next AOI start while earlier AOIs are
+		still exporting and downloading instead of waiting for them to finish.
+
+		Args:
+			max_concurrent_aois (int): How many AOIs to export and process at once.
+
+		Returns:
+			None
+		"""
+		loop = asyncio.get_running_loop()
+		collection = self._get_and_filter_collection()
+
+		self._all_outputs = list()
+		features = safe_fiona_open(self.areas_of_interest_path)
+		try:
+			aoi_features = list(features)
+		finally:
+			features.close()
+
+		semaphore = asyncio.Semaphore(max_concurrent_aois)
+
+		async def _extract_one(feature):
+			async with semaphore:
+				task_registry, fiona_zonal_features, aoi_download_folder = await loop.run_in_executor(None, self._export_aoi, collection, feature)
+				try:
+					task_registry.setup_log(os.path.join(self.download_folder, "eedl_processing_error_log.txt"))
+					await AsyncTaskRegistry(task_registry).wait_for_images(aoi_download_folder, sleep_time=15, callback="mosaic_and_zonal", try_again_disk_full=False, on_failure=self.on_error)
+
+					if self.keep_image_objects:
+						self.all_images.extend(task_registry.images)
+				finally:
+					fiona_zonal_features.close()
+
+		await asyncio.gather(*(_extract_one(feature) for feature in aoi_features))
+
+	def _export_aoi(self, collection, feature):
+		"""
+		Starts the exports of every image in the collection for a single AOI.
+
+		Args:
+			collection: The filtered image collection.
+			feature: The AOI feature from the areas of interest data.
+
+		Returns:
+			Tuple of the TaskRegistry tracking the AOI's images, the open fiona collection of zonal features (the caller needs
+			to close it once zonal stats are done), and the folder to download the AOI's images to.
+		"""
+		task_registry = TaskRegistry()
+
+		ee_geom = ee.Geometry.Polygon(feature['geometry']['coordinates'][0])  # WARNING: THIS DOESN'T CHECK CRS
+		aoi_collection = collection.filterBounds(ee_geom)
+
+		# Get some variables defined for use in extracting the zonal stats.
+		aoi_attr = feature.properties[self.zonal_areas_of_interest_attr]  # This is the value we'll search for in the zonal features.
+		zonal_features_query = f"{self.zonal_features_area_of_interest_attr} = '{aoi_attr}'"
+		aoi_download_folder = os.path.join(self.download_folder, aoi_attr)
+
+		fiona_zonal_features = safe_fiona_open(self.zonal_features_path)
+		try:
+			zonal_features_filtered = fiona_zonal_features.filter(where=zonal_features_query)
+
+			image_list = aoi_collection.toList(aoi_collection.size()).getInfo()
+			indicies_and_dates = [(im['properties']['system:index'], im['properties']['system:time_start']) for im in image_list]
+
+			"""
+			if len(zonal_features_filtered) < self.max_fiona_features_load:
+			#	zonal_features_filtered = list(zonal_features_filtered)  # this *would* be inefficient, but we're going to re-use it so many times, it's not terrible, exce
+			#	using_tee = False
+			# else:
+			# using an itertools tee may not be more efficient than a list, but it also might, because
+			# even if we iterate through all features and all features remain queued for other iterations
+			# it may not load all attributes, etc, for each feature if fiona lazy loads anything. It won't
+			# be that much slower in any case, though the complexity of maintaining the code here is something
+			# to consider
+			"""
+			zonal_features_filtered_tee = itertools.tee(zonal_features_filtered, len(image_list))
+			using_tee = True
+
+			for i, image_info in enumerate(indicies_and_dates):
+				if using_tee:
+					zonal_features = zonal_features_filtered_tee[i - 1]
+				else:
+					zonal_features = zonal_features_filtered
+
+				image = aoi_collection.filter(ee.Filter.eq("system:time_start", image_info[1])).first()  # Get the image from the collection again based on ID.
+				timestamp_in_seconds = int(str(image_info[1])[:-3])  # We could divide by 1000, but then we'd coerce back from a float. This is precise.
+				date_string = datetime.datetime.fromtimestamp(timestamp_in_seconds, tz=datetime.timezone.utc).strftime("%Y-%m-%d")
+
+				self._single_item_extract(image, task_registry, zonal_features, aoi_attr, ee_geom, date_string, aoi_download_folder)
+		except:  # noqa: E722
+			fiona_zonal_features.close()
+			raise
+
+		return task_registry, fiona_zonal_features, aoi_download_folder
+
 	def _get_and_filter_collection(self):
 		collection = ImageCollection(self.collection)
 
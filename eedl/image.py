@@ -1,23 +1,37 @@
 import os
 import io
-import shutil
+import contextlib
+import copy
 import time
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Union
 from typing_extensions import TypedDict, NotRequired, Unpack
 import traceback
 import datetime
+import hashlib
+import heapq
+import itertools
+import collections
+import threading
+import concurrent.futures
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
 
 import ee
 from ee import EEException
+import rasterio
 
+from . import drive
 from . import google_cloud
 from . import mosaic_rasters
 from . import zonal
+from .journal import TaskJournal, serialize_export_parameters
+from .metrics import PipelineMetrics
+from .scheduler import AdaptivePollScheduler, PollScheduler
+from .task_status import TaskStatusBackend, EarthEngineTaskListBackend
 
 
 class EEExportDict(TypedDict):
-	fileDimensions: Optional[int]
+	fileDimensions: Optional[Union[int, Tuple[int, int]]]
 	folder: NotRequired[Optional[Union[str, Path]]]
 	crs: Optional[str]
 	region: NotRequired[ee.geometry.Geometry]
@@ -26,6 +40,7 @@ class EEExportDict(TypedDict):
 	scale: Union[int, float]
 	maxPixels: Union[int, float]
 	bucket: NotRequired[Optional[str]]
+	dimensions: NotRequired[Union[int, str]]
 
 
 DEFAULTS = dict(
@@ -36,50 +51,206 @@ DEFAULTS = dict(
 )
 
 
-def download_images_in_folder(source_location: Union[str, Path], download_location: Union[str, Path], prefix: str) -> None:
+def download_images_in_folder(source_location: Union[str, Path],
+								download_location: Union[str, Path],
+								prefix: str,
+								files: Optional[List[str]] = None,
+								mode: str = "move",
+								max_workers: int = drive.RELOCATION_WORKERS,
+								on_file: Optional[Callable[[str], None]] = None) -> None:
 	"""
-	Handles pulling data from Google Drive over to a local location, filtering by a filename prefix and folder
+	Handles pulling data from Google Drive over to a local location, filtering by a filename prefix and folder. Files are
+	renamed (or hard linked) when both folders are on the same filesystem, and otherwise copied in parallel - see
+	:code:`eedl.drive.relocate_files`.
 
 	Args:
 		source_location (Union[str, Path]): Directory to search for files.
 		download_location (Union[str, Path]): Destination for files with the specified prefix.
 		prefix (str): A prefix to use to filter items in the folder - only files where the name matches this prefix will be moved.
+		files (Optional[List[str]]): The names of the files to move, if already known (for example, from a DriveSyncWatcher).
+			Defaults to every file in the folder that starts with :code:`prefix`.
+		mode (str): "move" (the default), "link", or "copy" - whether to take the files out of the Drive folder or
+			leave them there too.
+		max_workers (int): How many files to copy at once when they're copied between filesystems.
+		on_file (Optional[Callable[[str], None]]): Called with each file's new path as soon as it's in place.
 
 	Returns:
 		None
 	"""
 	folder_search_path: Union[str, Path] = source_location
-	files = [filename for filename in os.listdir(folder_search_path) if filename.startswith(prefix)]
+	if files is None:
+		files = [filename for filename in os.listdir(folder_search_path) if filename.startswith(prefix)]
 
 	if len(files) == 0:
 		print(f"Likely Error: Could not find files to download for {prefix} in {folder_search_path} - you likely have a misconfiguration in your export parameters. Future steps may fail.")
 
-	os.makedirs(download_location, exist_ok=True)
+	drive.relocate_files([os.path.join(folder_search_path, filename) for filename in files], download_location, mode=mode, max_workers=max_workers, on_file=on_file)
 
-	for filename in files:
-		shutil.move(str(os.path.join(folder_search_path, filename)), str(os.path.join(download_location, filename)))
+
+class CompletedImageRecord:
+	"""
+	What a TaskRegistry keeps of an image once it has been downloaded and its callback has finished - just its
+	names, ids, paths, and final state, without the Earth Engine image, the task, or the full status. Has the same
+	attribute names as EEDLImage for the values it keeps, so code that reads results from :code:`registry.images` after
+	:code:`wait_for_images` works with either.
+	"""
+
+	__slots__ = ("filename", "description", "task_id", "export_type", "export_folder", "output_folder",
+					"mosaic_image", "zonal_output_filepath", "state", "error_message")
+
+	def __init__(self, image: "EEDLImage") -> None:
+		status = image.last_task_status
+		self.filename: str = image.filename
+		self.description: str = image.description
+		self.task_id: Optional[str] = image.task.id if image.task is not None else status.get('id')
+		self.export_type: str = image.export_type
+		self.export_folder: Optional[Union[str, Path]] = image.export_folder
+		self.output_folder: Optional[Union[str, Path]] = image.output_folder
+		self.mosaic_image: Optional[Union[str, Path]] = image.mosaic_image
+		self.zonal_output_filepath: Optional[Union[str, Path]] = image.zonal_output_filepath
+		self.state: str = status['state']
+		self.error_message: Optional[str] = status.get('error_message')
+
+	@property
+	def last_task_status(self) -> Dict[str, Any]:
+		"""
+		Returns:
+			Dict[str, Any]: The parts of the final task status that were kept - id, state, description, and error_message (if there was one).
+		"""
+		status = {"id": self.task_id, "state": self.state, "description": self.description}
+		if self.error_message is not None:
+			status["error_message"] = self.error_message
+		return status
+
+	@property
+	def task_data_downloaded(self) -> bool:
+		return True
+
+	def __repr__(self) -> str:
+		return f"CompletedImageRecord(filename={self.filename!r}, state={self.state!r})"
 
 
 class TaskRegistry:
 	"""
 	The TaskRegistry class makes it convenient to manage arbitrarily many Earth Engine images that are in varying states of being downloaded.
+
+	Images are indexed by where they are in their lifecycle (incomplete, complete, failed, and waiting for download),
+	and the indexes are updated whenever an image's task status or download flag changes. That way, checking on
+	any one group only costs as much as the number of images in that group, not the number of images the registry
+	has ever seen.
+
+	Downloads run on a pool of :code:`download_workers` threads, and callbacks run on a separate pool of
+	:code:`callback_workers` threads, so a slow download or a long-running callback doesn't hold up any other
+	finished image. Setting :code:`callback_executor` to :code:`"process"` runs callbacks in worker processes
+	instead, which keeps CPU-heavy callbacks like :code:`mosaic_and_zonal` from competing with polling and downloading
+	for the GIL. Callbacks that run in a process receive a copy of the image without its Earth Engine objects, and any
+	attributes the callback sets (such as :code:`mosaic_image` and :code:`zonal_output_filepath`) are copied back onto
+	the original image when it finishes. Everything the callback needs must be picklable - in particular,
+	:code:`zonal_polygons` needs to be a path rather than an open fiona collection.
 	"""
 	INCOMPLETE_STATUSES = ("READY", "UNSUBMITTED", "RUNNING")
 	COMPLETE_STATUSES = ["COMPLETED"]
 	FAILED_STATUSES = ["CANCEL_REQUESTED", "CANCELLED", "FAILED"]
 
-	def __init__(self) -> None:
+	def __init__(self, status_backend: Optional[TaskStatusBackend] = None) -> None:
 		"""
 		Initialized the TaskRegistry class and defaults images to "[]" and the callback function to "None"
 
+		Args:
+			status_backend (Optional[TaskStatusBackend]): The object used to retrieve task statuses from Earth Engine in bulk.
+				Defaults to an EarthEngineTaskListBackend, which makes a single task listing request per polling cycle.
+
 		Returns:
 			None
 		"""
-		self.images: List[EEDLImage] = []
+		# Dictionaries with None values are used as insertion-ordered sets throughout.
+		self._images: Dict[EEDLImage, None] = {}
+		self._incomplete: Dict[EEDLImage, None] = {}
+		self._complete: Dict[EEDLImage, None] = {}
+		self._failed: Dict[EEDLImage, None] = {}
+		self._downloadable: Dict[EEDLImage, None] = {}  # complete, but not yet downloaded
+
+		# With evict_completed on, once an image is downloaded and its callback is done, it's swapped for a
+		# CompletedImageRecord and its Earth Engine objects are dropped, so that long-running registries don't hold on to
+		# every image they've processed. Off by default, since it changes what registry.images holds and empties the
+		# task of EEDLImage objects the caller may still be using. Only the newest max_completed_records records are kept.
+		self.evict_completed: bool = False
+		self.max_completed_records: Optional[int] = 100_000
+		self._records: Deque[CompletedImageRecord] = collections.deque()
+
+		self.status_backend: TaskStatusBackend = status_backend if status_backend is not None else EarthEngineTaskListBackend()
 		self.callback: Optional[str] = None
 		self.log_file_path: Optional[Union[str, Path]] = None  # the path to the log file
 		self.log_file: Optional[io.TextIOWrapper] = None  # the open log file handle
 		self.raise_errors: bool = True
+		self.scheduler: Optional[PollScheduler] = None  # decides when to poll Earth Engine - set up by wait_for_images
+		self.journal: Optional[TaskJournal] = None  # optional record of exports for resuming after a crash - see setup_journal
+		self._polling: bool = False  # while True, journal updates are committed together at the end of the poll
+		self.metrics = PipelineMetrics()  # stage timings for every image - add sinks to export them
+
+		# When max_running_tasks is set, exports wait in this queue (a heap of (priority, sequence, image)) instead of
+		# starting right away, and are started as earlier tasks finish.
+		self.max_running_tasks: Optional[int] = None
+		self._submission_queue: List[Tuple[int, int, EEDLImage]] = []
+		self._queued: Dict[EEDLImage, None] = {}
+		self._submission_order = itertools.count()
+
+		self.download_workers: int = 4  # how many images to download at once
+		self.callback_workers: int = 1  # how many callbacks to run at once - separate from downloads
+		self.callback_executor: str = "thread"  # "thread" or "process" - where callbacks run
+		self._download_pool: Optional[Executor] = None
+		self._callback_pool: Optional[Executor] = None
+		self._downloading: Dict[EEDLImage, Future] = {}
+		self._running_callbacks: Dict[EEDLImage, Future] = {}
+		self._retry_at: Dict[EEDLImage, float] = {}  # images that failed to download wait for a polling interval before trying again
+
+		# Downloads update the indexes from worker threads, so anything touching them takes the lock
+		self._lock = threading.RLock()
+
+	@property
+	def images(self) -> List[Union["EEDLImage", CompletedImageRecord]]:
+		"""
+		All images added to this registry - those still being worked on, in the order they were added, followed by records
+		of the ones that finished processing, in the order they finished.
+
+		Returns:
+			List[Union[EEDLImage, CompletedImageRecord]]: A new list of the images - changing it doesn't change the registry. Use :code:`add` for that.
+		"""
+		with self._lock:
+			return [*self._images, *self._records]
+
+	@property
+	def completed_records(self) -> List[CompletedImageRecord]:
+		"""
+		Records of the images that have been downloaded and had their callback run, and were evicted from the registry
+		(when :code:`evict_completed` is on) - the newest :code:`max_completed_records` of them.
+
+		Returns:
+			List[CompletedImageRecord]: A new list of the records.
+		"""
+		with self._lock:
+			return list(self._records)
+
+	def _finish(self, image: "EEDLImage") -> None:
+		"""
+		Called once an image has been downloaded and its callback (if any) has succeeded. If :code:`evict_completed`
+		is on, replaces the image with a CompletedImageRecord and drops the image's Earth Engine objects, so that
+		nothing heavy stays in memory for finished images.
+		"""
+		if not self.evict_completed:
+			return
+
+		with self._lock:
+			if image not in self._images:
+				return
+			del self._images[image]
+			for index in (self._incomplete, self._complete, self._failed, self._downloadable, self._retry_at):
+				index.pop(image, None)
+			self._records.append(CompletedImageRecord(image))
+			while self.max_completed_records is not None and len(self._records) > self.max_completed_records:
+				self._records.popleft()
+
+		image._release()
 
 	def add(self, image: "EEDLImage") -> None:
 		"""
@@ -91,7 +262,101 @@ class TaskRegistry:
 		Returns:
 			None
 		"""
-		self.images.append(image)
+		image.task_registry = self  # the image reports its status changes to its registry, so make sure it's this one
+		with self._lock:
+			self._images[image] = None
+			self._index_image(image)
+		if self.scheduler is not None:
+			self.scheduler.notify()
+
+	def submit(self, image: "EEDLImage", priority: int = 0, parameters: Optional[str] = None) -> None:
+		"""
+		Starts an image's export task and tracks it in this registry. If :code:`max_running_tasks` is set, the task is
+		instead held in a queue and started once fewer than :code:`max_running_tasks` of this registry's tasks are
+		waiting or running on Earth Engine. That keeps large runs under Earth Engine's per-user concurrent task limits and
+		makes results arrive steadily instead of all at the end. Called by :code:`EEDLImage.export`.
+
+		Args:
+			image (EEDLImage): The image, with its (not yet started) export task.
+			priority (int): Queued tasks with lower numbers are started first. Tasks with the same priority start in the order they were submitted.
+			parameters (Optional[str]): The serialized export parameters, for the journal.
+
+		Returns:
+			None
+		"""
+		if self.max_running_tasks is None:
+			image.task.start()  # type: ignore
+			self.add(image)
+		else:
+			self.add(image)
+			with self._lock:
+				self._queued[image] = None
+				heapq.heappush(self._submission_queue, (priority, next(self._submission_order), image))
+
+		if self.journal is not None:
+			self.journal.save(image, parameters=parameters)
+
+		self.start_queued_tasks()
+
+	@property
+	def queued_tasks(self) -> List["EEDLImage"]:
+		"""
+		Images whose export is waiting in the submission queue, not yet started on Earth Engine.
+
+		Returns:
+			List[EEDLImage]: The queued images, in the order they were submitted.
+		"""
+		with self._lock:
+			return list(self._queued)
+
+	def start_queued_tasks(self) -> None:
+		"""
+		Starts queued export tasks, in priority order, until :code:`max_running_tasks` tasks are waiting or running on Earth Engine.
+		The registry calls this after every status update.
+
+		Returns:
+			None
+		"""
+		while True:
+			with self._lock:
+				running = len(self._incomplete) - len(self._queued)
+				if not self._submission_queue or (self.max_running_tasks is not None and running >= self.max_running_tasks):
+					return
+				_, _, image = heapq.heappop(self._submission_queue)
+				del self._queued[image]
+
+			print(f"Starting export of {image.filename}")
+			image.task.start()  # type: ignore
+			if self.journal is not None:
+				self.journal.save(image)
+
+	def _image_changed(self, image: "EEDLImage") -> None:
+		"""
+		Called by images in this registry whenever their status, download flag, or processing stage changes. Updates the
+		lifecycle indexes and the journal, if there is one.
+		"""
+		self._index_image(image)
+		if self.journal is not None and image in self._images:
+			self.journal.save(image, commit=not self._polling)
+
+	def _index_image(self, image: "EEDLImage") -> None:
+		"""
+		Places the image in the lifecycle indexes matching its current status and download flag. Called whenever
+		either of those changes on an image in this registry.
+		"""
+		with self._lock:
+			if image not in self._images:
+				return
+
+			state = image.last_task_status['state']
+			for index, belongs in ((self._incomplete, state in self.INCOMPLETE_STATUSES),
+									(self._complete, state in self.COMPLETE_STATUSES),
+									(self._failed, state in self.FAILED_STATUSES),
+									(self._downloadable, state in self.COMPLETE_STATUSES and image.task_data_downloaded is False)):
+				if belongs:
+					index[image] = None
+				else:
+					index.pop(image, None)
 
 	@property
 	def incomplete_tasks(self) -> List["EEDLImage"]:
@@ -101,21 +366,67 @@ class TaskRegistry:
 		Returns:
 		List[ee.image.Image]: List of Earth Engine images that have not been completed yet.
 		"""
-		initial_tasks = [image for image in self.images if image.last_task_status['state'] in self.INCOMPLETE_STATUSES]
-		for image in initial_tasks:  # update anything that's currently running or waiting first
-			image._check_task_status()
+		self.update_task_statuses()  # update anything that's currently running or waiting first
+
+		with self._lock:
+			return list(self._incomplete)
+
+	def update_task_statuses(self) -> None:
+		"""
+		Refreshes the task status of every image that hasn't finished exporting yet. Statuses are retrieved with
+		a single bulk request to the registry's status backend rather than one request per task. Any
+		task the bulk listing doesn't include (for example, one that was only just submitted) falls back
+		to checking that task individually.
 
-		return [image for image in self.images if image.last_task_status['state'] in self.INCOMPLETE_STATUSES]
+		Returns:
+			None
+		"""
+		with self._lock:
+			initial_tasks = [image for image in self._incomplete if image not in self._queued]  # queued tasks haven't been started on Earth Engine
+		task_ids = [image.task.id for image in initial_tasks if image.task is not None and image.task.id]
+		statuses = self.status_backend.get_statuses(task_ids) if task_ids else {}
+
+		self._polling = True
+		try:
+			for image in initial_tasks:
+				task_id = image.task.id if image.task is not None else None
+				if task_id in statuses:
+					image._update_task_status(statuses[task_id])
+				else:
+					image._check_task_status()
+		finally:
+			self._polling = False
+			if self.journal is not None:
+				self.journal.commit()
+
+		self.start_queued_tasks()  # finished tasks make room for queued ones
+
+		if self.scheduler is not None:
+			self.scheduler.observe(initial_tasks)
 
 	@property
-	def complete_tasks(self) -> List["EEDLImage"]:
+	def has_pending_work(self) -> bool:
 		"""
-		List of Earth Engine images.
+		Whether any images are still exporting, waiting to be downloaded, downloading, or running their callback, based on
+		their last known status. Unlike :code:`incomplete_tasks`, this doesn't poll Earth Engine.
 
 		Returns:
-			List[ee.image.Image]: List of Earth Engine images.
+			bool: True if wait_for_images would still have something to wait for.
 		"""
-		return [image for image in self.images if image.last_task_status['state'] in self.COMPLETE_STATUSES + self.FAILED_STATUSES]
+		with self._lock:
+			return len(self._incomplete) > 0 or len(self._downloadable) > 0 or len(self._downloading) > 0 or len(self._running_callbacks) > 0
+
+	@property
+	def complete_tasks(self) -> List[Union["EEDLImage", CompletedImageRecord]]:
+		"""
+		List of Earth Engine images that have finished on Earth Engine, including records of evicted images.
+
+		Returns:
+			List[Union[EEDLImage, CompletedImageRecord]]: List of Earth Engine images.
+		"""
+		with self._lock:
+			finished: List[Union[EEDLImage, CompletedImageRecord]] = [*self._complete, *self._failed, *self._records]
+			return finished
 
 	@property
 	def failed_tasks(self) -> List["EEDLImage"]:
@@ -125,7 +436,8 @@ class TaskRegistry:
 		Returns:
 			List[ee.image.Image]: List of Earth Engine images that have failed or have been cancelled.
 		"""
-		return [image for image in self.images if image.last_task_status['state'] in self.FAILED_STATUSES]
+		with self._lock:
+			return list(self._failed)
 
 	@property
 	def downloadable_tasks(self) -> List["EEDLImage"]:
@@ -135,29 +447,164 @@ class TaskRegistry:
 		Returns:
 			List[ee.image.Image]: List of Earth Engine images that have not been cancelled or have failed.
 		"""
-		return [image for image in self.complete_tasks if image.task_data_downloaded is False and image.last_task_status['state'] not in self.FAILED_STATUSES]
+		with self._lock:
+			return list(self._downloadable)
 
-	def download_ready_images(self, download_location: Union[str, Path]) -> None:
+	def download_ready_images(self, download_location: Union[str, Path], wait: bool = True) -> None:
 		"""
-		Downloads all images that are ready to be downloaded.
+		Downloads all images that are ready to be downloaded. Downloads are handed to a pool of :code:`download_workers`
+		threads, and once an image is downloaded, the registry's callback is handed to a separate pool of
+		:code:`callback_workers` threads. Errors from either step are raised or logged (depending on :code:`raise_errors`)
+		for each image individually. If an image fails to download, it stays ready for download and will be tried again
+		the next time this method runs - while :code:`wait_for_images` is polling, no sooner than a polling interval later.
 
 		Args:
 			download_location (Union[str, Path]): Destination for downloaded files.
+			wait (bool): When True (the default), doesn't return until every download and callback started here has finished.
+				wait_for_images sets this to False so that it can keep polling Earth Engine while downloads run, calling
+				this method again each cycle to collect finished work and start any new downloads.
 
 		Returns:
 			None
 		"""
+		self._collect_finished_work()
+
+		if self._download_pool is None:
+			self._download_pool = ThreadPoolExecutor(max_workers=self.download_workers, thread_name_prefix="eedl_download")
+
+		now = self.scheduler.clock() if self.scheduler is not None else time.time()
 		for image in self.downloadable_tasks:
+			if image in self._downloading or self._retry_at.get(image, now) > now:
+				continue
+
+			self._retry_at.pop(image, None)
+			print(f"{image.filename} is ready for download")
+			future = self._download_pool.submit(image.download_results, download_location=download_location)
+			with self._lock:
+				self._downloading[image] = future
+			future.add_done_callback(self._wake)
+
+		if wait:
 			try:
-				print(f"{image.filename} is ready for download")
-				image.download_results(download_location=download_location, callback=self.callback)
-			except:  # noqa: E722
-				# on any error raise or log it
-				if self.raise_errors:
-					raise
+				while len(self._downloading) > 0 or len(self._running_callbacks) > 0:
+					self._collect_finished_work(block=True)
+			finally:
+				self._shutdown_pools()
+
+	def _wake(self, future: Future) -> None:
+		"""
+		Lets the scheduler know that a download or callback finished, so wait_for_images can act on it right away. Failures
+		don't wake it - they're retried at the next poll, not straight away.
+		"""
+		if self.scheduler is not None and not future.cancelled() and future.exception() is None:
+			self.scheduler.notify()
+
+	def _collect_finished_work(self, block: bool = False) -> None:
+		"""
+		Handles the results of finished downloads and callbacks - starts callbacks for newly downloaded images and
+		raises or logs any errors.
 
-				error_details = traceback.format_exc()
-				self.log_error("local", f"Failed to process image {image.filename}. Error details: {error_details}")
+		Args:
+			block (bool): Wait for at least one download or callback to finish before collecting.
+
+		Returns:
+			None
+		"""
+		if block:
+			with self._lock:
+				pending = list(self._downloading.values()) + list(self._running_callbacks.values())
+			if pending:
+				concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+
+		with self._lock:
+			finished_downloads = [image for image, future in self._downloading.items() if future.done()]
+			finished_callbacks = [image for image, future in self._running_callbacks.items() if future.done()]
+
+		for image in finished_downloads:
+			with self._lock:
+				future = self._downloading.pop(image)
+			if future.exception() is not None and self.scheduler is not None:  # hold it back until the next poll
+				self._retry_at[image] = self.scheduler.clock() + self.scheduler.interval
+			if self._handle_failure(image, future.exception()):
+				continue
+
+			if self.callback:
+				callback_future = self._submit_callback(image, self.callback)
+				with self._lock:
+					self._running_callbacks[image] = callback_future
+				callback_future.add_done_callback(self._wake)
+			else:
+				self._finish(image)
+
+		for image in finished_callbacks:
+			with self._lock:
+				future = self._running_callbacks.pop(image)
+			if self._handle_failure(image, future.exception()):
+				continue
+			if future.result():
+				image._apply_callback_results(future.result())
+			self._finish(image)
+
+	def _submit_callback(self, image: "EEDLImage", callback: str) -> Future:
+		"""
+		Starts the callback for a downloaded image on the callback pool, creating the pool if needed.
+
+		Returns:
+			Future: Resolves to None for thread callbacks, or the attributes the callback changed for process callbacks.
+		"""
+		if self.callback_executor == "process":
+			if self._callback_pool is None:
+				self._callback_pool = ProcessPoolExecutor(max_workers=self.callback_workers)
+			return self._callback_pool.submit(_run_callback_in_process, image, callback)
+		elif self.callback_executor == "thread":
+			if self._callback_pool is None:
+				self._callback_pool = ThreadPoolExecutor(max_workers=self.callback_workers, thread_name_prefix="eedl_callback")
+			return self._callback_pool.submit(image.run_callback, callback)
+		else:
+			raise ValueError("Invalid value for callback_executor. Did you mean \"thread\" or \"process\"?")
+
+	def _handle_failure(self, image: "EEDLImage", error: Optional[BaseException]) -> bool:
+		"""
+		Raises or logs the exception from a finished download or callback, if there was one.
+
+		Args:
+			image (EEDLImage): The image the download or callback was for.
+			error (Optional[BaseException]): The exception it raised, or None if it succeeded.
+
+		Returns:
+			bool: True if the work failed (and the error was logged rather than raised).
+		"""
+		if error is None:
+			return False
+
+		# on any error raise or log it
+		if self.raise_errors:
+			raise error
+
+		error_details = "".join(traceback.format_exception(type(error), error, error.__traceback__))
+		self.log_error("local", f"Failed to process image {image.filename}. Error details: {error_details}")
+		return True
+
+	def _shutdown_pools(self) -> None:
+		for pool in (self._download_pool, self._callback_pool):
+			if pool is not None:
+				pool.shutdown(wait=False)
+		self._download_pool = None
+		self._callback_pool = None
+
+	def setup_journal(self, journal_path: Union[str, Path]) -> None:
+		"""
+		Journals every export started on this registry to a SQLite database at :code:`journal_path`, so that
+		a run that crashes can be resumed without exporting images again. See :code:`TaskJournal` for details.
+		Needs to be set up before starting exports for them to be journaled or reattached.
+
+		Args:
+			journal_path (Union[str, Path]): The SQLite file to use - created if it doesn't exist.
+
+		Returns:
+			None
+		"""
+		self.journal = TaskJournal(journal_path)
 
 	def setup_log(self, log_file_path: Union[str, Path], mode='a'):
 		self.log_file_path = log_file_path
@@ -192,45 +639,69 @@ class TaskRegistry:
 						sleep_time: int = 10,
 						callback: Optional[str] = None,
 						try_again_disk_full: bool = True,
-						on_failure: str = "log") -> None:
+						on_failure: str = "log",
+						scheduler: Optional[PollScheduler] = None) -> None:
 		"""
 		Tells EEDL to wait until there are no more incomplete or downloadable tasks left. It will block execution
 		of any following code until all images have been downloaded and processed. Any code that runs afterward
 		can rely on the images being downloaded to disk.
 
+		Task statuses are polled on an adaptive schedule - tasks are checked at most every :code:`sleep_time` seconds, but
+		more often as they approach the time similar tasks have taken to finish. After the wait, :code:`self.scheduler.latency_summary()`
+		reports how long finished tasks waited before being noticed compared with polling every :code:`sleep_time` seconds.
+
 		Args:
 			download_location (Union[str, Path]): Destination for downloaded files.
-			sleep_time (int): Time between checking if downloads are available (complete) in seconds. Defaults to 10 seconds.
-				This is also the interval where task statuses are updated on image objects.
+			sleep_time (int): Maximum time between checking if downloads are available (complete) in seconds. Defaults to 10 seconds.
+				This is also the longest interval between task status updates on image objects.
 			callback (Optional[str]): Optional callback function. Executed after image has been downloaded and allows for
 				processing of completed images even while waiting for other images to complete on Earth Engine's servers.
 			try_again_disk_full (bool): Will continuously retry to download images that are ready, even if it fails to
 				do so initially because the disk is full. This allows you to get the warning that the disk is full, then
 				clear out space to allow processing to complete, without restarting the exports or processing.
 			on_failure (str): ***Needs language***
+			scheduler (Optional[PollScheduler]): Overrides the polling schedule. Pass a :code:`PollScheduler(interval=sleep_time)`
+				to poll on a fixed interval. Defaults to an AdaptivePollScheduler with a :code:`max_interval` of :code:`sleep_time`.
 
 		Returns:
 			None
 		"""
 
+		self._configure_errors(on_failure)
+
+		self.callback = callback
+		if scheduler is None:
+			scheduler = AdaptivePollScheduler(min_interval=min(2, sleep_time), max_interval=sleep_time)
+		self.scheduler = scheduler
+
+		try:
+			while self.has_pending_work:
+				if scheduler.poll_due():
+					self.update_task_statuses()
+
+				try:
+					self.download_ready_images(download_location, wait=False)
+				except OSError:
+					if try_again_disk_full:
+						print("OSError reported. Invalid disk or the disk may be full - will try again - clear space")
+						pass
+					else:
+						raise
+
+				if self.has_pending_work:
+					scheduler.wait()
+		finally:
+			self._shutdown_pools()
+
+		self._report_failed_tasks(on_failure)
+
+	def _configure_errors(self, on_failure: str) -> None:
 		if on_failure == "raise":
 			self.raise_errors = True
 		elif on_failure == "log" and self.log_file:  # if they say to log the errors and specified a log file, set raise errors to False
 			self.raise_errors = False
 
-		self.callback = callback
-		while len(self.incomplete_tasks) > 0 or len(self.downloadable_tasks) > 0:
-			try:
-				self.download_ready_images(download_location)
-			except OSError:
-				if try_again_disk_full:
-					print("OSError reported. Invalid disk or the disk may be full - will try again - clear space")
-					pass
-				else:
-					raise
-
-			time.sleep(sleep_time)
-
+	def _report_failed_tasks(self, on_failure: str) -> None:
 		if len(self.failed_tasks) > 0:
 			message = f"{len(self.failed_tasks)} image(s) failed to export. Example error message from first" \
 								f" failed image \"{self.failed_tasks[0].last_task_status['description']}\" was" \
@@ -243,6 +714,23 @@ class TaskRegistry:
 				print(message)
 
 
+def _run_callback_in_process(image: "EEDLImage", callback: str) -> Dict[str, Any]:
+	"""
+	Runs a callback on an image that was sent to a worker process, and sends back the attributes it changed.
+	Needs to be at the module level so that the process pool can find it.
+
+	Args:
+		image (EEDLImage): The (unpickled) copy of the image.
+		callback (str): The name of the callback method to run.
+
+	Returns:
+		Dict[str, Any]: The attributes the callback added or changed, to apply to the original image.
+	"""
+	before = copy.deepcopy(image.__dict__)
+	image.run_callback(callback)
+	return {key: value for key, value in image.__dict__.items() if key not in before or before[key] != value}
+
+
 main_task_registry = TaskRegistry()
 
 
@@ -289,6 +777,38 @@ class EEDLImage:
 		zonal_inject_constants: dict:  Only used with the :code:`mosaic_and_zonal` callback. See note above.
 		zonal_nodata_value: int:  Only used with the :code:`mosaic_and_zonal` callback. See note above.
 		zonal_all_touched: bool:  Only used with the :code:`mosaic_and_zonal` callback. See note above.
+		zonal_engine: str: "rasterstats" (the default) or "label", which computes the zonal stats for every polygon at once
+			and is much faster with many polygons. See :code:`eedl.zonal.zonal_stats`. Only used with the :code:`mosaic_and_zonal` callback.
+		cloud_direct_read: bool: For cloud exports, don't download the tiles at all. Instead, :code:`mosaic` builds a VRT
+			that reads the tiles straight from the bucket over HTTP (with GDAL's /vsicurl/, or /vsigs/ for "cloud_private"
+			exports), and zonal stats read only the parts of the tiles that intersect the features. Useful when only zonal
+			stats are needed - :code:`mosaic_image` is then a VRT that depends on the exported tiles staying in the bucket. Default is False.
+		cloud_autodelete: bool: For "cloud_private" exports, delete the tiles from the bucket once they're all downloaded. Default is True.
+		export_dimensions: Optional[Tuple[int, int]]: The (width, height) of the export in pixels, if known. Drive downloads use it
+			with :code:`tile_size` to know how many tiles to wait for. Set automatically from the export's :code:`dimensions`
+			or :code:`region`, when they're provided.
+		drive_sync_timeout: float: How long, in seconds, to wait for a Drive export's tiles to finish syncing before
+			failing the download. Default is 600.
+		drive_relocation: str: How to get a Drive export's tiles out of the Drive folder and into the output folder - "move"
+			(the default), "link" or "copy" to leave the originals in Drive, or "none" to leave the tiles where they are
+			and mosaic them straight from the Drive folder. Moves and links don't copy any data when the Drive folder
+			and the output folder are on the same filesystem.
+		mosaic_mode: str: "geotiff" (the default) to write each mosaic out as a GeoTIFF, or "vrt" to only build a VRT over
+			the downloaded tiles - much faster when the mosaic is only used for zonal stats. See :code:`mosaic`.
+		mosaic_materialize: bool: With :code:`mosaic_mode="vrt"`, write the GeoTIFF anyway once the :code:`mosaic_and_zonal`
+			callback has finished its zonal stats. Default is False - call :code:`materialize_mosaic` to write it at any other time.
+		incremental_mosaic: bool: Write the mosaic tile by tile as the tiles download, instead of all at once afterward, so
+			that mosaicking overlaps with downloading - :code:`mosaic` then only needs to build overviews. Only used when
+			:code:`export_dimensions` is known (for example, from the :code:`dimensions` export parameter) and the mosaic is
+			a GeoTIFF - not a COG, or a VRT from :code:`mosaic_mode="vrt"`. Default is False.
+		mosaic_compression: Union[str, dict]: The compression profile for the mosaic - "deflate" (the default), "fast",
+			"archival", or "lossy", or a dict of settings. See :code:`eedl.mosaic_rasters.COMPRESSION_PROFILES`. Unlike
+			earlier versions, the default "deflate" profile uses a predictor - set :code:`predictor` to 1 in :code:`mosaic_options`
+			for mosaics compressed exactly as before.
+		mosaic_options: dict: Settings for writing the mosaic, passed on to :code:`eedl.mosaic_rasters.mosaic_rasters` - such as
+			:code:`num_threads`, :code:`block_size`, :code:`predictor`, :code:`bigtiff`, :code:`output_format`
+			("COG" for a Cloud Optimized GeoTIFF), :code:`overview_levels`, and :code:`overview_resampling`. Default is a GeoTIFF
+			written by GDAL using all CPUs and 512 pixel blocks, with nearest neighbor overviews.
 	"""
 
 	def __init__(self, **kwargs) -> None:
@@ -324,6 +844,23 @@ class EEDLImage:
 		self.zonal_inject_constants: dict = dict()
 		self.zonal_nodata_value: int = -9999
 		self.zonal_all_touched: bool = False
+		self.zonal_engine: str = "rasterstats"
+
+		self.cloud_direct_read: bool = False
+		self.cloud_autodelete: bool = True
+		self.tile_urls: List[str] = []  # GDAL paths of the exported tiles, when reading them directly from the bucket
+
+		self.export_dimensions: Optional[Tuple[int, int]] = None
+		self.drive_sync_timeout: float = drive.DRIVE_SYNC_TIMEOUT
+		self.drive_relocation: str = "move"
+		self.mosaic_compression: Union[str, dict] = "deflate"
+		self.incremental_mosaic: bool = False
+		self.mosaic_mode: str = "geotiff"
+		self.mosaic_materialize: bool = False
+		self._mosaic_streamed: bool = False  # whether the mosaic was written while downloading
+		self.mosaic_options: dict = dict()
+		self.tile_folder: Optional[str] = None  # where the tiles are, when they were left in the Drive folder rather than moved to output_folder
+		self._file_dimensions: Optional[Union[int, Tuple[int, int]]] = None  # the fileDimensions the export was started with
 
 		# Set the defaults here - this is a nice strategy where we get to define constants near the top that aren't buried in code, then apply them here.
 		for key in DEFAULTS:
@@ -335,9 +872,17 @@ class EEDLImage:
 		self._last_task_status = {"state": "UNSUBMITTED"}
 		# This will be the default status initially, so always assume it's UNSUBMITTED if we haven't gotten anything.
 		# From the server. "None" would work too, but then we couldn't just check the status.
-		self.task_data_downloaded = False
+		self._task_data_downloaded = False
 		self.export_type = "Drive"  # The other option is "Cloud".
 
+		# Which processing stages have finished - tracked so that a journaled run can pick up where it left off.
+		self.mosaic_complete: bool = False
+		self.zonal_complete: bool = False
+		self._resumed_downloaded: bool = False  # set when reattaching to a journaled export whose data was already downloaded
+
+		# (start, end, bytes processed) for each stage of the pipeline this image has finished - see _record_stage
+		self.stage_times: Dict[str, Tuple[float, float, Optional[int]]] = {}
+
 	def _set_names(self, filename_suffix: str = "") -> None:
 		"""
 		Args:
@@ -349,6 +894,116 @@ class EEDLImage:
 		self.description = filename_suffix
 		self.filename = f"{self.filename_description}_{filename_suffix}"
 
+	def __getstate__(self) -> Dict[str, Any]:
+		"""
+		Leaves out the Earth Engine objects and the task registry when pickling - used when sending the image to a worker
+		process to run its callback. The unpickled copy has no task or registry and can't be exported or polled.
+		"""
+		state = self.__dict__.copy()
+		state['task'] = None
+		state['_ee_image'] = None
+		state['task_registry'] = None
+		return state
+
+	def __setstate__(self, state: Dict[str, Any]) -> None:
+		self.__dict__.update(state)
+
+	def _apply_callback_results(self, results: Dict[str, Any]) -> None:
+		"""
+		Copies attributes set by a callback that ran in a worker process back onto this image.
+
+		Args:
+			results (Dict[str, Any]): The changed attributes, as returned from the worker.
+
+		Returns:
+			None
+		"""
+		new_stages = {stage: times for stage, times in results.get('stage_times', {}).items() if stage not in self.stage_times}
+
+		for key, value in results.items():
+			if key in ('task', '_ee_image', 'task_registry'):
+				continue
+			setattr(self, key, value)
+
+		if self.task_registry is not None:
+			for stage, (start, end, bytes_processed) in new_stages.items():  # the worker's copy had no registry to report these to
+				self.task_registry.metrics.record(self.filename, stage, start, end, bytes_processed)
+			self.task_registry._image_changed(self)
+
+	def _release(self) -> None:
+		"""
+		Drops the Earth Engine image, the task, and everything but the essentials of the task status. Called by the
+		TaskRegistry once the image is fully processed - after that, the image can't be exported or polled again.
+		"""
+		self.task = None
+		self._ee_image = None
+		self._last_task_status = {key: value for key, value in self._last_task_status.items() if key in ("id", "state", "description", "error_message")}
+
+	def _record_stage(self, stage: str, start: float, end: Optional[float] = None, bytes_processed: Optional[int] = None) -> None:
+		"""
+		Records that this image finished a stage of the pipeline, and passes the timing on to the registry's metrics.
+
+		Args:
+			stage (str): The name of the stage - see eedl.metrics.STAGES for the ones EEDL records.
+			start (float): When the stage started, in seconds since the epoch.
+			end (Optional[float]): When the stage finished. Defaults to now.
+			bytes_processed (Optional[int]): How much data the stage handled, if that applies.
+
+		Returns:
+			None
+		"""
+		if end is None:
+			end = time.time()
+		self.stage_times[stage] = (start, end, bytes_processed)
+		if self.task_registry is not None:
+			self.task_registry.metrics.record(self.filename, stage, start, end, bytes_processed)
+
+	def _expected_tile_count(self) -> Optional[int]:
+		"""
+		How many tiles the export should have, so that Drive downloads know when all of them have synced. Uses the
+		:code:`fileDimensions` the export was started with, which :code:`export_kwargs` can set instead of :code:`tile_size`. Only
+		known when :code:`export_dimensions` is - an estimate from the export region could be a row or column of tiles short, and
+		DriveSyncWatcher would then mosaic a partial set, so without it the watcher waits for the tile grid to be complete and
+		stop changing instead.
+
+		Returns:
+			Optional[int]: The number of tiles, or None if it can't be known.
+		"""
+		if self._file_dimensions is None or self.export_dimensions is None:
+			return None
+
+		width, height = self.export_dimensions
+		return drive.expected_tile_count(width, height, self._file_dimensions)
+
+	def _incremental_mosaic_writer(self) -> Optional[mosaic_rasters.IncrementalMosaic]:
+		"""
+		Returns:
+			Optional[mosaic_rasters.IncrementalMosaic]: A writer for this image's mosaic, if :code:`incremental_mosaic` is on
+			and the mosaic can be written incrementally - the export's size needs to be known exactly, and the output needs to be a GeoTIFF
+			(not a COG, or a VRT from :code:`mosaic_mode="vrt"`).
+		"""
+		if not self.incremental_mosaic or self.export_dimensions is None or self.mosaic_options.get("output_format", "GTiff") != "GTiff":
+			return None
+		if self.mosaic_mode == "vrt":
+			return None
+
+		os.makedirs(str(self.output_folder), exist_ok=True)
+		width, height = self.export_dimensions
+		writer_options = {key: value for key, value in self.mosaic_options.items() if key in ("num_threads", "block_size", "predictor", "bigtiff")}
+		# written under a temporary name, and only given the mosaic's name by mosaic() once it's complete - so an
+		# interrupted run never leaves a partial mosaic that check_mosaic_exists would take for a finished one
+		return mosaic_rasters.IncrementalMosaic(f"{os.path.join(str(self.output_folder), self.filename)}_mosaic.tif.part", width, height,
+												compression=self.mosaic_compression, **writer_options)
+
+	def _downloaded_bytes(self) -> int:
+		"""
+		Returns:
+			int: The total size of this image's tiles in its output folder (or the Drive folder, if they were left there).
+		"""
+		tile_folder = self.tile_folder if self.tile_folder is not None else str(self.output_folder)
+		# only the tiles - not the mosaic, or the tiles of another image whose name starts the same way
+		return sum(os.path.getsize(os.path.join(tile_folder, name)) for name in drive.DriveFolderIndex.scan(tile_folder).export_files(self.filename))
+
 	@staticmethod
 	def _initialize() -> None:
 		"""
@@ -399,6 +1054,24 @@ class EEDLImage:
 			None
 		"""
 		self._last_task_status = new_status
+		if self.task_registry is not None:
+			self.task_registry._image_changed(self)
+
+	@property
+	def task_data_downloaded(self) -> bool:
+		"""
+		Whether the image's exported data has been downloaded. Setting this keeps the image's TaskRegistry up to date.
+
+		Returns:
+			bool: True once download_results has retrieved the data.
+		"""
+		return self._task_data_downloaded
+
+	@task_data_downloaded.setter
+	def task_data_downloaded(self, downloaded: bool) -> None:
+		self._task_data_downloaded = downloaded
+		if self.task_registry is not None:
+			self.task_registry._image_changed(self)
 
 	def export(self,
 				image: ee.image.Image,
@@ -407,6 +1080,7 @@ class EEDLImage:
 				clip: Optional[ee.geometry.Geometry] = None,
 				strict_clip: Optional[bool] = False,
 				drive_root_folder: Optional[Union[str, Path]] = None,
+				priority: int = 0,
 				**export_kwargs: Unpack[EEExportDict]) -> None:
 		"""
 		Handles the exporting of an image.
@@ -421,7 +1095,9 @@ class EEDLImage:
 		The :code:`drive_root_folder` parameter must be set if :code:`export_type` is :code:`drive`, but is optional
 		when :code:`export_type` is :code:`cloud`. When :code:`export_type` is :code:`cloud` you must provide
 		the name of the Google Cloud storage bucket to export to in the :code:`bucket` parameter. Both export
-		types have configuration requirements and limitations discussed in :ref:`ExportLocations`.
+		types have configuration requirements and limitations discussed in :ref:`ExportLocations`. The
+		:code:`cloud_private` export type works like :code:`cloud`, but downloads with your Google Cloud credentials,
+		so the bucket doesn't need to be public.
 
 		Note that this method returns None - if you wish to save an object for tracking and to
 		obtain the path to the mosaicked image after everything is downloaded, keep the whole class
@@ -430,7 +1106,7 @@ class EEDLImage:
 		Args:
 			image (ee.image.Image): Image for export.
 			filename_suffix (str): The unique identifier used internally to identify images.
-			export_type (str): Specifies how the image should be exported. Either "cloud" or "drive". Defaults to "drive".
+			export_type (str): Specifies how the image should be exported. Either "cloud", "cloud_private", or "drive". Defaults to "drive".
 			clip (Optional[ee.geometry.Geometry]): Defines the region of interest for export - does not perform a strict clip, which is often slower.
 				Instead, it uses the Earth Engine export's "region" parameter to clip the results to the bounding box of
 				the clip geometry. To clip to the actual geometry, set strict_clip to True.
@@ -438,6 +1114,8 @@ class EEDLImage:
 				actual clipping geometry. Defaults to False.
 			drive_root_folder (Optional[Union[str, Path]]): The folder on your computer that has the root of your
 				Google Drive installation (e.g. :code:`G:\\My Drive` on Windows) if "drive" is the provided export type.
+			priority (int): Only used when the task registry limits how many tasks run at once (:code:`max_running_tasks`).
+				Queued exports with lower numbers are started first. Defaults to 0.
 			bucket (Optional[str]): The Google Cloud bucket to place the exported images into if using the `cloud` export_type.
 			export_kwargs (Unpack[EExportDict]): An optional dictionary of keyword arguments that gets passed directly to
 				Earth Engine's image export method. Overrides any values EEDL manually calculates, if a key is set here
@@ -494,9 +1172,16 @@ class EEDLImage:
 		else:
 			self.export_folder = ee_kwargs['folder']  # We need to persist this, so we can find the image later on, and so it's picked up by cloud export code below.
 
+		# Keep what's needed to work out how many tiles the export will have, so Drive downloads know what to wait for
+		self._file_dimensions = ee_kwargs.get("fileDimensions")
+		dimensions = ee_kwargs.get("dimensions")
+		if isinstance(dimensions, str) and "x" in dimensions:
+			width, height = dimensions.split("x")
+			self.export_dimensions = (int(width), int(height))
+
 		if export_type.lower() == "drive":
 			self.task = ee.batch.Export.image.toDrive(self._ee_image, **ee_kwargs)
-		elif export_type.lower() == "cloud":
+		elif export_type.lower() in ("cloud", "cloud_private"):
 			# Add the folder to the filename here for Google Cloud.
 			ee_kwargs['fileNamePrefix'] = f"{self.export_folder}/{ee_kwargs['fileNamePrefix']}"
 
@@ -512,13 +1197,55 @@ class EEDLImage:
 
 		# Export_type is not valid
 		else:
-			raise ValueError("Invalid value for export_type. Did you mean \"drive\" or \"cloud\"?")
-
-		self.task.start()
+			raise ValueError("Invalid value for export_type. Did you mean \"drive\", \"cloud\", or \"cloud_private\"?")
+
+		journal = self.task_registry.journal if self.task_registry is not None else None
+		parameters = None
+		if journal is not None:
+			image_expression = hashlib.sha256(self._ee_image.serialize().encode("utf-8")).hexdigest()
+			parameters = serialize_export_parameters(export_type, image_expression, dict(ee_kwargs))
+			entry = journal.get(self.export_folder, self.filename)
+			if entry is not None and self._reattach(entry, parameters):
+				self.export_type = export_type
+				self.task_registry.add(self)
+				return
 
 		self.export_type = export_type
 
-		self.task_registry.add(self)
+		self.task_registry.submit(self, priority=priority, parameters=parameters)
+
+	def _reattach(self, entry: Dict[str, Any], parameters: str) -> bool:
+		"""
+		Points this image at the Earth Engine task recorded in a journal entry instead of starting a new export, and
+		restores how far along processing got. Only reattaches if the export parameters match and the journaled task
+		didn't fail.
+
+		Args:
+			entry (Dict[str, Any]): The journal entry for this image's export folder and filename.
+			parameters (str): The serialized parameters of the export being requested now.
+
+		Returns:
+			bool: Whether the image was reattached. If False, the caller should start a new export.
+		"""
+		if entry['parameters'] != parameters or not entry['task_id'] or entry['state'] in TaskRegistry.FAILED_STATUSES:
+			return False
+
+		print(f"Reattaching {self.filename} to journaled export task {entry['task_id']} ({entry['state']})")
+		config = self.task.config if self.task is not None else None
+		task_type = self.task.task_type if self.task is not None else ee.batch.Task.Type.EXPORT_IMAGE
+		# task.status() looks the task up by its operation name, so it needs one - without it, a reattached task that's
+		# missing from the bulk listing would report itself UNSUBMITTED. Journals from before operation names were
+		# recorded get the name Earth Engine would have given the task in the current project.
+		operation_name = entry.get('operation_name') or f"{ee.data._get_projects_path()}/operations/{entry['task_id']}"
+		self.task = ee.batch.Task(entry['task_id'], task_type, ee.batch.Task.State(entry['state']), config=config, name=operation_name)
+		self.last_task_status = {'state': entry['state'], 'id': entry['task_id'], 'description': entry['description']}
+
+		self._resumed_downloaded = bool(entry['downloaded'])
+		self.mosaic_complete = bool(entry['mosaicked'])
+		self.zonal_complete = bool(entry['zonal'])
+		self.mosaic_image = entry['mosaic_image']
+		self.zonal_output_filepath = entry['zonal_output_filepath']
+		return True
 
 	@staticmethod
 	def check_mosaic_exists(download_location: Union[str, Path], export_folder: Union[str, Path], filename: str):
@@ -528,11 +1255,13 @@ class EEDLImage:
 			currently necessary because the task registry sets the download location right now. So we want to be able
 			to check at any time if the mosaic exists so that we can skip processing - we're using this. Otherwise,
 			we'd need to do a big refactor that's probably not worth it.
+
+			Finds either kind of mosaic - the GeoTIFF, or the VRT from :code:`mosaic_mode="vrt"` or :code:`cloud_direct_read`.
 		"""
-		output_file = os.path.join(str(download_location), str(export_folder), f"{filename}_mosaic.tif")
-		return os.path.exists(output_file)
+		output_file = os.path.join(str(download_location), str(export_folder), f"{filename}_mosaic")
+		return os.path.exists(f"{output_file}.tif") or os.path.exists(f"{output_file}.vrt")
 
-	def download_results(self, download_location: Union[str, Path], callback: Optional[str] = None, drive_wait: int = 15) -> None:
+	def download_results(self, download_location: Union[str, Path], callback: Optional[str] = None, drive_wait: Optional[float] = None) -> None:
 		"""
 
 		Handles the download and optional postprocessing of the current image to the folder specified :code:`download_location`.
@@ -542,7 +1271,8 @@ class EEDLImage:
 		Args:
 			download_location (Union[str, Path]): The directory where the results should be downloaded to. Expects a string path or a Pathlib Path object.
 			callback (Optional[str]): The callback function is called once the image has been downloaded.
-			drive_wait (int): The amount of time in seconds to wait to allow for files that Earth Engine reports have been exported to actually populate. Default is 15 seconds.
+			drive_wait (Optional[float]): For Drive exports, the longest time in seconds to wait for the exported files to finish syncing
+				into the Drive folder - downloading starts as soon as they have. Defaults to :code:`drive_sync_timeout`.
 
 		Returns:
 			None
@@ -555,25 +1285,83 @@ class EEDLImage:
 		# "RUNNING", "UNSUBMITTED"
 
 		self.output_folder = os.path.join(str(download_location), str(self.export_folder))
+		folder_search_path = os.path.join(str(self.drive_root_folder), str(self.export_folder))
+		if self.export_type.lower() == "drive" and self.drive_relocation == "none":
+			self.tile_folder = folder_search_path
 
-		if self.export_type.lower() == "drive":
-			time.sleep(drive_wait)  # It seems like there's often a race condition where EE reports export complete, but no files are found. Give things a short time to sync up.
-			folder_search_path = os.path.join(str(self.drive_root_folder), str(self.export_folder))
-			download_images_in_folder(folder_search_path, self.output_folder, prefix=self.filename)
+		# With incremental mosaicking, each tile is written into the mosaic as soon as it's downloaded
+		writer = self._incremental_mosaic_writer() if not (self.cloud_direct_read or self._resumed_downloaded) else None
+		on_file = writer.add_tile if writer is not None else None
 
-		elif self.export_type.lower() == "cloud":
-			google_cloud.download_public_export(str(self.cloud_bucket), self.output_folder, f"{self.export_folder}/{self.filename}")
+		try:
+			if self.cloud_direct_read and self.export_type.lower() == "cloud":  # nothing to download - just find the tiles
+				os.makedirs(self.output_folder, exist_ok=True)
+				finished = self.last_task_status.get('update_timestamp_ms')
+				urls = google_cloud.get_public_export_urls(str(self.cloud_bucket), f"{self.export_folder}/{self.filename}",
+															listed_after=float(finished) / 1000 if finished else None)
+				self.tile_urls = [f"/vsicurl/{url}" for url in urls]
+
+			elif self.cloud_direct_read and self.export_type.lower() == "cloud_private":
+				os.makedirs(self.output_folder, exist_ok=True)
+				self.tile_urls = google_cloud.get_private_export_paths(str(self.cloud_bucket), f"{self.export_folder}/{self.filename}")
+
+			elif self._resumed_downloaded:  # a previous run already retrieved the data - pick up with the callback
+				pass
 
-		else:
-			raise ValueError("Unknown export_type (not one of 'drive', 'cloud') - can't download")
+			elif self.export_type.lower() == "drive":
+				# Earth Engine reports the export complete before Drive has synced the files, so wait for all the tiles to arrive
+				wait_start = time.time()
+				tiles = drive.get_watcher(folder_search_path).wait_for_export(self.filename,
+																				expected_tiles=self._expected_tile_count(),
+																				timeout=drive_wait if drive_wait is not None else self.drive_sync_timeout)
+				self._record_stage("drive_wait", wait_start)
+
+				move_start = time.time()  # Drive already synced the files, so this only moves (or links or copies) them into place
+				os.makedirs(self.output_folder, exist_ok=True)  # the mosaic still goes here, even when the tiles stay in Drive
+				download_images_in_folder(folder_search_path, self.output_folder, prefix=self.filename,
+											files=[os.path.basename(tile) for tile in tiles], mode=self.drive_relocation, on_file=on_file)
+				self._record_stage("file_move", move_start, bytes_processed=self._downloaded_bytes())
+
+			elif self.export_type.lower() == "cloud":
+				download_start = time.time()
+				finished = self.last_task_status.get('update_timestamp_ms')
+				google_cloud.download_public_export(str(self.cloud_bucket), self.output_folder, f"{self.export_folder}/{self.filename}",
+													listed_after=float(finished) / 1000 if finished else None, on_file=on_file)
+				self._record_stage("download", download_start, bytes_processed=self._downloaded_bytes())
+
+			elif self.export_type.lower() == "cloud_private":
+				download_start = time.time()
+				google_cloud.download_export(str(self.cloud_bucket), self.output_folder, f"{self.export_folder}/{self.filename}", autodelete=self.cloud_autodelete,
+												on_file=on_file)
+				self._record_stage("download", download_start, bytes_processed=self._downloaded_bytes())
+
+			else:
+				raise ValueError("Unknown export_type (not one of 'drive', 'cloud', 'cloud_private') - can't download")
+		finally:
+			if writer is not None:
+				writer.close()
+
+		self._mosaic_streamed = writer is not None and writer.tiles_added > 0
 
 		self.task_data_downloaded = True
 
 		if callback:
-			callback_func = getattr(self, callback)
-			callback_func()
+			self.run_callback(callback)
+
+	def run_callback(self, callback: str) -> None:
+		"""
+		Runs a callback - the name of a method on this class, such as :code:`mosaic` or :code:`mosaic_and_zonal` - on the image.
 
-	def mosaic(self) -> None:
+		Args:
+			callback (str): The name of the method to run.
+
+		Returns:
+			None
+		"""
+		callback_func = getattr(self, callback)
+		callback_func()
+
+	def mosaic(self, mode: Optional[str] = None) -> None:
 		"""
 		Mosaics the individual pieces of the image into the complete image.
 
@@ -583,11 +1371,87 @@ class EEDLImage:
 		downloading. In this function, it then mosaics those pieces back into one image you can use locally, so you
 		don't need to handle the individual tiles (and all of their edges).
 
+		With :code:`mode="vrt"`, the mosaic is a VRT over the downloaded tiles instead - it reads like a single raster, but
+		nothing is copied or compressed, and zonal stats read only the parts of the tiles under each feature. The tiles
+		need to stay where they are for the VRT to work. Use :code:`materialize_mosaic` to write it out as a GeoTIFF later,
+		if it's needed.
+
+		Args:
+			mode (Optional[str]): "geotiff" or "vrt". Defaults to :code:`mosaic_mode`.
+
+		Returns:
+			None
+		"""
+		mode = mode if mode is not None else self.mosaic_mode
+		if mode not in ("geotiff", "vrt"):
+			raise ValueError(f"Unknown mosaic mode {mode} - must be \"geotiff\" or \"vrt\"")
+
+		if self.mosaic_complete and self.mosaic_image and os.path.exists(self.mosaic_image):  # finished in a previous (journaled) run
+			return
+
+		mosaic_start = time.time()
+		if self._mosaic_streamed:  # written tile by tile during the download - just needs its overviews, and its real name
+			self.mosaic_image = os.path.join(str(self.output_folder), f"{self.filename}_mosaic.tif")
+			part_path = f"{self.mosaic_image}.part"
+			overview_levels = self.mosaic_options.get("overview_levels", mosaic_rasters.OVERVIEW_LEVELS)
+			if self.mosaic_options.get("add_overviews", True) and overview_levels:
+				mosaic_rasters.build_overviews(part_path, overview_levels,
+												overview_resampling=self.mosaic_options.get("overview_resampling", "NEAREST"),
+												compression=self.mosaic_compression,
+												predictor=self.mosaic_options.get("predictor"),
+												num_threads=self.mosaic_options.get("num_threads", mosaic_rasters.MOSAIC_THREADS))
+				if os.path.exists(f"{part_path}.ovr"):  # the overviews are in a file beside the mosaic, named after it
+					os.replace(f"{part_path}.ovr", f"{self.mosaic_image}.ovr")
+			os.replace(part_path, self.mosaic_image)
+		elif self.tile_urls:  # reading directly from the bucket - a VRT of the remote tiles stands in for the mosaic
+			self.mosaic_image = os.path.join(str(self.output_folder), f"{self.filename}_mosaic.vrt")
+			mosaic_rasters.build_vrt(self.tile_urls, self.mosaic_image)
+		elif mode == "vrt":
+			tile_folder = self.tile_folder if self.tile_folder is not None else str(self.output_folder)
+			tiles = [os.path.join(tile_folder, name) for name in drive.DriveFolderIndex.scan(tile_folder).export_files(self.filename)]
+			if not tiles:
+				raise FileNotFoundError(f"No tiles for {self.filename} in {tile_folder} to build a VRT from")
+			self.mosaic_image = os.path.join(str(self.output_folder), f"{self.filename}_mosaic.vrt")
+			mosaic_rasters.build_vrt(tiles, self.mosaic_image)
+		else:
+			self.mosaic_image = os.path.join(str(self.output_folder), f"{self.filename}_mosaic.tif")
+			mosaic_options = {"compression": self.mosaic_compression, **self.mosaic_options}
+			if self.tile_folder is not None:  # the tiles were left in the Drive folder - read them from there, and leave them there
+				mosaic_rasters.mosaic_folder(self.tile_folder, self.mosaic_image, prefix=self.filename, **{**mosaic_options, "keep_tiles": True})
+			else:
+				mosaic_rasters.mosaic_folder(str(self.output_folder), self.mosaic_image, prefix=self.filename, **mosaic_options)
+		self._record_stage("mosaic", mosaic_start, bytes_processed=os.path.getsize(self.mosaic_image))
+		self._stage_complete("mosaic_complete")
+
+	def materialize_mosaic(self) -> None:
+		"""
+		Writes a VRT mosaic (from :code:`mosaic(mode="vrt")`) out as a GeoTIFF, using :code:`mosaic_compression` and
+		:code:`mosaic_options`, and points :code:`mosaic_image` at the GeoTIFF. Does nothing if the mosaic is already a
+		GeoTIFF. The VRT is kept, and the tiles aren't removed.
+
 		Returns:
 			None
 		"""
-		self.mosaic_image = os.path.join(str(self.output_folder), f"{self.filename}_mosaic.tif")
-		mosaic_rasters.mosaic_folder(str(self.output_folder), self.mosaic_image, prefix=self.filename)
+		if self.mosaic_image is None or not str(self.mosaic_image).endswith(".vrt"):
+			return
+
+		materialize_start = time.time()
+		output_path = os.path.join(str(self.output_folder), f"{self.filename}_mosaic.tif")
+		# mosaic_options can also hold mosaic_folder's own options, which mosaic_rasters doesn't take
+		mosaic_options = {key: value for key, value in self.mosaic_options.items() if key not in ("keep_tiles",)}
+		mosaic_rasters.mosaic_rasters([self.mosaic_image], output_path, **{"compression": self.mosaic_compression, **mosaic_options})
+		self.mosaic_image = output_path
+		self._record_stage("materialize", materialize_start, bytes_processed=os.path.getsize(output_path))
+		if self.task_registry is not None:
+			self.task_registry._image_changed(self)
+
+	def _stage_complete(self, stage: str) -> None:
+		"""
+		Marks a processing stage (:code:`mosaic_complete` or :code:`zonal_complete`) as finished and lets the registry know, so it can be journaled.
+		"""
+		setattr(self, stage, True)
+		if self.task_registry is not None:
+			self.task_registry._image_changed(self)
 
 	def mosaic_and_zonal(self) -> None:
 		"""
@@ -608,6 +1472,9 @@ class EEDLImage:
 			use_points = False
 
 		self.mosaic()
+		if self.zonal_complete and self.zonal_output_filepath and os.path.exists(self.zonal_output_filepath):  # finished in a previous (journaled) run
+			return
+
 		self.zonal_stats(polygons=self.zonal_polygons,
 							keep_fields=self.zonal_keep_fields,
 							stats=self.zonal_stats_to_calc,
@@ -615,8 +1482,12 @@ class EEDLImage:
 							inject_constants=self.zonal_inject_constants,
 							nodata_value=self.zonal_nodata_value,
 							all_touched=self.zonal_all_touched,
+							engine=self.zonal_engine,
 						)
 
+		if self.mosaic_materialize:
+			self.materialize_mosaic()
+
 	def zonal_stats(self,
 					polygons: Union[str, Path],
 					keep_fields: Tuple[str, ...] = ("UniqueID", "CLASS2"),
@@ -626,7 +1497,8 @@ class EEDLImage:
 					use_points: bool = False,
 					inject_constants: Optional[dict] = None,
 					nodata_value: int = -9999,
-					all_touched: bool = False
+					all_touched: bool = False,
+					engine: str = "rasterstats"
 					) -> None:
 		"""
 		Args:
@@ -640,6 +1512,7 @@ class EEDLImage:
 			inject_constants(Optional[dict]):
 			nodata_value (int):
 			all_touched (bool):
+			engine (str): "rasterstats" (the default) or "label" - see :code:`eedl.zonal.zonal_stats`.
 
 		Returns:
 			None
@@ -647,20 +1520,27 @@ class EEDLImage:
 		if inject_constants is None:
 			inject_constants = dict()
 
-		self.zonal_output_filepath = zonal.zonal_stats(
-							polygons,
-							self.mosaic_image,
-							self.output_folder,
-							self.filename,
-							keep_fields=keep_fields,
-							stats=stats,
-							report_threshold=report_threshold,
-							write_batch_size=write_batch_size,
-							use_points=use_points,
-							inject_constants=inject_constants,
-							nodata_value=nodata_value,
-							all_touched=all_touched
-						)
+		zonal_start = time.time()
+		# when the mosaic is a VRT of the tiles in the bucket, set up GDAL to read them efficiently, just while reading them
+		remote_reads = rasterio.Env(**mosaic_rasters.remote_read_options()) if self.tile_urls else contextlib.nullcontext()
+		with remote_reads:
+			self.zonal_output_filepath = zonal.zonal_stats(
+								polygons,
+								self.mosaic_image,
+								self.output_folder,
+								self.filename,
+								keep_fields=keep_fields,
+								stats=stats,
+								report_threshold=report_threshold,
+								write_batch_size=write_batch_size,
+								use_points=use_points,
+								inject_constants=inject_constants,
+								nodata_value=nodata_value,
+								all_touched=all_touched,
+								engine=engine
+							)
+		self._record_stage("zonal", zonal_start, bytes_processed=os.path.getsize(str(self.mosaic_image)))
+		self._stage_complete("zonal_complete")
 
 	def _check_task_status(self) -> Dict[str, Union[Dict[str, str], bool]]:
 		"""
@@ -674,11 +1554,36 @@ class EEDLImage:
 			raise ValueError('Error checking task status. Task is None. It likely means that the export task was not'
 							' properly created and the code needs to be re-run.')
 
-		new_status = self.task.status()
+		return self._update_task_status(self.task.status())
+
+	def _record_earth_engine_stages(self, status: Dict[str, Any]) -> None:
+		"""
+		Records the time the task spent queued and running on Earth Engine, from the timestamps in its final status.
+		"""
+		created = status.get('creation_timestamp_ms')
+		started = status.get('start_timestamp_ms')
+		finished = status.get('update_timestamp_ms')
+		if created and started:
+			self._record_stage("ee_queue", created / 1000, started / 1000)
+		running_since = started or created
+		if finished and running_since:
+			self._record_stage("ee_running", running_since / 1000, finished / 1000)
+
+	def _update_task_status(self, new_status: Dict[str, str]) -> Dict[str, Union[Dict[str, str], bool]]:
+		"""
+		Stores a task status retrieved from Earth Engine, either by this image or in bulk by the TaskRegistry.
+
+		Args:
+			new_status (Dict[str, str]): The task status dictionary as reported by Earth Engine.
 
+		Returns:
+			Dict[str, Union[Dict[str, str], bool]]: Returns a dictionary of the most up-to-date status and whether that status was changed
+		"""
 		changed = False
 		if self.last_task_status != new_status:
 			changed = True
+			if new_status['state'] == "COMPLETED" and self.last_task_status['state'] != "COMPLETED":
+				self._record_earth_engine_stages(new_status)
 			self.last_task_status = new_status
 
 		return {'status': self.last_task_status, 'changed': changed}
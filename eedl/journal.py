@@ -0,0 +1,160 @@
+import datetime
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+JOURNAL_FIELDS = (
+	"export_folder",
+	"filename",
+	"task_id",
+	"operation_name",
+	"parameters",
+	"export_type",
+	"description",
+	"drive_root_folder",
+	"cloud_bucket",
+	"state",
+	"downloaded",
+	"mosaicked",
+	"zonal",
+	"output_folder",
+	"mosaic_image",
+	"zonal_output_filepath",
+	"updated",
+)
+
+
+class TaskJournal:
+	"""
+	Keeps a record of every export a TaskRegistry starts in a local SQLite database, along with how far along each image
+	is - its task state, and whether it's been downloaded, mosaicked, and had zonal stats run. If the process running the exports
+	dies, running the same exports again with the same journal reattaches to the tasks already running (or finished) on
+	Earth Engine instead of starting (and paying for) new ones, and picks up processing after the last stage that finished.
+
+	Images are identified by their export folder and filename, so the usual EEDL requirement of unique filenames applies.
+	An image is only reattached if its export parameters (including the Earth Engine expression being exported) match
+	what was journaled - change anything and it's exported again.
+
+	Args:
+		path (Union[str, Path]): The SQLite file to store the journal in. Created if it doesn't exist.
+	"""
+
+	def __init__(self, path: Union[str, Path]) -> None:
+		self.path = path
+		self._lock = threading.Lock()  # downloads and callbacks update the journal from worker threads
+		self._connection = sqlite3.connect(str(path), check_same_thread=False)
+		self._connection.row_factory = sqlite3.Row
+		with self._lock, self._connection:
+			self._connection.execute("""
+				CREATE TABLE IF NOT EXISTS tasks (
+					export_folder TEXT NOT NULL,
+					filename TEXT NOT NULL,
+					task_id TEXT,
+					operation_name TEXT,
+					parameters TEXT,
+					export_type TEXT,
+					description TEXT,
+					drive_root_folder TEXT,
+					cloud_bucket TEXT,
+					state TEXT,
+					downloaded INTEGER NOT NULL DEFAULT 0,
+					mosaicked INTEGER NOT NULL DEFAULT 0,
+					zonal INTEGER NOT NULL DEFAULT 0,
+					output_folder TEXT,
+					mosaic_image TEXT,
+					zonal_output_filepath TEXT,
+					updated TEXT,
+					PRIMARY KEY (export_folder, filename)
+				)
+			""")
+			columns = [row['name'] for row in self._connection.execute("PRAGMA table_info(tasks)")]
+			if "operation_name" not in columns:  # journals written before operation names were recorded
+				self._connection.execute("ALTER TABLE tasks ADD COLUMN operation_name TEXT")
+
+	def get(self, export_folder: Union[str, Path, None], filename: str) -> Optional[Dict[str, Any]]:
+		"""
+		Args:
+			export_folder (Union[str, Path, None]): The export folder of the image.
+			filename (str): The filename of the image.
+
+		Returns:
+			Optional[Dict[str, Any]]: The journal entry for the image, or None if it hasn't been journaled.
+		"""
+		with self._lock:
+			row = self._connection.execute("SELECT * FROM tasks WHERE export_folder = ? AND filename = ?", (str(export_folder), filename)).fetchone()
+		return dict(row) if row is not None else None
+
+	def save(self, image: Any, parameters: Optional[str] = None, commit: bool = True) -> None:
+		"""
+		Writes the current state of an image to the journal, creating the entry if needed.
+
+		Args:
+			image (EEDLImage): The image to journal.
+			parameters (Optional[str]): The serialized export parameters - only needs to be provided when the export starts.
+			commit (bool): Whether to commit right away. Status updates for many images can be committed together with :code:`commit`.
+
+		Returns:
+			None
+		"""
+		values = {
+			"export_folder": str(image.export_folder),
+			"filename": image.filename,
+			"task_id": image.task.id if image.task is not None else None,
+			"operation_name": getattr(image.task, "operation_name", None),
+			"parameters": parameters,
+			"export_type": image.export_type,
+			"description": image.description,
+			"drive_root_folder": str(image.drive_root_folder) if image.drive_root_folder else None,
+			"cloud_bucket": image.cloud_bucket,
+			"state": image.last_task_status['state'],
+			"downloaded": int(bool(image.task_data_downloaded)),
+			"mosaicked": int(bool(image.mosaic_complete)),
+			"zonal": int(bool(image.zonal_complete)),
+			"output_folder": str(image.output_folder) if image.output_folder else None,
+			"mosaic_image": str(image.mosaic_image) if image.mosaic_image else None,
+			"zonal_output_filepath": str(image.zonal_output_filepath) if image.zonal_output_filepath else None,
+			"updated": datetime.datetime.now().isoformat(),
+		}
+		update_fields = [field for field in JOURNAL_FIELDS if field not in ("export_folder", "filename") and (field != "parameters" or parameters is not None)]
+
+		with self._lock:
+			self._connection.execute(
+				f"INSERT INTO tasks ({', '.join(JOURNAL_FIELDS)}) VALUES ({', '.join('?' for _ in JOURNAL_FIELDS)})"
+				f" ON CONFLICT (export_folder, filename) DO UPDATE SET {', '.join(f'{field} = excluded.{field}' for field in update_fields)}",
+				[values[field] for field in JOURNAL_FIELDS]
+			)
+			if commit:
+				self._connection.commit()
+
+	def commit(self) -> None:
+		with self._lock:
+			self._connection.commit()
+
+	def close(self) -> None:
+		with self._lock:
+			self._connection.commit()
+			self._connection.close()
+
+
+def serialize_export_parameters(export_type: str, image_expression: str, export_kwargs: Dict[str, Any]) -> str:
+	"""
+	Produces a stable string for a set of export parameters so that a journaled export can be matched up with a
+	new request for the same export.
+
+	Args:
+		export_type (str): The export type ("drive" or "cloud")
+		image_expression (str): The serialized Earth Engine expression for the image being exported.
+		export_kwargs (Dict[str, Any]): The keyword arguments passed to Earth Engine's export function. Earth Engine objects
+			(such as the region) are serialized.
+
+	Returns:
+		str: A JSON string of the parameters.
+	"""
+	def _default(value: Any) -> Any:
+		if hasattr(value, "serialize"):  # Earth Engine objects
+			return value.serialize()
+		return str(value)
+
+	return json.dumps({"export_type": export_type.lower(), "image": image_expression, **export_kwargs}, default=_default, sort_keys=True)
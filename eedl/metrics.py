@@ -0,0 +1,264 @@
+import abc
+import bisect
+import collections
+import itertools
+import json
+import math
+import os
+import threading
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Sequence, Union
+
+# The stages EEDL records, in pipeline order. Callbacks and subclasses can record their own stages too.
+STAGES = ("ee_queue", "ee_running", "drive_wait", "download", "file_move", "mosaic", "zonal")
+
+# Upper bounds, in seconds, of the duration histogram buckets PrometheusTextfileSink writes (plus +Inf)
+DURATION_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200, 14400, 28800, 86400)
+
+
+class StageRecord:
+	"""
+	How long one image spent in one stage of the pipeline. Times are in seconds since the epoch.
+	"""
+
+	__slots__ = ("image", "stage", "start", "end", "bytes_processed")
+
+	def __init__(self, image: str, stage: str, start: float, end: float, bytes_processed: Optional[int] = None) -> None:
+		self.image = image
+		self.stage = stage
+		self.start = start
+		self.end = end
+		self.bytes_processed = bytes_processed
+
+	@property
+	def duration(self) -> float:
+		return max(0.0, self.end - self.start)
+
+	def as_dict(self) -> Dict[str, Any]:
+		return {
+			"image": self.image,
+			"stage": self.stage,
+			"start": self.start,
+			"end": self.end,
+			"duration": self.duration,
+			"bytes": self.bytes_processed,
+		}
+
+
+def percentile(values: Sequence[float], percent: float) -> Optional[float]:
+	"""
+	Nearest-rank percentile of a set of values.
+
+	Args:
+		values (Sequence[float]): The values - don't need to be sorted.
+		percent (float): The percentile to find, from 0 to 100.
+
+	Returns:
+		Optional[float]: The value at that percentile, or None if there are no values.
+	"""
+	if not values:
+		return None
+	ordered = sorted(values)
+	rank = max(1, math.ceil(percent / 100 * len(ordered)))
+	return ordered[rank - 1]
+
+
+def summarize(records: Sequence[StageRecord]) -> Dict[str, Dict[str, Optional[float]]]:
+	"""
+	Summarizes stage records by stage.
+
+	Args:
+		records (Sequence[StageRecord]): The records to summarize.
+
+	Returns:
+		Dict[str, Dict[str, Optional[float]]]: For each stage, the keys :code:`count`, :code:`total_seconds`, :code:`mean_seconds`,
+			:code:`p50_seconds`, :code:`p95_seconds`, :code:`bytes`, :code:`bytes_per_second` (bytes processed per second spent in the stage),
+			and :code:`images_per_hour` (images through the stage per hour of wall time, from the first start to the last end - so
+			stages that run in parallel get credit for it). Stages are in pipeline order, followed by any others.
+	"""
+	by_stage: Dict[str, List[StageRecord]] = {}
+	for record in records:
+		by_stage.setdefault(record.stage, []).append(record)
+
+	ordered_stages = [stage for stage in STAGES if stage in by_stage] + sorted(stage for stage in by_stage if stage not in STAGES)
+
+	summary: Dict[str, Dict[str, Optional[float]]] = {}
+	for stage in ordered_stages:
+		stage_records = by_stage[stage]
+		durations = [record.duration for record in stage_records]
+		total_seconds = sum(durations)
+		sizes = [record.bytes_processed for record in stage_records if record.bytes_processed is not None]
+		total_bytes = sum(sizes) if sizes else None
+		wall_time = max(record.end for record in stage_records) - min(record.start for record in stage_records)
+		summary[stage] = {
+			"count": len(stage_records),
+			"total_seconds": total_seconds,
+			"mean_seconds": total_seconds / len(stage_records),
+			"p50_seconds": percentile(durations, 50),
+			"p95_seconds": percentile(durations, 95),
+			"bytes": total_bytes,
+			"bytes_per_second": total_bytes / total_seconds if total_bytes is not None and total_seconds > 0 else None,
+			"images_per_hour": len(stage_records) / wall_time * 3600 if wall_time > 0 else None,
+		}
+
+	return summary
+
+
+class MetricsSink(abc.ABC):
+	"""
+	Receives a StageRecord each time an image finishes a stage of the pipeline. Subclass this to send EEDL's timings
+	somewhere else - implement :code:`record`, and :code:`close` if the sink holds resources open. Sinks may be called
+	from download and callback worker threads, so they need to be thread safe.
+	"""
+
+	@abc.abstractmethod
+	def record(self, record: StageRecord) -> None:
+		pass
+
+	def close(self) -> None:
+		pass
+
+
+class JSONLinesSink(MetricsSink):
+	"""
+	Appends each stage record to a file as a line of JSON with the keys image, stage, start, end, duration, and bytes.
+
+	Args:
+		path (Union[str, Path]): The file to append to.
+	"""
+
+	def __init__(self, path: Union[str, Path]) -> None:
+		self.path = path
+		self._lock = threading.Lock()
+
+	def record(self, record: StageRecord) -> None:
+		line = json.dumps(record.as_dict())
+		with self._lock, open(self.path, 'a') as output:
+			output.write(line + "\n")
+
+
+class PrometheusTextfileSink(MetricsSink):
+	"""
+	Keeps running totals per stage and writes them in the Prometheus text format, for node_exporter's
+	textfile collector to pick up. The file is rewritten after each record, via a temporary file so the collector
+	never reads a partial file. Only counts are kept, not the records themselves, so memory use doesn't grow
+	however long the registry runs.
+
+	Metrics written are :code:`eedl_stage_duration_seconds` (a histogram with the buckets in :code:`buckets`, a sum,
+	and a count - Prometheus' :code:`histogram_quantile` gets percentiles from it) and :code:`eedl_stage_bytes_total`,
+	each labeled by stage.
+
+	Args:
+		path (Union[str, Path]): The file to write - it should end in :code:`.prom` and be in the collector's directory.
+		buckets (Sequence[float]): The upper bounds of the duration histogram's buckets, in seconds. Defaults to DURATION_BUCKETS.
+	"""
+
+	def __init__(self, path: Union[str, Path], buckets: Sequence[float] = DURATION_BUCKETS) -> None:
+		self.path = path
+		self.buckets = tuple(sorted(buckets))
+		self._lock = threading.Lock()
+		self._bucket_counts: Dict[str, List[int]] = {}  # per stage, how many durations fell in each bucket - the last one is +Inf
+		self._duration_sums: Dict[str, float] = {}
+		self._bytes: Dict[str, int] = {}
+
+	def record(self, record: StageRecord) -> None:
+		with self._lock:
+			counts = self._bucket_counts.setdefault(record.stage, [0] * (len(self.buckets) + 1))
+			counts[bisect.bisect_left(self.buckets, record.duration)] += 1
+			self._duration_sums[record.stage] = self._duration_sums.get(record.stage, 0.0) + record.duration
+			if record.bytes_processed is not None:
+				self._bytes[record.stage] = self._bytes.get(record.stage, 0) + record.bytes_processed
+			self._write()
+
+	def _write(self) -> None:
+		lines = [
+			"# HELP eedl_stage_duration_seconds Time EEDL images spent in each stage of the export pipeline.",
+			"# TYPE eedl_stage_duration_seconds histogram",
+		]
+		for stage, counts in self._bucket_counts.items():
+			cumulative = list(itertools.accumulate(counts))
+			for bound, count in zip((*self.buckets, "+Inf"), cumulative):
+				lines.append(f'eedl_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+			lines.append(f'eedl_stage_duration_seconds_sum{{stage="{stage}"}} {self._duration_sums[stage]}')
+			lines.append(f'eedl_stage_duration_seconds_count{{stage="{stage}"}} {cumulative[-1]}')
+
+		lines.append("# HELP eedl_stage_bytes_total Bytes processed by EEDL in each stage of the export pipeline.")
+		lines.append("# TYPE eedl_stage_bytes_total counter")
+		for stage, total in self._bytes.items():
+			lines.append(f'eedl_stage_bytes_total{{stage="{stage}"}} {total}')
+
+		temp_path = f"{self.path}.tmp"
+		with open(temp_path, 'w') as output:
+			output.write("\n".join(lines) + "\n")
+		os.replace(temp_path, self.path)
+
+
+class PipelineMetrics:
+	"""
+	Collects how long each image spends in each stage of the pipeline - queued on Earth Engine (:code:`ee_queue`),
+	running on Earth Engine (:code:`ee_running`), waiting for Google Drive to sync (:code:`drive_wait`), downloading from Cloud
+	Storage (:code:`download`), moving a Drive export's files into place (:code:`file_move`), mosaicking (:code:`mosaic`), and
+	running zonal stats (:code:`zonal`) - and passes each
+	record along to any configured sinks. Every TaskRegistry has one of these as :code:`registry.metrics`.
+
+	Args:
+		sinks (Optional[Sequence[MetricsSink]]): Sinks to send records to as they come in.
+		max_records (Optional[int]): How many of the most recent records to keep for :code:`summary` - older ones are
+			dropped so that long-running registries don't grow without bound. Sinks still receive every record. None keeps them all.
+	"""
+
+	def __init__(self, sinks: Optional[Sequence[MetricsSink]] = None, max_records: Optional[int] = 100_000) -> None:
+		self.sinks: List[MetricsSink] = list(sinks) if sinks else []
+		self.records: Deque[StageRecord] = collections.deque(maxlen=max_records)
+		self._lock = threading.Lock()
+
+	def add_sink(self, sink: MetricsSink) -> None:
+		self.sinks.append(sink)
+
+	def record(self, image: str, stage: str, start: float, end: float, bytes_processed: Optional[int] = None) -> StageRecord:
+		"""
+		Args:
+			image (str): The name (filename) of the image.
+			stage (str): The stage it finished.
+			start (float): When the stage started, in seconds since the epoch.
+			end (float): When the stage finished, in seconds since the epoch.
+			bytes_processed (Optional[int]): How much data the stage handled, if that applies.
+
+		Returns:
+			StageRecord: The new record.
+		"""
+		stage_record = StageRecord(image, stage, start, end, bytes_processed)
+		with self._lock:
+			self.records.append(stage_record)
+		for sink in self.sinks:
+			sink.record(stage_record)
+		return stage_record
+
+	def summary(self) -> Dict[str, Dict[str, Optional[float]]]:
+		"""
+		Returns:
+			Dict[str, Dict[str, Optional[float]]]: Throughput and latency percentiles per stage - see :code:`summarize`.
+		"""
+		with self._lock:
+			records = list(self.records)
+		return summarize(records)
+
+	def report(self) -> str:
+		"""
+		Returns:
+			str: The summary as a table, for printing.
+		"""
+		lines = [f"{'stage':<12}{'count':>8}{'p50 (s)':>12}{'p95 (s)':>12}{'MB/s':>10}{'images/hr':>12}"]
+		for stage, values in self.summary().items():
+			bytes_per_second = values['bytes_per_second']
+			images_per_hour = values['images_per_hour']
+			lines.append(
+				f"{stage:<12}{values['count']:>8}{values['p50_seconds']:>12.1f}{values['p95_seconds']:>12.1f}"
+				f"{bytes_per_second / 1e6 if bytes_per_second is not None else float('nan'):>10.2f}"
+				f"{images_per_hour if images_per_hour is not None else float('nan'):>12.1f}"
+			)
+		return "\n".join(lines)
+
+	def close(self) -> None:
+		for sink in self.sinks:
+			sink.close()
@@ -1,66 +1,431 @@
+import contextlib
 import os
 import shutil
-import tempfile
+import threading
+import uuid
 from pathlib import Path
-from typing import Sequence, Union
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple, Union
 from osgeo import gdal
 
+from .drive import TILE_OFFSETS_PATTERN, DriveFolderIndex
+from .google_cloud import forget_verification
 
-def mosaic_folder(folder_path: Union[str, Path], output_path: Union[str, Path], prefix: str = "") -> None:
+# GDAL settings for reading rasters over HTTP (/vsicurl/ and /vsigs/) - so that opening a remote tile or a VRT of them
+# reads just the header and the blocks that are needed, in as few range requests as possible.
+REMOTE_READ_OPTIONS = {
+	"GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR",  # otherwise GDAL tries to list the "folder" each remote file is in
+	"CPL_VSIL_CURL_ALLOWED_EXTENSIONS": ".tif,.vrt",
+	"VSI_CACHE": "TRUE",  # keep recently read blocks in memory
+	"GDAL_HTTP_MULTIRANGE": "YES",
+	"GDAL_HTTP_MERGE_CONSECUTIVE_RANGES": "YES",
+}
+
+# Defaults for writing mosaics - see mosaic_rasters
+MOSAIC_THREADS = "ALL_CPUS"
+MOSAIC_BLOCK_SIZE = 512
+OVERVIEW_LEVELS = (2, 4, 8, 16, 32, 64, 128)
+
+# Named sets of compression settings for mosaics. Each can set "compress" (the GDAL compression method), "level" (its
+# compression level), "predictor" (1 for none, 2 for horizontal differencing, 3 for floating point, or "auto" to pick 2 or 3
+# from the data type), and "max_z_error" (the largest error LERC may introduce, in the raster's units). Pass a profile's
+# name, or a dict of these settings, as mosaic_rasters' compression.
+COMPRESSION_PROFILES: Dict[str, Dict[str, Any]] = {
+	# The default. Mosaics used to be written with DEFLATE and no predictor - this adds one, which makes them smaller but
+	# not byte-for-byte the same as before. For the old output, use {"compress": "DEFLATE", "predictor": 1}.
+	"deflate": {"compress": "DEFLATE", "predictor": "auto"},
+	"fast": {"compress": "ZSTD", "level": 1, "predictor": 1},  # quickest to write, and still reasonably small
+	"archival": {"compress": "ZSTD", "level": 15, "predictor": "auto"},  # slower to write, smallest lossless files
+	"lossy": {"compress": "LERC_ZSTD", "level": 9, "max_z_error": 0.001},  # lossy, but never off by more than max_z_error
+}
+
+# The creation option each driver uses for the compression level, by compression method
+_LEVEL_OPTIONS = {"DEFLATE": "ZLEVEL", "ZSTD": "ZSTD_LEVEL", "LERC_DEFLATE": "ZLEVEL", "LERC_ZSTD": "ZSTD_LEVEL"}
+_COG_PREDICTORS = {1: "NO", 2: "STANDARD", 3: "FLOATING_POINT"}
+
+
+def compression_options(compression: Union[str, Dict[str, Any]],
+						floating_point: bool,
+						output_format: str = "GTiff",
+						predictor: Optional[int] = None) -> Dict[str, str]:
+	"""
+	Translates a compression profile into GDAL creation options for a driver.
+
+	Args:
+		compression (Union[str, Dict[str, Any]]): The name of a profile in COMPRESSION_PROFILES, or a dict of profile settings.
+		floating_point (bool): Whether the raster holds floating point values - used to pick the predictor.
+		output_format (str): "GTiff" or "COG" - they name some options differently.
+		predictor (Optional[int]): Overrides the profile's predictor.
+
+	Returns:
+		Dict[str, str]: The creation options, by name.
+	"""
+	if isinstance(compression, str):
+		if compression not in COMPRESSION_PROFILES:
+			raise ValueError(f"Unknown compression profile {compression} - must be one of {tuple(COMPRESSION_PROFILES)} or a dict of settings")
+		profile = COMPRESSION_PROFILES[compression]
+	else:
+		profile = compression
+
+	method = str(profile.get("compress", "DEFLATE")).upper()
+	options = {"COMPRESS": method}
+
+	if "level" in profile and method in _LEVEL_OPTIONS:
+		options["LEVEL" if output_format == "COG" else _LEVEL_OPTIONS[method]] = str(profile["level"])
+
+	if method.startswith("LERC"):  # LERC does its own prediction
+		options["MAX_Z_ERROR"] = str(profile.get("max_z_error", 0))
+	else:
+		chosen = predictor if predictor is not None else profile.get("predictor", 1)
+		if chosen == "auto":
+			chosen = 3 if floating_point else 2
+		options["PREDICTOR"] = _COG_PREDICTORS[int(chosen)] if output_format == "COG" else str(chosen)
+
+	return options
+
+
+@contextlib.contextmanager
+def config_options(options: Dict[str, str]) -> Iterator[None]:
+	"""
+	Sets GDAL config options for the calling thread, just while the block runs. Uses :code:`gdal.config_options` where
+	GDAL has it (3.7 and up). With older GDAL, the thread-local options are set and restored by hand.
+
+	Args:
+		options (Dict[str, str]): The config options to set, by name.
+	"""
+	if hasattr(gdal, "config_options"):
+		with gdal.config_options(options):
+			yield
+		return
+
+	previous = {name: gdal.GetThreadLocalConfigOption(name, None) for name in options}
+	for name, value in options.items():
+		gdal.SetThreadLocalConfigOption(name, value)
+	try:
+		yield
+	finally:
+		for name, value in previous.items():
+			gdal.SetThreadLocalConfigOption(name, value)
+
+
+def remote_read_options() -> Dict[str, str]:
+	"""
+	The REMOTE_READ_OPTIONS that aren't already set, either as GDAL config options or environment variables. Apply them
+	only around the code that reads remote rasters - with :code:`config_options(...)`, or :code:`rasterio.Env(...)`
+	for the copy of GDAL that rasterio (and so rasterstats) uses - so they don't change how GDAL behaves for anything else.
+
+	Returns:
+		Dict[str, str]: The options to set, by name.
+	"""
+	return {key: value for key, value in REMOTE_READ_OPTIONS.items() if key not in os.environ and gdal.GetConfigOption(key) is None}
+
+
+def build_vrt(raster_paths: Sequence[Union[str, Path]], vrt_path: Union[str, Path]) -> None:
+	"""
+	Builds a VRT mosaic of the rasters, which can be read like a single raster without copying any data. The rasters
+	can be local paths or remote ones (such as :code:`/vsicurl/` URLs).
+
+	Args:
+		raster_paths (Sequence[Union[str, Path]]): The rasters to include.
+		vrt_path (Union[str, Path]): Where to write the VRT.
+
+	Returns:
+		None
+	"""
+	options = remote_read_options() if any(str(path).startswith("/vsi") for path in raster_paths) else {}
+	with config_options(options):
+		vrt_options = gdal.BuildVRTOptions(resampleAlg='nearest', resolution="highest")
+		vrt = gdal.BuildVRT(str(vrt_path), [str(path) for path in raster_paths], options=vrt_options)
+		vrt.FlushCache()  # Write the VRT out
+		vrt = None  # noqa: F841 - closes the dataset
+
+
+def mosaic_folder(folder_path: Union[str, Path], output_path: Union[str, Path], prefix: str = "", keep_tiles: bool = False, **mosaic_options: Any) -> None:
 	"""
 	***Needs language***
 
 	Args:
 		folder_path (Union[str, Path]): Location of the folder.
 		output_path (Union[str, Path]): Output destination.
-		prefix (str): Used to find the files of interest.
+		prefix (str): The export's :code:`fileNamePrefix` - only its tiles are mosaicked, not those of other exports whose
+			names start the same way. Empty to mosaic every .tif in the folder.
+		keep_tiles (bool): Leave the tiles in place - when there's only one, it's copied to output_path rather than moved.
+		**mosaic_options: Passed on to :code:`mosaic_rasters` - for example :code:`num_threads` or :code:`block_size`.
 
 	Returns:
 		None
 	"""
-	tifs = [os.path.join(folder_path, filename) for filename in os.listdir(folder_path) if filename.endswith(".tif") and filename.startswith(prefix)]
+	index = DriveFolderIndex.scan(folder_path)
+	names = index.export_files(prefix) if prefix else index.names  # only this export's tiles - image_1 never picks up image_10's
+	tifs = [os.path.join(folder_path, filename) for filename in names if filename.endswith(".tif")]
 
-	if len(tifs) == 1:  # If we only got one image back, don't bother mosaicking, though this will also skip generating overviews.
-		shutil.move(tifs[0], output_path)  # Just move the output image to the "mosaic" name, then return.
+	# If we only got one image back, don't bother mosaicking, though this will also skip generating overviews. COGs still
+	# need to be written out, since the tile Earth Engine exports isn't one.
+	if len(tifs) == 1 and mosaic_options.get("output_format", "GTiff") != "COG":
+		if keep_tiles:
+			shutil.copyfile(tifs[0], output_path)
+		else:
+			shutil.move(tifs[0], output_path)  # Just move the output image to the "mosaic" name, then return.
+			forget_verification(tifs[0])
 		return
 
-	mosaic_rasters(tifs, output_path)
+	mosaic_rasters(tifs, output_path, **mosaic_options)
 
 
 def mosaic_rasters(raster_paths: Sequence[Union[str, Path]],
 					output_path: Union[str, Path],
-					add_overviews: bool = True) -> None:
+					add_overviews: bool = True,
+					num_threads: Union[int, str] = MOSAIC_THREADS,
+					block_size: int = MOSAIC_BLOCK_SIZE,
+					predictor: Optional[int] = None,
+					bigtiff: str = "IF_SAFER",
+					output_format: str = "GTiff",
+					overview_levels: Optional[Sequence[int]] = OVERVIEW_LEVELS,
+					overview_resampling: str = "NEAREST",
+					compression: Union[str, Dict[str, Any]] = "deflate") -> None:
 	"""
 	Adapted from https://gis.stackexchange.com/a/314580/1955 and
 	https://www.gislite.com/tutorial/k8024 along with other basic lookups on GDAL Python bindings
 
+	The rasters are combined through a VRT held in GDAL's in-memory filesystem (/vsimem/), so nothing is left behind on
+	disk, then written out as a tiled, compressed GeoTIFF. With :code:`output_format="COG"`, the output is a
+	Cloud Optimized GeoTIFF instead - GDAL's COG driver writes the tiles and the overviews in a single pass, where a plain
+	GeoTIFF has its overviews built afterward by reading the whole mosaic back in. COGs are also laid out so that
+	readers can fetch any part of them, at any overview level, in a few range requests.
+
 	Args:
 		raster_paths (Sequence[Union[str, Path]]): Location of the raster
 		output_path (Union[str, Path]): Output destination
-		add_overviews (bool):
+		add_overviews (bool): Whether to build overviews for the output.
+		num_threads (Union[int, str]): Threads GDAL uses to compress the output and build overviews - a number, or "ALL_CPUS" (the default).
+		block_size (int): The width and height of the output's internal tiles, in pixels - a multiple of 16.
+		predictor (Optional[int]): Overrides the compression profile's predictor - 1 for none, 2 for horizontal differencing,
+			3 for floating point. Ignored for LERC.
+		bigtiff (str): GDAL's BIGTIFF creation option. The default, "IF_SAFER", switches to BigTIFF whenever the output
+			might pass 4 GB - GDAL's own default can guess wrong for compressed outputs and fail partway through.
+		output_format (str): "GTiff" (the default) or "COG".
+		overview_levels (Optional[Sequence[int]]): The overview levels (decimation factors) to build. None or an empty sequence
+			builds no overviews. COGs build successive powers of two, so for them this must be 2, 4, 8, and so on.
+		overview_resampling (str): How overview pixels are calculated from the full resolution ones - any of GDAL's
+			overview resampling methods, such as "NEAREST" (the default, and the right choice for categorical data), "AVERAGE",
+			"BILINEAR", or "MODE".
+		compression (Union[str, Dict[str, Any]]): A compression profile - "deflate" (the default), "fast", "archival",
+			or "lossy" - or a dict of profile settings. See COMPRESSION_PROFILES. The overviews use the same compression.
+			The "deflate" profile adds a predictor that earlier versions of EEDL didn't use - pass :code:`predictor=1` to
+			write mosaics without one, as before.
 
 	:return: None
 	"""
+	if output_format not in ("GTiff", "COG"):
+		raise ValueError(f"Unknown output_format {output_format} - must be GTiff or COG")
+
+	levels = list(overview_levels) if add_overviews and overview_levels else []
+	if output_format == "COG" and levels != [2 ** power for power in range(1, len(levels) + 1)]:
+		raise ValueError("COG overviews are successive powers of two - overview_levels must be 2, 4, 8, and so on")
+
+	vrt_path = f"/vsimem/mosaic_rasters_{uuid.uuid4().hex}.vrt"
+	# GDAL_NUM_THREADS is used when building overviews - set just for this thread, and just while mosaicking
+	with config_options({"GDAL_NUM_THREADS": str(num_threads)}):
+		try:
+			vrt_options = gdal.BuildVRTOptions(resampleAlg='nearest', resolution="highest")
+			vrt_data = gdal.BuildVRT(vrt_path, [str(path) for path in raster_paths], options=vrt_options)
+
+			floating_point = vrt_data.GetRasterBand(1).DataType in (gdal.GDT_Float32, gdal.GDT_Float64)
+			compression_settings = compression_options(compression, floating_point, output_format, predictor)
+
+			creation_options = [f"{name}={value}" for name, value in compression_settings.items()]
+			creation_options.extend([f"NUM_THREADS={num_threads}", f"BIGTIFF={bigtiff}"])
+			if output_format == "COG":
+				creation_options.append(f"BLOCKSIZE={block_size}")
+				creation_options.append(f"OVERVIEW_RESAMPLING={overview_resampling}")
+				if levels:
+					creation_options.append("OVERVIEWS=IGNORE_EXISTING")
+					creation_options.append(f"OVERVIEW_COUNT={len(levels)}")
+				else:
+					creation_options.append("OVERVIEWS=NONE")
+			else:
+				creation_options.extend(["TILED=YES", f"BLOCKXSIZE={block_size}", f"BLOCKYSIZE={block_size}"])
+
+			# Now let's export it to the output_path as a geotiff.
+			driver = gdal.GetDriverByName(output_format)  # We'll use VRT driver.CreateCopy.
+			output = driver.CreateCopy(str(output_path), vrt_data, 0, creation_options)
+			output.FlushCache()
+			output = None
+			vrt_data = None  # noqa: F841 - closes the dataset
+
+			if levels and output_format == "GTiff":
+				_build_overviews(output_path, levels, overview_resampling, compression_settings)
+		finally:
+			gdal.Unlink(vrt_path)
+
+
+def _build_overviews(raster_path: Union[str, Path], levels: Sequence[int], resampling: str, compression_settings: Dict[str, str]) -> None:
+	"""
+	Builds external overviews for a GeoTIFF, compressed the same way as the GeoTIFF. Uses as many threads as the
+	GDAL_NUM_THREADS config option allows.
+	"""
+	dataset = gdal.Open(str(raster_path))
+	overview_options = {f"{name}_OVERVIEW": value for name, value in compression_settings.items()}  # COMPRESS_OVERVIEW, and so on
+	with config_options(overview_options):  # just for this thread, so other mosaics' overviews aren't affected
+		dataset.BuildOverviews(resampling, overviewlist=list(levels))
+	dataset = None  # noqa: F841 - closes the dataset
+
+
+class IncrementalMosaic:
+	"""
+	Writes a mosaic tile by tile as the tiles arrive, rather than waiting for all of them and then mosaicking. The
+	output GeoTIFF is created with the full size of the export as soon as the first tile lands (which supplies the
+	projection, pixel grid, data type, and bands), and each tile is copied into its place in the mosaic as soon as it's
+	downloaded - so the disk and CPU work of mosaicking overlaps with downloading the rest. Call :code:`finish` once
+	every tile has been added to close the file and build its overviews.
 
-	# gdal.SetConfigOption("GTIFF_SRC_SOURCE", "GEOKEYS")
-	vrt_path = tempfile.mkstemp(suffix=".vrt", prefix="mosaic_rasters_")
+	Tiles can be added from several threads at once - they're read in parallel, and written one strip at a time.
+	Only GeoTIFF output is supported, since GDAL's COG driver can only write a finished raster.
+
+	Args:
+		output_path (Union[str, Path]): Where to write the mosaic.
+		width (int): The width of the whole export, in pixels.
+		height (int): The height of the whole export, in pixels.
+		num_threads (Union[int, str]): Threads GDAL uses to compress the output and build overviews.
+		block_size (int): The width and height of the output's internal tiles, in pixels - a multiple of 16.
+		predictor (Optional[int]): Overrides the compression profile's predictor.
+		bigtiff (str): GDAL's BIGTIFF creation option.
+		compression (Union[str, Dict[str, Any]]): A compression profile - see COMPRESSION_PROFILES.
+	"""
+
+	def __init__(self,
+					output_path: Union[str, Path],
+					width: int,
+					height: int,
+					num_threads: Union[int, str] = MOSAIC_THREADS,
+					block_size: int = MOSAIC_BLOCK_SIZE,
+					predictor: Optional[int] = None,
+					bigtiff: str = "IF_SAFER",
+					compression: Union[str, Dict[str, Any]] = "deflate") -> None:
 
-	vrt_options = gdal.BuildVRTOptions(resampleAlg='nearest', resolution="highest")
-	my_vrt = gdal.BuildVRT(vrt_path, raster_paths, options=vrt_options)
-	# my_vrt = None
-	my_vrt.FlushCache()  # Write the VRT out
-	print(f"VRT at {vrt_path}")
+		self.output_path = output_path
+		self.width = width
+		self.height = height
+		self.num_threads = num_threads
+		self.block_size = block_size
+		self.predictor = predictor
+		self.bigtiff = bigtiff
+		self.compression = compression
+		self.tiles_added = 0
+		self._dataset: Any = None
+		self._origin: Optional[Tuple[float, float]] = None
+		self._pixel_size: Optional[Tuple[float, float]] = None
+		self._compression_settings: Dict[str, str] = {}
+		self._lock = threading.Lock()
 
-	# Now let's export it to the output_path as a geotiff.
-	driver = gdal.GetDriverByName("GTIFF")  # We'll use VRT driver.CreateCopy.
-	vrt_data = gdal.Open(vrt_path)
-	output = driver.CreateCopy(output_path, vrt_data, 0, ["COMPRESS=DEFLATE", ])
-	output.FlushCache()
-	print("GeoTIFF Output")
+	def _create(self, tile: Any, tile_path: Union[str, Path]) -> None:
+		"""
+		Creates the output from the first tile. Earth Engine names tiles with their row and column offsets in pixels, so
+		the mosaic's origin is the tile's origin moved back by those offsets.
+		"""
+		match = TILE_OFFSETS_PATTERN.search(os.path.basename(str(tile_path)))
+		row_offset, column_offset = (int(match.group(1)), int(match.group(2))) if match else (0, 0)
+		transform = tile.GetGeoTransform()
+		self._pixel_size = (transform[1], transform[5])
+		self._origin = (transform[0] - column_offset * transform[1], transform[3] - row_offset * transform[5])
 
-	if add_overviews:
-		dataset = gdal.Open(output_path)
-		gdal.SetConfigOption("COMPRESS_OVERVIEW", "DEFLATE")
-		dataset.BuildOverviews(overviewlist=[2, 4, 8, 16, 32, 64, 128])
+		first_band = tile.GetRasterBand(1)
+		floating_point = first_band.DataType in (gdal.GDT_Float32, gdal.GDT_Float64)
+		self._compression_settings = compression_options(self.compression, floating_point, "GTiff", self.predictor)
+		creation_options = [f"{name}={value}" for name, value in self._compression_settings.items()]
+		creation_options.extend(["TILED=YES", f"BLOCKXSIZE={self.block_size}", f"BLOCKYSIZE={self.block_size}",
+									f"NUM_THREADS={self.num_threads}", f"BIGTIFF={self.bigtiff}",
+									"SPARSE_OK=TRUE"])  # only the blocks tiles are written to take up space
 
-	print("Overviews Generated")
+		driver = gdal.GetDriverByName("GTiff")
+		self._dataset = driver.Create(str(self.output_path), self.width, self.height, tile.RasterCount, first_band.DataType, creation_options)
+		self._dataset.SetGeoTransform((self._origin[0], transform[1], 0, self._origin[1], 0, transform[5]))
+		self._dataset.SetProjection(tile.GetProjection())
+		for band_number in range(1, tile.RasterCount + 1):
+			nodata = tile.GetRasterBand(band_number).GetNoDataValue()
+			if nodata is not None:
+				self._dataset.GetRasterBand(band_number).SetNoDataValue(nodata)
+
+	def add_tile(self, tile_path: Union[str, Path]) -> None:
+		"""
+		Copies a tile into its place in the mosaic.
+
+		Args:
+			tile_path (Union[str, Path]): The tile - one of the export's tiles, on the same pixel grid as the others.
+
+		Returns:
+			None
+		"""
+		tile = gdal.Open(str(tile_path))
+		with self._lock:
+			if self._dataset is None:
+				self._create(tile, tile_path)
+
+		transform = tile.GetGeoTransform()
+		x_offset = int(round((transform[0] - self._origin[0]) / self._pixel_size[0]))  # type: ignore
+		y_offset = int(round((transform[3] - self._origin[1]) / self._pixel_size[1]))  # type: ignore
+		if x_offset < 0 or y_offset < 0 or x_offset + tile.RasterXSize > self.width or y_offset + tile.RasterYSize > self.height:
+			raise ValueError(f"Tile {tile_path} falls outside the {self.width}x{self.height} mosaic - the export's dimensions are wrong")
+
+		for row in range(0, tile.RasterYSize, self.block_size):  # a strip at a time, so whole tiles are never held in memory
+			rows = min(self.block_size, tile.RasterYSize - row)
+			data = tile.ReadRaster(0, row, tile.RasterXSize, rows)
+			with self._lock:
+				self._dataset.WriteRaster(x_offset, y_offset + row, tile.RasterXSize, rows, data)
+
+		with self._lock:
+			self.tiles_added += 1
+		tile = None  # noqa: F841 - closes the dataset
+
+	def close(self) -> None:
+		"""
+		Writes out everything added so far and closes the mosaic - after this it can be read, but no more tiles can be added.
+		"""
+		with self._lock:
+			if self._dataset is not None:
+				self._dataset.FlushCache()
+				self._dataset = None
+
+	def finish(self,
+				overview_levels: Optional[Sequence[int]] = OVERVIEW_LEVELS,
+				overview_resampling: str = "NEAREST") -> None:
+		"""
+		Closes the mosaic and builds its overviews.
+
+		Args:
+			overview_levels (Optional[Sequence[int]]): The overview levels to build. None or an empty sequence builds none.
+			overview_resampling (str): How overview pixels are calculated - see :code:`mosaic_rasters`.
+
+		Returns:
+			None
+		"""
+		self.close()
+		if overview_levels:
+			build_overviews(self.output_path, overview_levels, overview_resampling, self.compression, self.predictor, self.num_threads)
+
+
+def build_overviews(raster_path: Union[str, Path],
+					overview_levels: Sequence[int] = OVERVIEW_LEVELS,
+					overview_resampling: str = "NEAREST",
+					compression: Union[str, Dict[str, Any]] = "deflate",
+					predictor: Optional[int] = None,
+					num_threads: Union[int, str] = MOSAIC_THREADS) -> None:
+	"""
+	Builds overviews for a finished GeoTIFF mosaic - for example, one written with an IncrementalMosaic that was closed
+	without building them.
+
+	Args:
+		raster_path (Union[str, Path]): The mosaic.
+		overview_levels (Sequence[int]): The overview levels to build.
+		overview_resampling (str): How overview pixels are calculated - see :code:`mosaic_rasters`.
+		compression (Union[str, Dict[str, Any]]): The compression profile for the overviews - see COMPRESSION_PROFILES.
+		predictor (Optional[int]): Overrides the compression profile's predictor.
+		num_threads (Union[int, str]): Threads GDAL uses to build the overviews.
+
+	Returns:
+		None
+	"""
+	dataset = gdal.Open(str(raster_path))
+	floating_point = dataset.GetRasterBand(1).DataType in (gdal.GDT_Float32, gdal.GDT_Float64)
+	dataset = None
+	with config_options({"GDAL_NUM_THREADS": str(num_threads)}):
+		_build_overviews(raster_path, overview_levels, overview_resampling, compression_options(compression, floating_point, "GTiff", predictor))
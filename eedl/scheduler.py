@@ -0,0 +1,264 @@
+import collections
+import math
+import statistics
+import threading
+import time
+from typing import Any, Callable, Deque, Dict, Optional, Sequence
+
+
+COMPLETE_STATES = ("COMPLETED", "CANCEL_REQUESTED", "CANCELLED", "FAILED")
+
+
+class TaskTiming:
+	"""
+	Scheduling and latency bookkeeping for a single task. Times are in seconds since the epoch.
+	"""
+
+	__slots__ = ("name", "first_seen", "started", "next_poll", "overdue_polls", "completed", "detected", "fixed_interval_detected")
+
+	def __init__(self, name: str, first_seen: float, started: float) -> None:
+		self.name = name
+		self.first_seen = first_seen  # when the scheduler first saw the task
+		self.started = started  # when Earth Engine says the task was created, if it told us
+		self.next_poll = first_seen
+		self.overdue_polls = 0
+		self.completed: Optional[float] = None  # when Earth Engine says the task finished
+		self.detected: Optional[float] = None  # when we noticed it had finished
+		self.fixed_interval_detected: Optional[float] = None  # when a fixed polling interval would have noticed it
+
+	@property
+	def latency(self) -> Optional[float]:
+		"""How long the task sat finished on Earth Engine before we noticed"""
+		if self.completed is None or self.detected is None:
+			return None
+		return max(0.0, self.detected - self.completed)
+
+	@property
+	def fixed_interval_latency(self) -> Optional[float]:
+		"""How long the task would have sat finished on Earth Engine with fixed interval polling"""
+		if self.completed is None or self.fixed_interval_detected is None:
+			return None
+		return max(0.0, self.fixed_interval_detected - self.completed)
+
+
+class RunningStats:
+	"""
+	The count, mean, and maximum of a series of values, kept without holding on to the values themselves.
+	"""
+
+	__slots__ = ("count", "total", "maximum")
+
+	def __init__(self) -> None:
+		self.count = 0
+		self.total = 0.0
+		self.maximum: Optional[float] = None
+
+	def add(self, value: float) -> None:
+		self.count += 1
+		self.total += value
+		self.maximum = value if self.maximum is None else max(self.maximum, value)
+
+	@property
+	def mean(self) -> Optional[float]:
+		return self.total / self.count if self.count else None
+
+
+class PollScheduler:
+	"""
+	Decides when the TaskRegistry should next poll Earth Engine for task statuses. This base class polls
+	on a fixed interval, which is how :code:`wait_for_images` has always behaved. It also keeps track of
+	how long each task sat finished on Earth Engine before it was noticed.
+
+	Waiting happens on a :code:`threading.Event`, so any thread can call :code:`notify` to wake up a waiting
+	registry immediately (for example, when a download finishes or a new image is added).
+
+	Timings are kept by task ID only while a task is being polled - once it finishes, its latencies are folded into
+	running totals and the timing is dropped, so a long-running scheduler's memory doesn't grow with every task.
+
+	Args:
+		interval (float): Seconds between polls. This is also the fixed interval that latencies are compared against.
+		clock (Callable[[], float]): The function providing the current time in seconds since the epoch. Defaults
+			to time.time - it needs to be comparable with the timestamps Earth Engine reports for tasks.
+	"""
+
+	def __init__(self, interval: float = 10, clock: Callable[[], float] = time.time) -> None:
+		self.interval = interval
+		self.clock = clock
+		self.timings: Dict[str, TaskTiming] = {}  # timings for the tasks we're still polling, by task ID
+		self.poll_count = 0
+		self._latencies = RunningStats()
+		self._fixed_interval_latencies = RunningStats()
+		self._reference_start: Optional[float] = None  # when a fixed interval poller would have started polling
+		self._next_poll: float = 0.0  # poll right away
+		self._wake_event = threading.Event()
+
+	def poll_due(self) -> bool:
+		"""
+		Returns:
+			bool: Whether it's time for the registry to poll task statuses again.
+		"""
+		return self.clock() >= self._next_poll
+
+	def next_poll_delay(self) -> float:
+		"""
+		Returns:
+			float: Seconds until the next poll is due - 0 if it's due now.
+		"""
+		return max(0.0, self._next_poll - self.clock())
+
+	def wait(self, timeout: Optional[float] = None) -> bool:
+		"""
+		Blocks until the next poll is due, or until another thread calls :code:`notify`, whichever comes first.
+
+		Args:
+			timeout (Optional[float]): Wait no longer than this many seconds, even if the next poll isn't due yet.
+
+		Returns:
+			bool: True if woken by :code:`notify`, False if the wait ran out.
+		"""
+		delay = self.next_poll_delay()
+		if timeout is not None:
+			delay = min(delay, timeout)
+
+		woken = self._wake_event.wait(delay)
+		self._wake_event.clear()
+		return woken
+
+	def notify(self) -> None:
+		"""
+		Wakes up anything currently blocked in :code:`wait`.
+		"""
+		self._wake_event.set()
+
+	def observe(self, images: Sequence[Any]) -> None:
+		"""
+		Records the results of a poll so the scheduler can decide when the next one should happen.
+
+		Args:
+			images (Sequence[EEDLImage]): The images whose statuses were just refreshed.
+
+		Returns:
+			None
+		"""
+		now = self.clock()
+		if self._reference_start is None:
+			self._reference_start = now
+		self.poll_count += 1
+
+		for image in images:
+			status = image.last_task_status
+			key = self._task_key(image, status)
+			timing = self._timing_for(key, image, status, now)
+
+			if status['state'] in COMPLETE_STATES:
+				self._record_completion(timing, status, now)
+				del self.timings[key]
+			else:
+				timing.next_poll = now + self._poll_interval(timing, now)
+
+		self._next_poll = min((timing.next_poll for timing in self.timings.values()), default=now + self.interval)
+
+	def _poll_interval(self, timing: TaskTiming, now: float) -> float:
+		return self.interval
+
+	@staticmethod
+	def _task_key(image: Any, status: Dict[str, Any]) -> str:
+		"""The task's Earth Engine ID - unlike id(image), never reused by another task once this one is gone"""
+		task = getattr(image, 'task', None)
+		return status.get('id') or getattr(task, 'id', None) or f"image-{id(image)}"
+
+	def _timing_for(self, key: str, image: Any, status: Dict[str, Any], now: float) -> TaskTiming:
+		if key not in self.timings:
+			started = status.get('creation_timestamp_ms')
+			self.timings[key] = TaskTiming(getattr(image, 'filename', key), now, started / 1000 if started else now)
+		return self.timings[key]
+
+	def _record_completion(self, timing: TaskTiming, status: Dict[str, Any], now: float) -> None:
+		timing.detected = now
+		completed = status.get('update_timestamp_ms')
+		timing.completed = completed / 1000 if completed else now
+
+		# A fixed interval poller starting when we did would notice at the first poll on or after completion.
+		reference = self._reference_start if self._reference_start is not None else now
+		polls_needed = max(0, math.ceil((timing.completed - reference) / self.interval))
+		timing.fixed_interval_detected = reference + polls_needed * self.interval
+
+		if timing.latency is not None and timing.fixed_interval_latency is not None:
+			self._latencies.add(timing.latency)
+			self._fixed_interval_latencies.add(timing.fixed_interval_latency)
+
+	def latency_summary(self) -> Dict[str, Optional[float]]:
+		"""
+		Compares how long finished tasks waited before being noticed against how long they would have waited
+		when polling every :code:`interval` seconds.
+
+		Returns:
+			Dict[str, Optional[float]]: With the keys :code:`tasks`, :code:`polls`, :code:`mean_latency`,
+				:code:`max_latency`, :code:`mean_fixed_interval_latency`, and :code:`max_fixed_interval_latency`.
+				Latencies are None until at least one task has finished.
+		"""
+		return {
+			'tasks': self._latencies.count,
+			'polls': self.poll_count,
+			'mean_latency': self._latencies.mean,
+			'max_latency': self._latencies.maximum,
+			'mean_fixed_interval_latency': self._fixed_interval_latencies.mean,
+			'max_fixed_interval_latency': self._fixed_interval_latencies.maximum,
+		}
+
+
+class AdaptivePollScheduler(PollScheduler):
+	"""
+	Polls tasks less often when they're unlikely to be done and more often as they approach the time they're
+	expected to finish. The expected time is the median time-to-finish of the last :code:`history_size` tasks this
+	scheduler has seen complete. Until any have finished, every task is polled every :code:`max_interval` seconds (so
+	it's never slower than the fixed interval it replaces). Tasks that run past the expected time are polled at
+	:code:`min_interval`, backing off by :code:`backoff_factor` each poll until they're back at :code:`max_interval`.
+
+	Args:
+		min_interval (float): The shortest time between polls, in seconds.
+		max_interval (float): The longest time between polls, in seconds. Also used as the fixed interval that latencies
+			are compared against.
+		backoff_factor (float): How much to grow the interval by on each poll of an overdue task.
+		history_size (int): How many of the most recently finished tasks the expected time is based on.
+		clock (Callable[[], float]): See PollScheduler.
+	"""
+
+	def __init__(self,
+					min_interval: float = 2,
+					max_interval: float = 10,
+					backoff_factor: float = 1.5,
+					history_size: int = 1000,
+					clock: Callable[[], float] = time.time) -> None:
+		super().__init__(interval=max_interval, clock=clock)
+		self.min_interval = min(min_interval, max_interval)
+		self.max_interval = max_interval
+		self.backoff_factor = backoff_factor
+		self._durations: Deque[float] = collections.deque(maxlen=history_size)
+
+	@property
+	def expected_duration(self) -> Optional[float]:
+		"""
+		Returns:
+			Optional[float]: The median number of seconds between task creation and completion for the most recently finished
+			tasks, or None if none have finished.
+		"""
+		return statistics.median(self._durations) if self._durations else None
+
+	def _record_completion(self, timing: TaskTiming, status: Dict[str, Any], now: float) -> None:
+		super()._record_completion(timing, status, now)
+		if status['state'] == "COMPLETED" and timing.completed is not None:
+			self._durations.append(max(0.0, timing.completed - timing.started))
+
+	def _poll_interval(self, timing: TaskTiming, now: float) -> float:
+		expected = self.expected_duration
+		if expected is None:  # nothing to go on yet
+			return self.max_interval
+
+		remaining = timing.started + expected - now
+		if remaining > 0:  # poll at half the remaining time, so we tighten up as it approaches
+			return min(self.max_interval, max(self.min_interval, remaining / 2))
+
+		interval = self.min_interval * (self.backoff_factor ** timing.overdue_polls)
+		timing.overdue_polls += 1
+		return min(self.max_interval, interval)
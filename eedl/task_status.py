@@ -0,0 +1,43 @@
+import abc
+from typing import Any, Dict, Iterable
+
+import ee
+from ee import _cloud_api_utils
+
+
+class TaskStatusBackend(abc.ABC):
+	"""
+	Retrieves the statuses of many Earth Engine export tasks at once. The TaskRegistry asks its backend for the
+	status of every task it's still waiting on once per polling cycle, instead of calling :code:`task.status()`
+	on each task (which costs a round trip to Earth Engine per task, per cycle).
+
+	Subclasses need to implement :code:`get_statuses`.
+	"""
+
+	@abc.abstractmethod
+	def get_statuses(self, task_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+		"""
+		Args:
+			task_ids (Iterable[str]): The Earth Engine task IDs to retrieve statuses for.
+
+		Returns:
+			Dict[str, Dict[str, Any]]: A dictionary keyed by task ID with the task status dictionary as the value - the
+				status dictionaries have the same keys as those returned by :code:`ee.batch.Task.status()`. Task IDs
+				the backend couldn't find are left out of the dictionary.
+		"""
+
+
+class EarthEngineTaskListBackend(TaskStatusBackend):
+	"""
+	The default backend. Makes a single listing of all of the user's task operations with :code:`ee.data.listOperations`
+	(which pages through them on Earth Engine's side), converts them to task statuses, and maps the results back to the
+	requested task IDs.
+	"""
+
+	def get_statuses(self, task_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+		wanted = set(task_ids)
+		if not wanted:  # don't spend a request if there's nothing to look up
+			return {}
+
+		statuses = (_cloud_api_utils.convert_operation_to_task(operation) for operation in ee.data.listOperations())
+		return {status['id']: status for status in statuses if status.get('id') in wanted}
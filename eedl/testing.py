@@ -0,0 +1,282 @@
+"""
+	Stand-ins for Earth Engine objects so that the task registry and images can be exercised without
+	an Earth Engine account or network access. Used by EEDL's own tests, but also available to anyone
+	who wants to test code built on top of EEDL.
+"""
+
+import base64
+import hashlib
+import http.server
+import itertools
+import threading
+import time
+import urllib.parse
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Type
+from xml.sax.saxutils import escape
+
+import google_crc32c
+
+from .image import EEDLImage, TaskRegistry
+from .task_status import TaskStatusBackend
+
+
+class FakeTask:
+	"""
+	Mimics the parts of :code:`ee.batch.Task` that EEDL uses. Its state is controlled by the FakeTaskBackend
+	it belongs to.
+	"""
+
+	def __init__(self, backend: "FakeTaskBackend", task_id: str, description: str = "") -> None:
+		self.backend = backend
+		self.id = task_id
+		self.description = description
+		self.state = "UNSUBMITTED"
+		self.error_message: Optional[str] = None
+		self.creation_timestamp_ms = backend.clock() * 1000
+		self.start_timestamp_ms: Optional[float] = None  # when it started running
+		self.update_timestamp_ms = self.creation_timestamp_ms
+
+	def start(self) -> None:
+		self.backend.start_calls += 1
+		self.state = "READY"
+
+	def status(self) -> Dict[str, Any]:
+		self.backend.status_calls += 1  # each of these would be a round trip to Earth Engine
+		return self.backend.status_dict(self)
+
+
+class FakeTaskBackend(TaskStatusBackend):
+	"""
+	A TaskStatusBackend that keeps all tasks in memory and counts how many times each kind of
+	Earth Engine request would have been made so that tests can make assertions about it.
+	"""
+
+	def __init__(self, clock: Callable[[], float] = time.time) -> None:
+		self.clock = clock
+		self.tasks: Dict[str, FakeTask] = {}
+		self.list_calls = 0  # bulk listings - what the registry should be using
+		self.status_calls = 0  # individual task.status() calls
+		self.start_calls = 0
+		self._ids = itertools.count()
+
+	def create_task(self, description: str = "") -> FakeTask:
+		task = FakeTask(self, f"FAKE{next(self._ids):020d}", description=description)
+		self.tasks[task.id] = task
+		return task
+
+	def set_state(self, task_id: str, state: str, error_message: Optional[str] = None) -> None:
+		task = self.tasks[task_id]
+		task.state = state
+		task.error_message = error_message
+		task.update_timestamp_ms = self.clock() * 1000
+		if state == "RUNNING" and task.start_timestamp_ms is None:
+			task.start_timestamp_ms = task.update_timestamp_ms
+
+	def status_dict(self, task: FakeTask) -> Dict[str, Any]:
+		status: Dict[str, Any] = {
+			"id": task.id,
+			"state": task.state,
+			"description": task.description,
+			"creation_timestamp_ms": task.creation_timestamp_ms,
+			"update_timestamp_ms": task.update_timestamp_ms,
+		}
+		if task.start_timestamp_ms is not None:
+			status["start_timestamp_ms"] = task.start_timestamp_ms
+		if task.error_message is not None:
+			status["error_message"] = task.error_message
+		return status
+
+	def get_statuses(self, task_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+		self.list_calls += 1
+		return {task_id: self.status_dict(self.tasks[task_id]) for task_id in task_ids if task_id in self.tasks}
+
+
+def add_fake_image(registry: TaskRegistry,
+					backend: FakeTaskBackend,
+					filename_suffix: str,
+					image_class: Type[EEDLImage] = EEDLImage,
+					priority: int = 0,
+					**image_kwargs) -> EEDLImage:
+	"""
+	Creates an EEDLImage as if it had been exported, but backed by a FakeTask, and adds it to the registry.
+
+	Args:
+		registry (TaskRegistry): The registry to track the image in.
+		backend (FakeTaskBackend): The fake backend that owns the image's task.
+		filename_suffix (str): Passed through as the filename suffix for the image, as with :code:`EEDLImage.export`.
+		image_class (Type[EEDLImage]): The class to create the image from, if testing a subclass of EEDLImage.
+		priority (int): The submission priority, if the registry has a limit on running tasks.
+		image_kwargs: Any other keyword arguments are passed to the EEDLImage constructor.
+
+	Returns:
+		EEDLImage: the new image, with a started task in the READY state (or a queued task, if the registry limits running tasks).
+	"""
+	image = image_class(task_registry=registry, **image_kwargs)
+	image._set_names(filename_suffix)
+	image.task = backend.create_task(description=image.description)  # type: ignore
+	registry.submit(image, priority=priority)
+	return image
+
+
+class FakeBucketServer:
+	"""
+	A local HTTP server that stands in for a public Google Cloud Storage bucket - it answers bucket listings in the
+	same XML format and serves the objects in :code:`objects`, with their hashes in an :code:`x-goog-hash` header. Point
+	EEDL at it with the :code:`base_url` arguments in eedl.google_cloud. Use it as a context manager, or call :code:`start` and :code:`stop`.
+
+	Args:
+		bucket_name (str): The name of the bucket to serve.
+		response_delay (float): Seconds to wait before sending each object, to simulate network latency.
+		page_size (int): The most objects to return per page of a listing - the real service returns up to 1000.
+	"""
+
+	def __init__(self, bucket_name: str = "fake-bucket", response_delay: float = 0, page_size: int = 1000) -> None:
+		self.bucket_name = bucket_name
+		self.response_delay = response_delay
+		self.page_size = page_size
+		self.objects: Dict[str, bytes] = {}
+		self.composite: Set[str] = set()  # objects that, like composite uploads, only have a CRC32C hash - no MD5
+		self.failures: Dict[str, int] = {}  # object name -> how many more requests for it should get a 503 response
+		self.requests: List[str] = []  # the path (with query) of each request received, for assertions
+		self.range_requests: List[str] = []  # the Range header of each request that had one
+		self.connections = 0  # how many connections clients have opened
+		self.max_concurrent_requests = 0
+		self._active_requests = 0
+		self._stats_lock = threading.Lock()
+		self._server: Optional[http.server.ThreadingHTTPServer] = None
+		self._thread: Optional[threading.Thread] = None
+
+	def add_object(self, name: str, data: bytes, composite: bool = False) -> None:
+		self.objects[name] = data
+		if composite:
+			self.composite.add(name)
+		else:
+			self.composite.discard(name)
+
+	def hash_header(self, name: str) -> str:
+		data = self.objects[name]
+		header = f"crc32c={base64.b64encode(google_crc32c.Checksum(data).digest()).decode()}"
+		if name not in self.composite:
+			header += f",md5={base64.b64encode(hashlib.md5(data).digest()).decode()}"
+		return header
+
+	@property
+	def base_url(self) -> str:
+		if self._server is None:
+			raise RuntimeError("FakeBucketServer hasn't been started")
+		return f"http://127.0.0.1:{self._server.server_address[1]}/"
+
+	def start(self) -> "FakeBucketServer":
+		bucket = self
+
+		class Handler(http.server.BaseHTTPRequestHandler):
+			protocol_version = "HTTP/1.1"  # so clients can keep connections open
+
+			def setup(self) -> None:
+				super().setup()
+				with bucket._stats_lock:
+					bucket.connections += 1
+
+			def do_GET(self) -> None:
+				with bucket._stats_lock:
+					bucket.requests.append(self.path)
+					bucket._active_requests += 1
+					bucket.max_concurrent_requests = max(bucket.max_concurrent_requests, bucket._active_requests)
+				try:
+					bucket._handle(self)
+				finally:
+					with bucket._stats_lock:
+						bucket._active_requests -= 1
+
+			def do_HEAD(self) -> None:  # GDAL's /vsicurl/ asks for file sizes this way
+				key = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path[len(f"/{bucket.bucket_name}/"):])
+				if key not in bucket.objects:
+					self.send_error(404)
+					return
+				self.send_response(200)
+				self.send_header("Content-Length", str(len(bucket.objects[key])))
+				self.send_header("Accept-Ranges", "bytes")
+				self.end_headers()
+
+			def log_message(self, format: str, *args: Any) -> None:  # keep test output clean
+				pass
+
+		self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+		self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+		self._thread.start()
+		return self
+
+	def stop(self) -> None:
+		if self._server is not None:
+			self._server.shutdown()
+			self._server.server_close()
+			self._server = None
+
+	def __enter__(self) -> "FakeBucketServer":
+		return self.start()
+
+	def __exit__(self, *exc_info: Any) -> None:
+		self.stop()
+
+	def _handle(self, request: http.server.BaseHTTPRequestHandler) -> None:
+		parsed = urllib.parse.urlsplit(request.path)
+		bucket_prefix = f"/{self.bucket_name}/"
+		if not parsed.path.startswith(bucket_prefix):
+			request.send_error(404)
+			return
+
+		key = urllib.parse.unquote(parsed.path[len(bucket_prefix):])
+		if key == "":
+			query = urllib.parse.parse_qs(parsed.query)
+			listing = self._listing(query.get("prefix", [""])[0], query.get("marker", [""])[0])
+			self._send(request, 200, listing.encode("utf-8"), "application/xml")
+		elif key in self.objects:
+			with self._stats_lock:
+				fail = self.failures.get(key, 0) > 0
+				if fail:
+					self.failures[key] -= 1
+			if fail:
+				request.send_error(503)
+				return
+			time.sleep(self.response_delay)
+			data = self.objects[key]
+			byte_range = request.headers.get("Range")
+			hashes = {"x-goog-hash": self.hash_header(key)}  # always for the whole object, even for a range
+			if byte_range is None:
+				self._send(request, 200, data, "application/octet-stream", hashes)
+				return
+
+			with self._stats_lock:
+				self.range_requests.append(byte_range)
+			start, _, end = byte_range.replace("bytes=", "").partition("-")
+			first, last = int(start), int(end) if end else len(data) - 1
+			self._send(request, 206, data[first:last + 1], "application/octet-stream", {"Content-Range": f"bytes {first}-{last}/{len(data)}", **hashes})
+		else:
+			request.send_error(404)
+
+	def _listing(self, prefix: str, marker: str) -> str:
+		keys = [key for key in sorted(self.objects) if key.startswith(prefix) and key > marker]
+		page, truncated = keys[:self.page_size], len(keys) > self.page_size
+
+		contents = []
+		for key in page:
+			data = self.objects[key]
+			etag = hashlib.sha1(data).hexdigest() if key in self.composite else hashlib.md5(data).hexdigest()  # only single uploads' ETags are MD5s
+			contents.append(f"<Contents><Key>{escape(key)}</Key><ETag>\"{etag}\"</ETag><Size>{len(data)}</Size></Contents>")
+
+		next_marker = f"<NextMarker>{escape(page[-1])}</NextMarker>" if truncated else ""
+		return ("<?xml version='1.0' encoding='UTF-8'?>"
+				"<ListBucketResult xmlns=\"http://doc.s3.amazonaws.com/2006-03-01\">"
+				f"<Name>{escape(self.bucket_name)}</Name><Prefix>{escape(prefix)}</Prefix><Marker>{escape(marker)}</Marker>"
+				f"<IsTruncated>{'true' if truncated else 'false'}</IsTruncated>{next_marker}{''.join(contents)}</ListBucketResult>")
+
+	@staticmethod
+	def _send(request: http.server.BaseHTTPRequestHandler, status: int, body: bytes, content_type: str, headers: Optional[Dict[str, str]] = None) -> None:
+		request.send_response(status)
+		request.send_header("Content-Type", content_type)
+		request.send_header("Content-Length", str(len(body)))
+		request.send_header("Accept-Ranges", "bytes")
+		for name, value in (headers or {}).items():
+			request.send_header(name, value)
+		request.end_headers()
+		request.wfile.write(body)
@@ -1,14 +1,25 @@
 import csv
 import os
 from pathlib import Path
-from typing import Iterable, Optional, Union
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 
 import fiona
+import numpy
+import rasterio
+import rasterio.features
+import rasterio.windows
 import rasterstats
+from rasterio.enums import MergeAlg
+from rasterstats.utils import get_percentile
 
 from eedl.core import safe_fiona_open
 
+ZONAL_ENGINES = ("rasterstats", "label")
+LABEL_ENGINE_STATS = ("count", "min", "max", "mean", "std", "sum", "range", "median")  # and any percentile_<q>
+LABEL_ENGINE_OPTIONS = ("all_touched", "band", "chunk_size")  # the kwargs the label engine accepts
+LABEL_CHUNK_SIZE = 2048  # pixels along each side of the blocks the label engine reads from the raster at a time
+
 
 def zonal_stats(features: Union[str, Path, fiona.Collection],
 				raster: Union[str, Path, None],
@@ -21,6 +32,7 @@ def zonal_stats(features: Union[str, Path, fiona.Collection],
 				use_points: bool = False,
 				inject_constants: dict = dict(),
 				nodata_value: int = -9999,
+				engine: str = "rasterstats",
 				**kwargs) -> Union[str, Path, None]:
 	# TODO: Make this check if raster and polys are in the same CRS - if they're not, then rasterstats doesn't
 	#  automatically align them and we just get bad output.
@@ -56,7 +68,15 @@ def zonal_stats(features: Union[str, Path, fiona.Collection],
 		the data later. For example, a raster may be a single variable and date, and we're extracting many rasters. So
 		for each zonal call, you could do something like inject_constants = {date: '2021-01-01', variable: 'et'}, which
 		would produce headers in the CSV for "date" and "variable" and added values in the CSV of "2021-01-01", "et".
-	:param kwargs: Passed through to rasterstats
+	:param nodata_value: Raster value to leave out of the statistics, along with NaN. Default is -9999.
+	:type nodata_value: Int
+	:param engine: How to compute the zonal statistics - "rasterstats" (the default) runs rasterstats feature by feature,
+		while "label" rasterizes all the features at once into zone labels and computes the statistics for every feature
+		together with numpy, which is much faster when there are many features. The label engine supports the
+		statistics in LABEL_ENGINE_STATS, plus any percentile_<q>, and the kwargs in LABEL_ENGINE_OPTIONS, and writes
+		the same CSV. It's ignored when use_points is True.
+	:type engine: Str
+	:param kwargs: Passed through to rasterstats, or to the label engine - which raises a ValueError for any it doesn't support
 	:return:
 	:rtype: Union[str, Path, None]
 
@@ -84,8 +104,29 @@ def zonal_stats(features: Union[str, Path, fiona.Collection],
 	else:
 		feats_open = features  # If it's a fiona instance, just use the open instance.
 		_feats_opened_in_function = False  # But mark that we didn't open it, so we don't close it later.
+	if engine not in ZONAL_ENGINES:
+		raise ValueError(f"Unknown zonal stats engine {engine}. Must be one of {ZONAL_ENGINES}")
+
 	try:
-		if not use_points:  # If we want to do zonal, open a zonal stats generator.
+		if not use_points and engine == "label":  # Rasterize all the features at once and compute their stats together.
+			unsupported = [stat for stat in stats if stat not in LABEL_ENGINE_STATS and not stat.startswith("percentile_")]
+			if unsupported:
+				raise ValueError(f"The label zonal stats engine can't compute {unsupported}. Use the rasterstats engine instead.")
+			unsupported = [option for option in kwargs if option not in LABEL_ENGINE_OPTIONS]
+			if unsupported:
+				raise ValueError(f"The label zonal stats engine doesn't support the {unsupported} options - it supports {LABEL_ENGINE_OPTIONS}. Use the rasterstats engine instead.")
+
+			zstats_results_geo = _label_zonal_stats(feats_open,
+													raster,
+													stats=stats,
+													keep_fields=keep_fields,
+													nodata_value=nodata_value,
+													**kwargs
+												)
+			fieldnames = (*stats, *keep_fields)
+			file_suffix = f"zonal_stats_nodata{nodata_value}"
+
+		elif not use_points:  # If we want to do zonal, open a zonal stats generator.
 			zstats_results_geo = rasterstats.gen_zonal_stats(feats_open,
 																raster,
 																stats=stats,
@@ -150,3 +191,266 @@ def zonal_stats(features: Union[str, Path, fiona.Collection],
 			feats_open.close()
 
 	return output_filepath
+
+
+def _label_zonal_stats(features: Iterable,
+						raster: Union[str, Path, None],
+						stats: Iterable[str],
+						keep_fields: Iterable[str],
+						nodata_value: Optional[float] = -9999,
+						all_touched: bool = False,
+						band: int = 1,
+						chunk_size: int = LABEL_CHUNK_SIZE) -> Iterator[Dict]:
+	"""
+	The "label" zonal stats engine. Instead of reading and rasterizing the raster once per feature, as rasterstats
+	does, this reads the raster in blocks and burns every feature that touches a block into one array of zone labels
+	(the feature's index + 1), then computes the statistics for all the zones in the block with numpy. Only
+	count, sum, min, max and the sum of squared deviations are kept for each feature as blocks are read, so memory stays
+	small - except for medians and percentiles, which need every value under every feature to be kept until the end.
+
+	Features that overlap (or, with all_touched, that touch the same pixel) can't share one label array, so features
+	whose pixels might collide are burned separately, in as many layers as it takes to keep their bounding boxes
+	apart. Each feature's statistics cover all its pixels, just like rasterstats.
+
+	:param features: GeoJSON-like features, such as an open fiona collection.
+	:type features: Iterable
+	:param raster: Location of the raster.
+	:type raster: Union[str, Path, None]
+	:param stats: The statistics to compute - any of LABEL_ENGINE_STATS, plus any percentile_<q>. Checked by zonal_stats.
+	:type stats: Iterable[str]
+	:param keep_fields: Fields to keep from each feature's properties.
+	:type keep_fields: Iterable[str]
+	:param nodata_value: Raster value to leave out of the statistics, along with NaN. If None, uses the raster's nodata value.
+	:type nodata_value: Optional[float]
+	:param all_touched: Include every pixel a feature touches, rather than only the pixels whose centers are in it. Default is False.
+	:type all_touched: Bool
+	:param band: The band of the raster to compute statistics on. Default is 1.
+	:type band: Int
+	:param chunk_size: The width and height, in pixels, of the blocks of the raster to read and label at a time.
+	:type chunk_size: Int
+	:return: A GeoJSON-like feature for each input feature, in the same order, with the statistics in its properties.
+	:rtype: Iterator[Dict]
+	"""
+	stats = tuple(stats)
+	percentiles = {stat: get_percentile(stat) for stat in stats if stat.startswith("percentile_")}
+	if "median" in stats:
+		percentiles["median"] = 50.0
+
+	geometries = []
+	properties = []
+	for feature in features:
+		geometries.append(feature["geometry"])
+		properties.append({field: feature["properties"][field] for field in keep_fields})
+
+	with rasterio.open(raster) as dataset:
+		if nodata_value is None:
+			nodata_value = dataset.nodata
+
+		accumulator = _ZoneAccumulator(len(geometries), keep_values=bool(percentiles))
+		windows = _pixel_windows(geometries, dataset.transform, dataset.height, dataset.width)
+
+		for row in range(0, dataset.height, chunk_size):
+			for column in range(0, dataset.width, chunk_size):
+				window = rasterio.windows.Window(column, row, min(chunk_size, dataset.width - column), min(chunk_size, dataset.height - row))
+				overlaps_rows = (windows[:, 0] < row + window.height) & (windows[:, 1] > row)
+				overlaps_columns = (windows[:, 2] < column + window.width) & (windows[:, 3] > column)
+				in_chunk = numpy.flatnonzero(overlaps_rows & overlaps_columns)
+				if len(in_chunk) == 0:
+					continue
+
+				data = dataset.read(band, window=window)
+				valid = numpy.ones(data.shape, dtype=bool)
+				if nodata_value is not None:
+					valid &= data != nodata_value
+				if numpy.issubdtype(data.dtype, numpy.floating):
+					valid &= ~numpy.isnan(data)
+
+				chunk_windows = windows[in_chunk] - (row, row, column, column)
+				transform = rasterio.windows.transform(window, dataset.transform)
+				for labels in _zone_labels(geometries, in_chunk, chunk_windows, data.shape, transform, all_touched):
+					labelled = valid & (labels > 0)
+					accumulator.add(labels[labelled] - 1, data[labelled])
+
+	results = accumulator.results(stats, percentiles)
+	for feature_properties, feature_stats in zip(properties, results):
+		yield {"properties": {**feature_properties, **feature_stats}}
+
+
+def _pixel_windows(geometries: List, transform, height: int, width: int) -> numpy.ndarray:
+	"""
+	Finds the rows and columns of the raster each geometry could burn pixels into, padded by a pixel on every side so
+	that all_touched can't reach outside it.
+
+	:return: An array with a (first row, last row + 1, first column, last column + 1) row for each geometry. Geometries outside the raster, or without a geometry, get empty windows.
+	:rtype: numpy.ndarray
+	"""
+	bounds = numpy.array([rasterio.features.bounds(geometry) if geometry else (numpy.nan,) * 4 for geometry in geometries], dtype=numpy.float64).reshape(-1, 4)
+	inverse = ~transform
+	xs = bounds[:, [0, 0, 2, 2]]
+	ys = bounds[:, [1, 3, 1, 3]]
+	columns = inverse.a * xs + inverse.b * ys + inverse.c
+	rows = inverse.d * xs + inverse.e * ys + inverse.f
+
+	with numpy.errstate(invalid="ignore"):
+		windows = numpy.stack([numpy.floor(rows.min(axis=1)) - 1, numpy.ceil(rows.max(axis=1)) + 1,
+								numpy.floor(columns.min(axis=1)) - 1, numpy.ceil(columns.max(axis=1)) + 1], axis=1)
+	windows = numpy.nan_to_num(windows, nan=0)  # geometries without a geometry end up with (0, 0, 0, 0) - empty
+	windows[:, 0:2] = windows[:, 0:2].clip(0, height)
+	windows[:, 2:4] = windows[:, 2:4].clip(0, width)
+	return windows.astype(numpy.int64)
+
+
+def _zone_labels(geometries: List,
+					indices: numpy.ndarray,
+					windows: numpy.ndarray,
+					shape: Tuple[int, int],
+					transform,
+					all_touched: bool) -> Iterator[numpy.ndarray]:
+	"""
+	Burns the geometries at indices into arrays of zone labels (the geometry's index + 1, 0 where there's no geometry)
+	for one block of the raster. When no two geometries share a pixel, that's a single array. Otherwise, the geometries
+	whose windows include a shared pixel are pulled out and burned into further arrays, in layers where no two
+	geometries' windows overlap, so every geometry gets all its pixels.
+
+	:param windows: The pixel windows of the geometries at indices, relative to this block.
+	:type windows: numpy.ndarray
+	"""
+	def burn(layer, merge_alg=MergeAlg.replace, values=None):
+		shapes = ((geometries[index], index + 1 if values is None else values) for index in layer)
+		return rasterio.features.rasterize(shapes, out_shape=shape, transform=transform, fill=0, all_touched=all_touched,
+											merge_alg=merge_alg, dtype="uint32")
+
+	labels = burn(indices)
+	shared = burn(indices, merge_alg=MergeAlg.add, values=1) > 1
+	if not shared.any():
+		yield labels
+		return
+
+	# Geometries whose window has a shared pixel in it could have lost pixels to another geometry in the labels
+	# above. Find them with a summed-area table, so each window only takes four lookups.
+	summed = numpy.zeros((shape[0] + 1, shape[1] + 1), dtype=numpy.int64)
+	summed[1:, 1:] = shared.cumsum(axis=0).cumsum(axis=1)
+	top, bottom = windows[:, 0].clip(0, shape[0]), windows[:, 1].clip(0, shape[0])
+	left, right = windows[:, 2].clip(0, shape[1]), windows[:, 3].clip(0, shape[1])
+	colliding = (summed[bottom, right] - summed[top, right] - summed[bottom, left] + summed[top, left]) > 0
+
+	is_colliding = numpy.zeros(len(geometries) + 1, dtype=bool)
+	is_colliding[indices[colliding] + 1] = True
+	labels[is_colliding[labels]] = 0  # anything left is a pixel that belongs to only this geometry
+	yield labels
+
+	layers: List[List[int]] = []
+	occupied: List[numpy.ndarray] = []
+	for index, (top, bottom, left, right) in zip(indices[colliding], windows[colliding].clip(0, None)):
+		for layer, taken in zip(layers, occupied):
+			if not taken[top:bottom, left:right].any():
+				break
+		else:
+			layer = []
+			taken = numpy.zeros(shape, dtype=bool)
+			layers.append(layer)
+			occupied.append(taken)
+		layer.append(index)
+		taken[top:bottom, left:right] = True
+
+	for layer in layers:
+		yield burn(layer)
+
+
+class _ZoneAccumulator:
+	"""
+	Keeps running statistics for every zone as blocks of pixel values come in, and computes the final statistics.
+	Standard deviations come from the sum of squared deviations from the mean, merged block by block (Chan et al.'s
+	parallel algorithm), which stays accurate where a plain sum of squares would not.
+	"""
+
+	def __init__(self, zones: int, keep_values: bool = False) -> None:
+		self.count = numpy.zeros(zones, dtype=numpy.int64)
+		self.sum = numpy.zeros(zones, dtype=numpy.float64)
+		self.mean = numpy.zeros(zones, dtype=numpy.float64)
+		self.squared_deviations = numpy.zeros(zones, dtype=numpy.float64)
+		self.min = numpy.full(zones, numpy.inf)
+		self.max = numpy.full(zones, -numpy.inf)
+		self.keep_values = keep_values
+		self._zones: List[numpy.ndarray] = []
+		self._values: List[numpy.ndarray] = []
+
+	def add(self, zones: numpy.ndarray, values: numpy.ndarray) -> None:
+		if len(zones) == 0:
+			return
+
+		order = numpy.argsort(zones, kind="stable")
+		zones = zones[order]
+		values = values[order].astype(numpy.float64)
+		starts = numpy.flatnonzero(numpy.concatenate(([True], zones[1:] != zones[:-1])))
+		zone = zones[starts]
+		count = numpy.diff(numpy.append(starts, len(zones)))
+
+		total = numpy.add.reduceat(values, starts)
+		mean = total / count
+		squared_deviations = numpy.add.reduceat((values - numpy.repeat(mean, count)) ** 2, starts)
+
+		previous_count = self.count[zone]
+		new_count = previous_count + count
+		delta = mean - self.mean[zone]
+		self.squared_deviations[zone] += squared_deviations + delta ** 2 * previous_count * count / new_count
+		self.mean[zone] += delta * count / new_count
+		self.count[zone] = new_count
+		self.sum[zone] += total
+		self.min[zone] = numpy.minimum(self.min[zone], numpy.minimum.reduceat(values, starts))
+		self.max[zone] = numpy.maximum(self.max[zone], numpy.maximum.reduceat(values, starts))
+
+		if self.keep_values:
+			self._zones.append(zones)
+			self._values.append(values)
+
+	def results(self, stats: Tuple[str, ...], percentiles: Dict[str, float]) -> Iterator[Dict]:
+		"""
+		Yields a dict of stats for each zone, matching rasterstats - None when a zone has no valid pixels, except count, which is 0.
+		"""
+		has_values = self.count > 0
+		with numpy.errstate(invalid="ignore", divide="ignore"):
+			columns = {
+				"count": self.count,
+				"min": self.min,
+				"max": self.max,
+				"mean": self.sum / self.count,
+				"std": numpy.sqrt(self.squared_deviations / self.count),
+				"sum": self.sum,
+				"range": self.max - self.min,
+			}
+		columns.update(self._percentiles(percentiles))
+		values = {stat: columns[stat].tolist() for stat in stats}
+
+		for zone, zone_has_values in enumerate(has_values.tolist()):
+			if zone_has_values:
+				yield {stat: values[stat][zone] for stat in stats}
+			else:
+				yield {stat: 0 if stat == "count" else None for stat in stats}
+
+	def _percentiles(self, percentiles: Dict[str, float]) -> Dict[str, numpy.ndarray]:
+		"""
+		Sorts every kept value by zone, then by value, and interpolates between the two values nearest each percentile,
+		the same way numpy.percentile does.
+		"""
+		if not percentiles:
+			return {}
+
+		zones = numpy.concatenate(self._zones) if self._zones else numpy.zeros(0, dtype=numpy.int64)
+		values = numpy.concatenate(self._values) if self._values else numpy.zeros(0)
+		values = values[numpy.lexsort((values, zones))]
+		starts = numpy.concatenate(([0], numpy.cumsum(self.count)[:-1]))
+		last = numpy.maximum(self.count - 1, 0)
+
+		results = {}
+		for stat, q in percentiles.items():
+			position = last * (q / 100)
+			lower = numpy.floor(position).astype(numpy.int64)
+			upper = numpy.ceil(position).astype(numpy.int64)
+			if len(values):
+				low = values[numpy.minimum(starts + lower, len(values) - 1)]
+				high = values[numpy.minimum(starts + upper, len(values) - 1)]
+				results[stat] = low + (high - low) * (position - lower)
+			else:
+				results[stat] = numpy.zeros(len(self.count))
+		return results
@@ -0,0 +1,39 @@
+import asyncio
+import threading
+
+import pytest  # noqa
+
+from eedl.async_registry import AsyncTaskRegistry
+from eedl.image import EEDLImage, TaskRegistry
+from eedl.scheduler import PollScheduler
+from eedl.testing import FakeTaskBackend, add_fake_image
+
+
+class LocalImage(EEDLImage):
+	def download_results(self, download_location, callback=None, drive_wait=15):
+		self.output_folder = str(download_location)
+		self.task_data_downloaded = True
+
+	def record(self):
+		self.callback_thread = threading.current_thread().name
+
+
+def test_one_loop_drives_several_registries():
+	backend = FakeTaskBackend()
+	registries = [AsyncTaskRegistry(TaskRegistry(status_backend=backend)) for _ in range(3)]
+	images = [add_fake_image(registry.registry, backend, f"aoi_{r}_image_{i}", image_class=LocalImage) for r, registry in enumerate(registries) for i in range(4)]
+
+	async def main():
+		loop = asyncio.get_running_loop()
+		for i, image in enumerate(images):  # finish the exports at staggered times while the registries wait
+			loop.call_later(0.01 * i, backend.set_state, image.task.id, "COMPLETED")
+
+		await asyncio.wait_for(asyncio.gather(*(
+			registry.wait_for_images("downloads", callback="record", scheduler=PollScheduler(interval=0.01)) for registry in registries
+		)), timeout=10)
+
+	asyncio.run(main())
+
+	assert all(image.task_data_downloaded for image in images)
+	assert all(image.callback_thread.startswith("eedl_callback") for image in images)
+	assert not any(registry.registry.has_pending_work for registry in registries)
@@ -0,0 +1,74 @@
+import csv
+import json
+import os
+
+import numpy as np
+import pytest
+
+from eedl import google_cloud, mosaic_rasters
+from eedl.image import EEDLImage, TaskRegistry
+from eedl.testing import FakeBucketServer, FakeTaskBackend
+
+rasterio = pytest.importorskip("rasterio")
+Affine = pytest.importorskip("affine").Affine
+
+
+def _tile(column_offset):
+	with rasterio.MemoryFile() as memory_file:
+		with memory_file.open(driver="GTiff", width=512, height=512, count=1, dtype="float32", crs="EPSG:32610",
+								transform=Affine(30, 0, 500000 + column_offset * 30, 0, -30, 4000000),
+								tiled=True, blockxsize=256, blockysize=256) as dataset:
+			dataset.write(np.full((1, 512, 512), column_offset + 1, dtype="float32"))
+		return memory_file.read()
+
+
+@pytest.fixture
+def direct_read_image(monkeypatch):
+	with FakeBucketServer() as bucket:
+		bucket.add_object("exports/_image_1-0000000000-0000000000.tif", _tile(0))
+		bucket.add_object("exports/_image_1-0000000000-0000000512.tif", _tile(512))
+		monkeypatch.setattr(google_cloud, "PUBLIC_BASE_URL", bucket.base_url)
+		downloader = google_cloud.PublicExportDownloader()
+		monkeypatch.setattr(google_cloud, "_default_downloader", downloader)  # put back whatever was there before afterward
+
+		image = EEDLImage(task_registry=TaskRegistry(status_backend=FakeTaskBackend()), cloud_bucket=bucket.bucket_name,
+							export_folder="exports", cloud_direct_read=True)
+		image._set_names("image_1")
+		image.export_type = "Cloud"
+		try:
+			yield image, bucket
+		finally:
+			downloader.close()
+
+
+def test_direct_read_downloads_nothing(direct_read_image, tmp_path):
+	image, bucket = direct_read_image
+
+	image.download_results(tmp_path)
+
+	assert image.task_data_downloaded
+	assert len(image.tile_urls) == 2 and all(url.startswith("/vsicurl/http://") for url in image.tile_urls)
+	assert [request for request in bucket.requests if "prefix=" not in request] == []
+	assert list((tmp_path / "exports").iterdir()) == []
+
+
+def test_zonal_stats_read_only_the_blocks_they_need(direct_read_image, tmp_path):
+	gdal = pytest.importorskip("osgeo.gdal")
+	image, bucket = direct_read_image
+	polygons = tmp_path / "polygons.geojson"
+	polygons.write_text(json.dumps({"type": "FeatureCollection", "crs": {"type": "name", "properties": {"name": "EPSG:32610"}}, "features": [
+		{"type": "Feature", "properties": {"id": 1}, "geometry": {"type": "Polygon", "coordinates": [[[500100, 3999900], [500400, 3999900], [500400, 3999600], [500100, 3999600], [500100, 3999900]]]}},
+	]}))
+
+	image.download_results(tmp_path)
+	image.mosaic()
+	image.zonal_stats(polygons, keep_fields=("id",), stats=("mean",))
+
+	assert image.mosaic_image.endswith(".vrt")
+	with open(image.zonal_output_filepath) as output:
+		assert [row["mean"] for row in csv.DictReader(output)] == ["1.00000"]
+	object_requests = [request for request in bucket.requests if "prefix=" not in request]
+	assert len(object_requests) == len(bucket.range_requests)  # every read was a range request, never the whole tile
+	assert list((tmp_path / "exports").glob("*.tif")) == []
+	# the remote read settings only applied while the tiles were being read
+	assert not [key for key in mosaic_rasters.REMOTE_READ_OPTIONS if key in os.environ or gdal.GetConfigOption(key) is not None]
@@ -0,0 +1,184 @@
+import os
+import time
+
+import ee
+import pytest  # noqa
+
+from eedl import drive, mosaic_rasters
+from eedl.image import EEDLImage, TaskRegistry
+from eedl.testing import FakeTaskBackend
+
+
+class FakeClock:
+	"""Moves time forward only when the watcher sleeps, running any file changes scheduled for that time"""
+
+	def __init__(self):
+		self.now = 0.0
+		self.events = []
+
+	def at(self, when, action):
+		self.events.append((when, action))
+
+	def __call__(self):
+		return self.now
+
+	def sleep(self, seconds):
+		self.now += seconds
+		for when, action in [event for event in self.events if event[0] <= self.now]:
+			action()
+			self.events.remove((when, action))
+
+
+def _tile(row, column):
+	return f"image_1-{row:010d}-{column:010d}.tif"
+
+
+def _watcher(folder, clock):
+	return drive.DriveSyncWatcher(folder, poll_interval=1, settle_time=3, clock=clock, sleep=clock.sleep)
+
+
+def test_expected_tile_count():
+	assert drive.expected_tile_count(1000, 1000, 1000) == 1
+	assert drive.expected_tile_count(1001, 1000, 1000) == 2
+	assert drive.expected_tile_count(25600, 30000, 12800) == 6
+	assert drive.expected_tile_count(300, 300, (256, 512)) == 2
+
+
+def test_tile_grid_complete():
+	assert drive.tile_grid_complete(["image_1.tif"])
+	assert drive.tile_grid_complete([_tile(0, 0), _tile(0, 256), _tile(256, 0), _tile(256, 256)])
+	assert not drive.tile_grid_complete([_tile(0, 0), _tile(0, 256), _tile(256, 256)])
+	assert not drive.tile_grid_complete([])
+
+
+def test_waits_for_all_tiles_to_stop_changing(tmp_path):
+	clock = FakeClock()
+	(tmp_path / _tile(0, 0)).write_bytes(b"a" * 100)
+	(tmp_path / _tile(0, 256)).write_bytes(b"b" * 10)  # still syncing
+	(tmp_path / "image_10.tif").write_bytes(b"a different image")
+	clock.at(2, lambda: (tmp_path / _tile(0, 256)).write_bytes(b"b" * 100))
+	clock.at(5, lambda: (tmp_path / _tile(256, 0)).write_bytes(b"c" * 100))
+	clock.at(5, lambda: (tmp_path / _tile(256, 256)).write_bytes(b"d" * 100))
+
+	tiles = _watcher(tmp_path, clock).wait_for_export("image_1", expected_tiles=4)
+
+	assert [path.split("/")[-1] for path in tiles] == [_tile(0, 0), _tile(0, 256), _tile(256, 0), _tile(256, 256)]
+	assert clock.now == 8  # the last tile showed up at 5 and hadn't changed for settle_time
+
+
+def test_holes_in_the_grid_keep_waiting_without_expected_count(tmp_path):
+	clock = FakeClock()
+	for row, column in ((0, 0), (0, 256), (256, 256)):
+		(tmp_path / _tile(row, column)).write_bytes(b"x")
+	clock.at(10, lambda: (tmp_path / _tile(256, 0)).write_bytes(b"x"))
+
+	tiles = _watcher(tmp_path, clock).wait_for_export("image_1")
+
+	assert len(tiles) == 4
+	assert clock.now == 13
+
+
+def test_missing_tiles_raise_instead_of_being_dropped(tmp_path):
+	clock = FakeClock()
+	(tmp_path / _tile(0, 0)).write_bytes(b"x")
+
+	with pytest.raises(drive.DriveSyncTimeout):
+		_watcher(tmp_path, clock).wait_for_export("image_1", expected_tiles=2, timeout=30)
+
+	assert clock.now == 30
+
+
+def test_images_share_folder_scans(tmp_path):
+	clock = FakeClock()
+	watcher = _watcher(tmp_path, clock)
+	for i in range(50):
+		(tmp_path / f"image_{i}.tif").write_bytes(b"x")
+	for i in range(50):
+		assert not watcher.is_complete(f"image_{i}")  # just seen, so not settled yet
+	clock.now = 10
+
+	for i in range(50):
+		assert watcher.is_complete(f"image_{i}")
+
+	assert watcher.scans == 2
+
+
+def test_folder_index_finds_prefixes():
+	index = drive.DriveFolderIndex(["image_2.tif", "image_10-0000000000-0000000000.tif", "image_1-0000000000-0000000000.tif",
+									"image_1-0000000000-0000000256.tif", "other.tif"])
+
+	assert index.with_prefix("image_1") == ["image_1-0000000000-0000000000.tif", "image_1-0000000000-0000000256.tif", "image_10-0000000000-0000000000.tif"]
+	assert index.export_files("image_1") == ["image_1-0000000000-0000000000.tif", "image_1-0000000000-0000000256.tif"]
+	assert index.export_files("image_3") == []
+	assert "other.tif" in index and "image_3.tif" not in index
+
+
+@pytest.mark.parametrize("mode", ["move", "link", "copy"])
+def test_relocate_files(tmp_path, mode):
+	source = tmp_path / "drive"
+	source.mkdir()
+	paths = [source / _tile(0, column) for column in (0, 256)]
+	for path in paths:
+		path.write_bytes(b"tile")
+	inodes = [os.stat(path).st_ino for path in paths]
+
+	targets = drive.relocate_files(paths, tmp_path / "output", mode=mode)
+
+	assert [open(target, 'rb').read() for target in targets] == [b"tile", b"tile"]
+	assert all(path.exists() for path in paths) == (mode != "move")
+	# same filesystem, so moves and links don't copy any data
+	assert ([os.stat(target).st_ino for target in targets] == inodes) == (mode != "copy")
+
+
+def test_drive_download_can_leave_tiles_in_place(tmp_path):
+	drive_folder = tmp_path / "drive" / "exports"
+	drive_folder.mkdir(parents=True)
+	(drive_folder / "image_1.tif").write_bytes(b"tile")
+	os.utime(drive_folder / "image_1.tif", (time.time() - 60, time.time() - 60))  # synced a while ago
+
+	image = EEDLImage(drive_root_folder=tmp_path / "drive", export_folder="exports", drive_relocation="none")
+	image.filename = "image_1"
+	image.download_results(tmp_path / "output")
+
+	assert image.tile_folder == str(drive_folder)
+	assert (drive_folder / "image_1.tif").exists()
+	assert os.path.isdir(tmp_path / "output" / "exports")
+	assert image.task_data_downloaded
+
+
+@pytest.mark.parametrize("export_kwargs, expected", [({}, 4), ({"fileDimensions": [256, 512]}, 8), ({"fileDimensions": 1024}, 1)])
+def test_expected_tile_count_uses_the_exports_file_dimensions(tmp_path, monkeypatch, export_kwargs, expected):
+	monkeypatch.setattr(EEDLImage, "_initialize", staticmethod(lambda: None))
+	monkeypatch.setattr(ee.batch.Export.image, "toDrive", lambda image, **kwargs: kwargs)
+	registry = TaskRegistry(status_backend=FakeTaskBackend())
+	monkeypatch.setattr(registry, "submit", lambda image, priority=0, parameters=None: None)
+
+	image = EEDLImage(task_registry=registry, drive_root_folder=tmp_path, export_folder="exports", tile_size=512)
+	ee_image = ee.Image.__new__(ee.Image)  # skips the constructor, which needs Earth Engine to be initialized
+	image.export(ee_image, "image_1", dimensions="1024x1024", **export_kwargs)
+
+	assert image.task["fileDimensions"] == export_kwargs.get("fileDimensions", 512)
+	assert image._expected_tile_count() == expected
+
+
+def test_expected_tile_count_is_not_guessed_without_the_exports_dimensions(tmp_path, monkeypatch):
+	monkeypatch.setattr(EEDLImage, "_initialize", staticmethod(lambda: None))
+	monkeypatch.setattr(ee.batch.Export.image, "toDrive", lambda image, **kwargs: kwargs)
+	registry = TaskRegistry(status_backend=FakeTaskBackend())
+	monkeypatch.setattr(registry, "submit", lambda image, priority=0, parameters=None: None)
+
+	image = EEDLImage(task_registry=registry, drive_root_folder=tmp_path, export_folder="exports", tile_size=512, crs="EPSG:32610")
+	ee_image = ee.Image.__new__(ee.Image)
+	image.export(ee_image, "image_1", scale=30)  # sized by its region, so the tile count is only known once the tiles land
+
+	assert image._expected_tile_count() is None
+
+
+def test_mosaic_folder_only_uses_the_exports_own_tiles(tmp_path):
+	(tmp_path / "image_1.tif").write_bytes(b"the only tile")
+	(tmp_path / "image_10.tif").write_bytes(b"a different image")
+	(tmp_path / "image_1_notes.tif").write_bytes(b"not a tile")
+
+	mosaic_rasters.mosaic_folder(tmp_path, tmp_path / "mosaic.tif", prefix="image_1", keep_tiles=True)  # one tile, so it's just copied
+
+	assert (tmp_path / "mosaic.tif").read_bytes() == b"the only tile"
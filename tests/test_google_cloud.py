@@ -0,0 +1,266 @@
+import os
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import pytest  # noqa
+import requests
+
+from eedl import drive, google_cloud, mosaic_rasters
+from eedl.testing import FakeBucketServer
+
+
+@pytest.fixture
+def bucket():
+	with FakeBucketServer() as server:
+		yield server
+
+
+def test_download_public_export_gets_prefixed_tiles(bucket, tmp_path):
+	bucket.add_object("exports/image_1-0000000000-0000000000.tif", b"tile one")
+	bucket.add_object("exports/image_1-0000000000-0000000256.tif", b"tile two")
+	bucket.add_object("exports/image_2-0000000000-0000000000.tif", b"another image")
+
+	google_cloud.download_public_export(bucket.bucket_name, tmp_path, "exports/image_1", base_url=bucket.base_url)
+
+	assert sorted(name for name in os.listdir(tmp_path) if not name.startswith(".")) == ["image_1-0000000000-0000000000.tif", "image_1-0000000000-0000000256.tif"]
+	assert (tmp_path / "image_1-0000000000-0000000256.tif").read_bytes() == b"tile two"
+
+
+def test_downloads_are_streamed(bucket, tmp_path):
+	tile = os.urandom(32 * 1024 * 1024)
+	bucket.add_object("exports/big.tif", tile)
+
+	tracemalloc.start()
+	google_cloud.download_public_export(bucket.bucket_name, tmp_path, "exports/big", base_url=bucket.base_url, buffer_size=256 * 1024)
+	_, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+
+	assert peak < len(tile) / 8  # nowhere near the whole tile in memory at once
+	assert (tmp_path / "big.tif").read_bytes() == tile
+	assert not (tmp_path / "big.tif.part").exists()
+
+
+def test_downloader_reuses_connections_and_runs_in_parallel(tmp_path):
+	with FakeBucketServer(response_delay=0.05) as bucket:
+		for i in range(20):
+			bucket.add_object(f"exports/image_1-0000000000-{i:010d}.tif", b"tile")
+		downloader = google_cloud.PublicExportDownloader(max_workers=4)
+
+		paths = downloader.download_export(bucket.bucket_name, tmp_path, "exports/image_1", base_url=bucket.base_url)
+		downloader.close()
+
+	assert len(paths) == 20 and all(path.read_bytes() == b"tile" for path in paths)
+	assert bucket.max_concurrent_requests > 1
+	assert bucket.connections <= 4  # connections are pooled rather than opened per tile
+
+
+def test_downloader_retries_transient_errors(bucket, tmp_path):
+	bucket.add_object("exports/image_1.tif", b"tile")
+	downloader = google_cloud.PublicExportDownloader(retries=2, backoff_factor=0.01)
+
+	bucket.failures["exports/image_1.tif"] = 2
+	downloader.download_export(bucket.bucket_name, tmp_path, "exports/image_1", base_url=bucket.base_url)
+	assert (tmp_path / "image_1.tif").read_bytes() == b"tile"
+
+	bucket.failures["exports/image_1.tif"] = 3  # more failures than retries
+	with pytest.raises(requests.HTTPError):
+		downloader.download_export(bucket.bucket_name, tmp_path / "again", "exports/image_1", base_url=bucket.base_url)
+	downloader.close()
+
+
+def test_listing_follows_pages(tmp_path):
+	with FakeBucketServer(page_size=3) as bucket:
+		for i in range(10):
+			bucket.add_object(f"exports/image_1-0000000000-{i:010d}.tif", b"tile")
+		downloader = google_cloud.PublicExportDownloader()
+
+		objects = downloader.list_objects(bucket.bucket_name, "exports/", base_url=bucket.base_url)
+		listing_requests = [request for request in bucket.requests if "prefix=" in request]
+		downloader.close()
+
+	assert len(objects) == 10
+	assert len(listing_requests) == 4
+	assert objects[0].size == 4 and len(objects[0].md5) == 32
+
+
+def test_listing_is_cached_per_folder(bucket, tmp_path):
+	for name in ("image_1", "image_10", "image_2"):
+		bucket.add_object(f"exports/{name}-0000000000-0000000000.tif", name.encode())
+	downloader = google_cloud.PublicExportDownloader()
+
+	image_1_urls = downloader.list_urls(bucket.bucket_name, "exports/image_1", base_url=bucket.base_url)
+	downloader.list_urls(bucket.bucket_name, "exports/image_2", base_url=bucket.base_url)
+	assert len([request for request in bucket.requests if "prefix=" in request]) == 1
+	assert image_1_urls == [f"{bucket.base_url}{bucket.bucket_name}/exports/image_1-0000000000-0000000000.tif"]  # not image_10's tiles
+
+	# an image that finished after the folder was listed triggers one new listing
+	bucket.add_object("exports/image_3.tif", b"image_3")
+	assert len(downloader.list_urls(bucket.bucket_name, "exports/image_3", base_url=bucket.base_url)) == 1
+	assert len(downloader.list_urls(bucket.bucket_name, "exports/image_4", base_url=bucket.base_url)) == 0
+	assert len([request for request in bucket.requests if "prefix=" in request]) == 3
+	downloader.close()
+
+
+def test_cached_listing_never_matches_another_export_by_prefix(bucket):
+	bucket.add_object("exports/image_10-0000000000-0000000000.tif", b"image_10")
+	downloader = google_cloud.PublicExportDownloader()
+	assert len(downloader.list_urls(bucket.bucket_name, "exports/image_10", base_url=bucket.base_url)) == 1
+
+	# image_1 isn't in the cached listing - it shouldn't get image_10's tiles, and the folder should be listed again
+	assert downloader.list_urls(bucket.bucket_name, "exports/image_1", base_url=bucket.base_url) == []
+	bucket.add_object("exports/image_1-0000000000-0000000000.tif", b"image_1")
+	urls = downloader.list_urls(bucket.bucket_name, "exports/image_1", base_url=bucket.base_url)
+	assert urls == [f"{bucket.base_url}{bucket.bucket_name}/exports/image_1-0000000000-0000000000.tif"]
+	assert len(downloader.list_urls(bucket.bucket_name, "exports/", base_url=bucket.base_url)) == 2  # a folder gets everything in it
+	downloader.close()
+
+
+def test_partial_prefixes_match_by_name_from_the_cached_listing(bucket):
+	for name in ("image_1", "image_10", "image_2", "other"):
+		bucket.add_object(f"exports/{name}-0000000000-0000000000.tif", name.encode())
+	downloader = google_cloud.PublicExportDownloader()
+
+	urls = downloader.list_urls(bucket.bucket_name, "exports/image_", base_url=bucket.base_url, exact=False)
+	assert sorted(url.split("/")[-1] for url in urls) == [f"{name}-0000000000-0000000000.tif" for name in ("image_1", "image_10", "image_2")]
+	assert len(downloader.list_urls(bucket.bucket_name, "exports/image_1", base_url=bucket.base_url, exact=False)) == 2
+	assert len([request for request in bucket.requests if "prefix=" in request]) == 1  # both came from the one listing
+	downloader.close()
+
+
+def test_listings_from_before_an_export_finished_are_not_used(bucket):
+	bucket.add_object("exports/image_1-0000000000-0000000000.tif", b"first tile")
+	downloader = google_cloud.PublicExportDownloader()
+	assert len(downloader.list_urls(bucket.bucket_name, "exports/image_1", base_url=bucket.base_url)) == 1
+
+	bucket.add_object("exports/image_1-0000000000-0000000256.tif", b"second tile")  # still writing when it was listed
+	urls = downloader.list_urls(bucket.bucket_name, "exports/image_1", base_url=bucket.base_url, listed_after=time.time())
+	assert len(urls) == 2
+	downloader.close()
+
+
+def test_matching_tiles_are_skipped_and_partial_tiles_resumed(bucket, tmp_path):
+	tiles = {f"exports/image_1-0000000000-{i:010d}.tif": os.urandom(10_000) for i in range(3)}
+	for name, data in tiles.items():
+		bucket.add_object(name, data)
+	names = [name.split("/")[-1] for name in tiles]
+	data = list(tiles.values())
+
+	(tmp_path / names[0]).write_bytes(data[0])  # finished last time
+	(tmp_path / names[1]).write_bytes(bytes(10_000))  # right size, wrong contents
+	(tmp_path / f"{names[2]}.part").write_bytes(data[2][:4_000])  # interrupted
+
+	downloader = google_cloud.PublicExportDownloader()
+	downloader.download_export(bucket.bucket_name, tmp_path, "exports/image_1", base_url=bucket.base_url)
+	downloader.close()
+
+	assert [(tmp_path / name).read_bytes() for name in names] == data
+	object_requests = [request for request in bucket.requests if "prefix=" not in request]
+	assert sorted(request.split("/")[-1] for request in object_requests) == names[1:]
+	assert bucket.range_requests == ["bytes=4000-"]
+	assert not (tmp_path / f"{names[2]}.part").exists()
+
+
+def test_corrupt_downloads_are_rejected(bucket, tmp_path):
+	bucket.add_object("exports/image_1.tif", b"tile data")
+	(tmp_path / "image_1.tif.part").write_bytes(b"XXXX")  # resuming from this can't produce the right hash
+
+	downloader = google_cloud.PublicExportDownloader(retries=1, backoff_factor=0)
+	downloader.download_export(bucket.bucket_name, tmp_path, "exports/image_1", base_url=bucket.base_url)
+	downloader.close()
+
+	assert (tmp_path / "image_1.tif").read_bytes() == b"tile data"  # the retry started over
+
+
+def test_objects_without_an_md5_are_checked_by_crc32c(bucket, tmp_path):
+	tiles = {f"exports/image_1-0000000000-{i:010d}.tif": os.urandom(10_000) for i in range(3)}
+	for name, data in tiles.items():
+		bucket.add_object(name, data, composite=True)
+	names = [name.split("/")[-1] for name in tiles]
+	data = list(tiles.values())
+
+	(tmp_path / names[0]).write_bytes(bytes(10_000))  # right size, but nothing to check it against until it's downloaded
+	(tmp_path / f"{names[1]}.part").write_bytes(data[1][:4_000])  # interrupted
+	(tmp_path / f"{names[2]}.part").write_bytes(b"X" * 4_000)  # resuming from this can't produce the right hash
+
+	downloader = google_cloud.PublicExportDownloader(retries=1, backoff_factor=0)
+	objects = downloader.list_objects(bucket.bucket_name, "exports/image_1", base_url=bucket.base_url)
+	assert all(item.md5 is None for item in objects)
+	downloader.download_export(bucket.bucket_name, tmp_path, "exports/image_1", base_url=bucket.base_url)
+	downloader.close()
+
+	assert [(tmp_path / name).read_bytes() for name in names] == data
+	assert bucket.range_requests == ["bytes=4000-", "bytes=4000-"]  # the corrupt resume was retried from the start
+
+
+def test_moving_downloaded_tiles_leaves_no_verification_records_behind(bucket, tmp_path):
+	bucket.add_object("exports/image_1-0000000000-0000000000.tif", b"tile one")
+	bucket.add_object("exports/image_1-0000000000-0000000256.tif", b"tile two")
+	bucket.add_object("exports/image_2.tif", b"the only tile")
+	downloads = tmp_path / "downloads"
+	google_cloud.download_public_export(bucket.bucket_name, downloads, "exports/image_1", base_url=bucket.base_url)
+	google_cloud.download_public_export(bucket.bucket_name, downloads, "exports/image_2", base_url=bucket.base_url)
+	assert len(list(downloads.glob(f".*{google_cloud.VERIFIED_SUFFIX}"))) == 3
+
+	drive.relocate_files(sorted(downloads.glob("image_1-*.tif")), tmp_path / "tiles")
+	mosaic_rasters.mosaic_folder(downloads, tmp_path / "image_2.tif", prefix="image_2")  # one tile, so it's moved
+
+	assert list(downloads.iterdir()) == []
+	assert sorted(path.name for path in (tmp_path / "tiles").iterdir()) == ["image_1-0000000000-0000000000.tif", "image_1-0000000000-0000000256.tif"]
+
+
+def test_corrupt_composite_objects_are_rejected(bucket, tmp_path):
+	bucket.add_object("exports/image_1.tif", b"tile data", composite=True)
+	(tmp_path / "image_1.tif.part").write_bytes(b"XXXX")
+
+	with pytest.raises(google_cloud.DownloadIntegrityError):
+		google_cloud.download_file(f"{bucket.base_url}/{bucket.bucket_name}/exports/image_1.tif", tmp_path / "image_1.tif", expected_size=9)
+	assert not (tmp_path / "image_1.tif").exists() and not (tmp_path / "image_1.tif.part").exists()
+
+
+def test_verified_tiles_are_not_hashed_again(bucket, tmp_path, monkeypatch):
+	for column in range(2):
+		bucket.add_object(f"exports/image_1-0000000000-{column:010d}.tif", os.urandom(1_000), composite=column == 1)
+	google_cloud.download_public_export(bucket.bucket_name, tmp_path, "exports/image_1", base_url=bucket.base_url)
+	requests_made = len(bucket.requests)
+
+	def _no_hashing(*args, **kwargs):
+		raise AssertionError("an already verified file was hashed again")
+
+	monkeypatch.setattr(google_cloud, "_file_hash", _no_hashing)
+	google_cloud.download_public_export(bucket.bucket_name, tmp_path, "exports/image_1", base_url=bucket.base_url)
+	assert not [request for request in bucket.requests[requests_made:] if "prefix=" not in request]
+
+	# once a file changes, its verification no longer counts
+	tile = tmp_path / "image_1-0000000000-0000000001.tif"
+	tile.write_bytes(bytes(1_000))
+	os.utime(tile, ns=(0, 0))
+	monkeypatch.undo()
+	google_cloud.download_public_export(bucket.bucket_name, tmp_path, "exports/image_1", base_url=bucket.base_url)
+	assert tile.read_bytes() == bucket.objects["exports/image_1-0000000000-0000000001.tif"]
+
+
+def test_each_file_is_handed_on_as_soon_as_it_lands(bucket, tmp_path):
+	for column in range(6):
+		bucket.add_object(f"exports/image_1-0000000000-{column:010d}.tif", b"tile %d" % column)
+	landed = []
+
+	def _on_file(path):
+		assert os.path.exists(path)  # already in place, not a partial download
+		landed.append(os.path.basename(path))
+
+	google_cloud.download_public_export(bucket.bucket_name, tmp_path, "exports/image_1", base_url=bucket.base_url, on_file=_on_file)
+
+	assert sorted(landed) == sorted(name for name in os.listdir(tmp_path) if not name.startswith("."))
+	assert len(landed) == 6
+
+
+def test_private_exports_are_matched_exactly():
+	class _Client:
+		def list_blobs(self, bucket_name, prefix, delimiter):
+			names = ["exports/image_1-0000000000-0000000000.tif", "exports/image_1.tif", "exports/image_10-0000000000-0000000000.tif", "exports/image_10.tif"]
+			return [SimpleNamespace(name=name) for name in names if name.startswith(prefix)]
+
+	assert [blob.name for blob in google_cloud._export_blobs(_Client(), "bucket", "exports/image_1", "/")] == ["exports/image_1-0000000000-0000000000.tif", "exports/image_1.tif"]
+	assert google_cloud._export_blobs(_Client(), "bucket", "exports/image_", "/") == []  # never falls back to matching by prefix
+	assert len(google_cloud._export_blobs(_Client(), "bucket", "exports/", "/")) == 4
@@ -0,0 +1,88 @@
+import random
+import threading
+
+import numpy as np
+import pytest
+
+gdal = pytest.importorskip("osgeo.gdal")
+osr = pytest.importorskip("osgeo.osr")
+
+from eedl.image import EEDLImage, TaskRegistry  # noqa: E402
+from eedl.mosaic_rasters import IncrementalMosaic  # noqa: E402
+from eedl.testing import FakeTaskBackend  # noqa: E402
+
+TILE_SIZE = 256
+WIDTH = 600  # so the last column and row of tiles are partial
+HEIGHT = 520
+
+
+def _write_tiles(folder):
+	spatial_reference = osr.SpatialReference()
+	spatial_reference.ImportFromEPSG(32610)
+	expected = np.arange(WIDTH * HEIGHT, dtype="float32").reshape(HEIGHT, WIDTH)
+	paths = []
+	for row in range(0, HEIGHT, TILE_SIZE):
+		for column in range(0, WIDTH, TILE_SIZE):
+			data = expected[row:row + TILE_SIZE, column:column + TILE_SIZE]
+			path = str(folder / f"image_1-{row:010d}-{column:010d}.tif")
+			dataset = gdal.GetDriverByName("GTiff").Create(path, data.shape[1], data.shape[0], 1, gdal.GDT_Float32)
+			dataset.SetGeoTransform((500000 + column * 30, 30, 0, 4000000 - row * 30, 0, -30))
+			dataset.SetProjection(spatial_reference.ExportToWkt())
+			dataset.GetRasterBand(1).WriteArray(data)
+			dataset = None
+			paths.append(path)
+	return paths, expected
+
+
+def test_tiles_added_in_any_order_from_many_threads(tmp_path):
+	paths, expected = _write_tiles(tmp_path)
+	random.Random(0).shuffle(paths)
+	mosaic = IncrementalMosaic(tmp_path / "mosaic.tif", WIDTH, HEIGHT, block_size=128)
+
+	threads = [threading.Thread(target=mosaic.add_tile, args=(path,)) for path in paths]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+	mosaic.finish(overview_levels=[2, 4])
+
+	result = gdal.Open(str(tmp_path / "mosaic.tif"))
+	assert mosaic.tiles_added == len(paths)
+	assert result.GetGeoTransform() == (500000, 30, 0, 4000000, 0, -30)
+	assert np.array_equal(result.GetRasterBand(1).ReadAsArray(), expected)
+	assert result.GetRasterBand(1).GetOverviewCount() == 2
+
+
+def test_tiles_outside_the_export_are_rejected(tmp_path):
+	paths, _ = _write_tiles(tmp_path)
+	mosaic = IncrementalMosaic(tmp_path / "mosaic.tif", 300, 300)
+
+	mosaic.add_tile(paths[0])
+	with pytest.raises(ValueError):
+		mosaic.add_tile(paths[-1])
+	mosaic.close()
+
+
+def test_streamed_mosaic_gets_its_name_once_finished(tmp_path):
+	paths, expected = _write_tiles(tmp_path)
+	image = EEDLImage(task_registry=TaskRegistry(status_backend=FakeTaskBackend()), incremental_mosaic=True,
+						mosaic_options={"overview_levels": [2, 4]})
+	image.filename = "image_1"
+	image.output_folder = str(tmp_path)
+	image.export_dimensions = (WIDTH, HEIGHT)
+
+	writer = image._incremental_mosaic_writer()
+	for path in paths:
+		writer.add_tile(path)
+	writer.close()
+	image._mosaic_streamed = True
+	assert not (tmp_path / "image_1_mosaic.tif").exists()  # nothing under the mosaic's name until it's finished
+	assert not EEDLImage.check_mosaic_exists(tmp_path, "", "image_1")
+
+	image.mosaic()
+
+	assert image.mosaic_image == str(tmp_path / "image_1_mosaic.tif")
+	assert not list(tmp_path.glob("*.part*"))
+	result = gdal.Open(image.mosaic_image)
+	assert np.array_equal(result.GetRasterBand(1).ReadAsArray(), expected)
+	assert result.GetRasterBand(1).GetOverviewCount() == 2
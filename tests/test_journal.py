@@ -0,0 +1,117 @@
+import sqlite3
+
+import ee
+import pytest  # noqa
+
+from eedl.image import EEDLImage, TaskRegistry
+from eedl.journal import TaskJournal
+from eedl.testing import FakeTaskBackend, add_fake_image
+
+
+def test_journal_tracks_progress(tmp_path):
+	backend = FakeTaskBackend()
+	registry = TaskRegistry(status_backend=backend)
+	registry.setup_journal(tmp_path / "journal.sqlite")
+	image = add_fake_image(registry, backend, "image_0")
+	registry.journal.save(image, parameters="params")  # what export does after starting the task
+
+	backend.set_state(image.task.id, "COMPLETED")
+	registry.update_task_statuses()
+	image.task_data_downloaded = True
+	image.mosaic_image = str(tmp_path / "image_0_mosaic.tif")
+	image._stage_complete("mosaic_complete")
+	registry.journal.close()
+
+	entry = TaskJournal(tmp_path / "journal.sqlite").get(image.export_folder, image.filename)
+	assert entry['task_id'] == image.task.id
+	assert entry['parameters'] == "params"
+	assert entry['state'] == "COMPLETED"
+	assert entry['downloaded'] == 1
+	assert entry['mosaicked'] == 1
+	assert entry['zonal'] == 0
+	assert entry['mosaic_image'] == image.mosaic_image
+
+
+def _journaled_entry(tmp_path, state="RUNNING", downloaded=False):
+	backend = FakeTaskBackend()
+	registry = TaskRegistry(status_backend=backend)
+	registry.setup_journal(tmp_path / "journal.sqlite")
+	image = add_fake_image(registry, backend, "image_0")
+	backend.set_state(image.task.id, state)
+	registry.update_task_statuses()
+	image.task_data_downloaded = downloaded
+	registry.journal.save(image, parameters="params")
+	return registry.journal.get(image.export_folder, image.filename)
+
+
+def test_reattach_restores_task_and_stages(tmp_path):
+	entry = _journaled_entry(tmp_path, state="COMPLETED", downloaded=True)
+
+	image = EEDLImage(task_registry=TaskRegistry(status_backend=FakeTaskBackend()))
+	image._set_names("image_0")
+	assert image._reattach(entry, "params") is True
+	assert image.task.id == entry['task_id']
+	assert image.last_task_status['state'] == "COMPLETED"
+
+	# the data was downloaded before the crash, so downloading again is skipped - this would fail otherwise since the drive folder doesn't exist
+	image.download_results(tmp_path / "downloads")
+	assert image.task_data_downloaded is True
+
+
+@pytest.mark.parametrize("operation_name", ["projects/journaled/operations/{}", None])
+def test_reattached_task_reports_status_on_its_own(tmp_path, monkeypatch, operation_name):
+	entry = _journaled_entry(tmp_path, state="RUNNING")
+	entry['operation_name'] = operation_name.format(entry['task_id']) if operation_name else None  # None: a journal from before names were recorded
+	monkeypatch.setattr(ee.data, "_get_projects_path", lambda: "projects/current")
+	requested = []
+
+	def get_operation(name):
+		requested.append(name)
+		return {"name": name, "done": True, "metadata": {"state": "SUCCEEDED", "description": "image_0"}}
+
+	monkeypatch.setattr(ee.data, "getOperation", get_operation)
+
+	registry = TaskRegistry(status_backend=FakeTaskBackend())  # the bulk listing doesn't have the task
+	image = EEDLImage(task_registry=registry)
+	image._set_names("image_0")
+	assert image._reattach(entry, "params") is True
+	registry.add(image)
+	registry.update_task_statuses()
+
+	assert requested == [entry['operation_name'] or f"projects/current/operations/{entry['task_id']}"]
+	assert image.last_task_status['state'] == "COMPLETED"
+	assert registry.downloadable_tasks == [image]
+
+
+def test_journal_records_operation_names(tmp_path):
+	backend = FakeTaskBackend()
+	registry = TaskRegistry(status_backend=backend)
+	registry.setup_journal(tmp_path / "journal.sqlite")
+	image = add_fake_image(registry, backend, "image_0")
+	image.task.operation_name = f"projects/test/operations/{image.task.id}"
+	registry.journal.save(image, parameters="params")
+
+	assert registry.journal.get(image.export_folder, image.filename)['operation_name'] == image.task.operation_name
+
+
+def test_older_journals_gain_operation_names(tmp_path):
+	connection = sqlite3.connect(str(tmp_path / "journal.sqlite"))
+	connection.execute("CREATE TABLE tasks (export_folder TEXT NOT NULL, filename TEXT NOT NULL, task_id TEXT, parameters TEXT,"
+						" export_type TEXT, description TEXT, drive_root_folder TEXT, cloud_bucket TEXT, state TEXT,"
+						" downloaded INTEGER NOT NULL DEFAULT 0, mosaicked INTEGER NOT NULL DEFAULT 0, zonal INTEGER NOT NULL DEFAULT 0,"
+						" output_folder TEXT, mosaic_image TEXT, zonal_output_filepath TEXT, updated TEXT, PRIMARY KEY (export_folder, filename))")
+	connection.execute("INSERT INTO tasks (export_folder, filename, task_id, state) VALUES ('None', 'image_0', 'TASK', 'RUNNING')")
+	connection.commit()
+	connection.close()
+
+	entry = TaskJournal(tmp_path / "journal.sqlite").get(None, "image_0")
+	assert entry['task_id'] == "TASK" and entry['operation_name'] is None
+
+
+@pytest.mark.parametrize("state, parameters", [("RUNNING", "changed params"), ("FAILED", "params")])
+def test_reattach_refuses_changed_or_failed_exports(tmp_path, state, parameters):
+	entry = _journaled_entry(tmp_path, state=state)
+
+	image = EEDLImage()
+	image._set_names("image_0")
+	assert image._reattach(entry, parameters) is False
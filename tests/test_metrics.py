@@ -0,0 +1,91 @@
+import json
+
+import pytest  # noqa
+
+from eedl.image import EEDLImage, TaskRegistry
+from eedl.metrics import JSONLinesSink, MetricsSink, PipelineMetrics, PrometheusTextfileSink
+from eedl.testing import FakeTaskBackend, add_fake_image
+
+
+class FakeClock:
+	def __init__(self, now=1_000_000.0):
+		self.now = now
+
+	def __call__(self):
+		return self.now
+
+
+def test_summary_percentiles_and_throughput():
+	metrics = PipelineMetrics()
+	for i in range(1, 21):  # downloads taking 1 through 20 seconds, 10 MB each
+		metrics.record(f"image_{i}", "download", 100.0, 100.0 + i, bytes_processed=10_000_000)
+	metrics.record("image_1", "mosaic", 0, 4)
+
+	summary = metrics.summary()
+
+	assert list(summary) == ["download", "mosaic"]
+	assert summary["download"]["count"] == 20
+	assert summary["download"]["p50_seconds"] == 10
+	assert summary["download"]["p95_seconds"] == 19
+	assert summary["download"]["bytes_per_second"] == pytest.approx(200_000_000 / 210)
+	assert summary["download"]["images_per_hour"] == pytest.approx(20 / 20 * 3600)
+	assert summary["mosaic"]["bytes"] is None
+	assert "download" in metrics.report()
+
+
+def test_sinks_receive_records(tmp_path):
+	metrics = PipelineMetrics(sinks=[JSONLinesSink(tmp_path / "stages.jsonl"), PrometheusTextfileSink(tmp_path / "eedl.prom")])
+	metrics.record("image_1", "download", 10, 12, bytes_processed=500)
+	metrics.record("image_2", "download", 10, 16, bytes_processed=700)
+
+	lines = [json.loads(line) for line in (tmp_path / "stages.jsonl").read_text().splitlines()]
+	assert [(line["image"], line["duration"], line["bytes"]) for line in lines] == [("image_1", 2, 500), ("image_2", 6, 700)]
+
+	prom = (tmp_path / "eedl.prom").read_text()
+	assert 'eedl_stage_duration_seconds_count{stage="download"} 2' in prom
+	assert 'eedl_stage_duration_seconds_sum{stage="download"} 8' in prom
+	assert 'eedl_stage_duration_seconds_bucket{stage="download",le="1"} 0' in prom
+	assert 'eedl_stage_duration_seconds_bucket{stage="download",le="5"} 1' in prom
+	assert 'eedl_stage_duration_seconds_bucket{stage="download",le="15"} 2' in prom
+	assert 'eedl_stage_duration_seconds_bucket{stage="download",le="+Inf"} 2' in prom
+	assert 'eedl_stage_bytes_total{stage="download"} 1200' in prom
+
+
+def test_earth_engine_stages_are_recorded_on_completion():
+	clock = FakeClock()
+	backend = FakeTaskBackend(clock=clock)
+	registry = TaskRegistry(status_backend=backend)
+	image = add_fake_image(registry, backend, "image_1")
+
+	clock.now += 30
+	backend.set_state(image.task.id, "RUNNING")
+	registry.update_task_statuses()
+	clock.now += 90
+	backend.set_state(image.task.id, "COMPLETED")
+	registry.update_task_statuses()
+	registry.update_task_statuses()  # seeing it complete again doesn't record it twice
+
+	assert [(record.stage, record.duration) for record in registry.metrics.records] == [("ee_queue", 30), ("ee_running", 90)]
+	assert image.stage_times["ee_running"] == (clock.now - 90, clock.now, None)
+
+
+def test_sinks_must_implement_record():
+	class IncompleteSink(MetricsSink):
+		pass
+
+	with pytest.raises(TypeError):
+		IncompleteSink()
+
+
+def test_downloaded_bytes_count_only_the_exports_tiles(tmp_path):
+	(tmp_path / "image_1-0000000000-0000000000.tif").write_bytes(b"a" * 100)
+	(tmp_path / "image_1-0000000000-0000000256.tif").write_bytes(b"b" * 50)
+	(tmp_path / "image_1_mosaic.tif").write_bytes(b"c" * 1000)
+	(tmp_path / "image_1_mosaic.tif.part").write_bytes(b"d" * 1000)
+	(tmp_path / "image_10.tif").write_bytes(b"e" * 1000)
+
+	image = EEDLImage()
+	image.filename = "image_1"
+	image.output_folder = str(tmp_path)
+
+	assert image._downloaded_bytes() == 150
@@ -0,0 +1,54 @@
+import pytest  # noqa
+
+from eedl import mosaic_rasters
+from eedl.mosaic_rasters import COMPRESSION_PROFILES, compression_options
+
+
+def test_default_profile_picks_predictor_from_data_type():
+	assert compression_options("deflate", floating_point=True) == {"COMPRESS": "DEFLATE", "PREDICTOR": "3"}
+	assert compression_options("deflate", floating_point=False) == {"COMPRESS": "DEFLATE", "PREDICTOR": "2"}
+	assert compression_options("deflate", floating_point=True, predictor=1) == {"COMPRESS": "DEFLATE", "PREDICTOR": "1"}
+
+
+def test_profiles_translate_per_driver():
+	assert compression_options("archival", floating_point=True) == {"COMPRESS": "ZSTD", "ZSTD_LEVEL": "15", "PREDICTOR": "3"}
+	assert compression_options("archival", floating_point=True, output_format="COG") == {"COMPRESS": "ZSTD", "LEVEL": "15", "PREDICTOR": "FLOATING_POINT"}
+	assert compression_options("fast", floating_point=True, output_format="COG")["PREDICTOR"] == "NO"
+
+
+def test_lossy_profile_bounds_error_and_accepts_custom_settings():
+	assert compression_options("lossy", floating_point=True) == {"COMPRESS": "LERC_ZSTD", "ZSTD_LEVEL": "9", "MAX_Z_ERROR": "0.001"}
+
+	custom = dict(COMPRESSION_PROFILES["lossy"], max_z_error=0.05)
+	assert compression_options(custom, floating_point=True)["MAX_Z_ERROR"] == "0.05"
+
+	with pytest.raises(ValueError):
+		compression_options("smallest", floating_point=True)
+
+
+class _OldGdal:
+	"""The thread-local config functions of GDAL before 3.7, which has no gdal.config_options"""
+
+	def __init__(self):
+		self.options = {"GDAL_NUM_THREADS": "4"}
+
+	def GetThreadLocalConfigOption(self, name, default=None):
+		return self.options.get(name, default)
+
+	def SetThreadLocalConfigOption(self, name, value):
+		if value is None:
+			self.options.pop(name, None)
+		else:
+			self.options[name] = value
+
+
+def test_config_options_are_restored_without_gdal_config_options(monkeypatch):
+	old_gdal = _OldGdal()
+	monkeypatch.setattr(mosaic_rasters, "gdal", old_gdal)
+
+	with pytest.raises(RuntimeError):
+		with mosaic_rasters.config_options({"GDAL_NUM_THREADS": "ALL_CPUS", "VSI_CACHE": "TRUE"}):
+			assert old_gdal.options == {"GDAL_NUM_THREADS": "ALL_CPUS", "VSI_CACHE": "TRUE"}
+			raise RuntimeError("the block failed")
+
+	assert old_gdal.options == {"GDAL_NUM_THREADS": "4"}
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+gdal = pytest.importorskip("osgeo.gdal", reason="writing mosaics needs GDAL's Python bindings")
+osr = pytest.importorskip("osgeo.osr")
+
+from eedl.mosaic_rasters import mosaic_rasters  # noqa: E402
+
+TILE_SIZE = 256
+WIDTH = 600  # so the last column and row of tiles are partial
+HEIGHT = 520
+
+
+def _write_tiles(folder):
+	spatial_reference = osr.SpatialReference()
+	spatial_reference.ImportFromEPSG(32610)
+	expected = np.arange(WIDTH * HEIGHT, dtype="float32").reshape(HEIGHT, WIDTH)
+	paths = []
+	for row in range(0, HEIGHT, TILE_SIZE):
+		for column in range(0, WIDTH, TILE_SIZE):
+			data = expected[row:row + TILE_SIZE, column:column + TILE_SIZE]
+			path = str(folder / f"image_1-{row:010d}-{column:010d}.tif")
+			dataset = gdal.GetDriverByName("GTiff").Create(path, data.shape[1], data.shape[0], 1, gdal.GDT_Float32)
+			dataset.SetGeoTransform((500000 + column * 30, 30, 0, 4000000 - row * 30, 0, -30))
+			dataset.SetProjection(spatial_reference.ExportToWkt())
+			dataset.GetRasterBand(1).WriteArray(data)
+			dataset = None
+			paths.append(path)
+	return paths, expected
+
+
+def _leftover_vrts():
+	return [name for name in (gdal.ReadDir("/vsimem/") or []) if name.startswith("mosaic_rasters_")]
+
+
+def test_cog_output_has_internal_overviews_and_compression(tmp_path):
+	paths, expected = _write_tiles(tmp_path)
+	output = tmp_path / "mosaic.tif"
+
+	mosaic_rasters(paths, output, output_format="COG", block_size=128, overview_levels=[2, 4], num_threads=2)
+
+	result = gdal.Open(str(output))
+	structure = result.GetMetadata("IMAGE_STRUCTURE")
+	band = result.GetRasterBand(1)
+	assert structure["LAYOUT"] == "COG"
+	assert structure["COMPRESSION"] == "DEFLATE" and structure["PREDICTOR"] == "3"
+	assert band.GetBlockSize() == [128, 128]
+	assert band.GetOverviewCount() == 2 and band.GetOverview(0).XSize == (WIDTH + 1) // 2
+	assert not (tmp_path / "mosaic.tif.ovr").exists()  # the overviews are inside the file
+	assert np.array_equal(band.ReadAsArray(), expected)
+	assert _leftover_vrts() == []
+
+
+def test_cog_without_overviews(tmp_path):
+	paths, _ = _write_tiles(tmp_path)
+
+	mosaic_rasters(paths, tmp_path / "mosaic.tif", output_format="COG", add_overviews=False)
+
+	assert gdal.Open(str(tmp_path / "mosaic.tif")).GetRasterBand(1).GetOverviewCount() == 0
+
+
+@pytest.mark.parametrize("bigtiff, magic", [("YES", b"II+\x00"), ("NO", b"II*\x00")])
+def test_geotiff_output_is_tiled_with_compressed_overviews(tmp_path, bigtiff, magic):
+	paths, expected = _write_tiles(tmp_path)
+	output = tmp_path / "mosaic.tif"
+
+	mosaic_rasters(paths, output, block_size=128, overview_levels=[2, 4, 8], bigtiff=bigtiff, num_threads=2)
+
+	result = gdal.Open(str(output))
+	band = result.GetRasterBand(1)
+	assert result.GetMetadata("IMAGE_STRUCTURE")["COMPRESSION"] == "DEFLATE"
+	assert band.GetBlockSize() == [128, 128]  # TILED=YES
+	assert band.GetOverviewCount() == 3
+	assert gdal.Open(f"{output}.ovr").GetMetadata("IMAGE_STRUCTURE")["COMPRESSION"] == "DEFLATE"  # overviews compressed like the mosaic
+	assert np.array_equal(band.ReadAsArray(), expected)
+	assert output.read_bytes()[:4] == magic
+	assert _leftover_vrts() == [] and not list(tmp_path.glob("*.vrt"))  # the VRT stayed in memory, and was removed
+
+
+def test_mosaicking_leaves_gdal_config_alone(tmp_path):
+	paths, _ = _write_tiles(tmp_path)
+	cache_max = gdal.GetCacheMax()
+
+	mosaic_rasters(paths, tmp_path / "mosaic.tif", overview_levels=[2], num_threads=2)
+
+	assert gdal.GetConfigOption("GDAL_NUM_THREADS") is None
+	assert gdal.GetConfigOption("COMPRESS_OVERVIEW") is None and gdal.GetConfigOption("PREDICTOR_OVERVIEW") is None
+	assert gdal.GetCacheMax() == cache_max
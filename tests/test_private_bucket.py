@@ -0,0 +1,61 @@
+import os
+
+import pytest  # noqa
+
+from eedl import google_cloud
+
+# These tests run against a local Cloud Storage emulator, such as fake-gcs-server
+# (docker run -p 4443:4443 fsouza/fake-gcs-server -scheme http), with STORAGE_EMULATOR_HOST=http://localhost:4443
+pytestmark = pytest.mark.skipif(not os.environ.get("STORAGE_EMULATOR_HOST"), reason="needs a Cloud Storage emulator (STORAGE_EMULATOR_HOST)")
+
+
+@pytest.fixture
+def client():
+	from google.auth.credentials import AnonymousCredentials
+	from google.cloud import storage
+
+	return storage.Client(project="test", credentials=AnonymousCredentials())
+
+
+@pytest.fixture
+def bucket(client):
+	bucket = client.bucket(f"eedl-test-{os.getpid()}")
+	if not bucket.exists():
+		bucket = client.create_bucket(bucket.name)
+	yield bucket
+	for blob in client.list_blobs(bucket.name):
+		blob.delete()
+	bucket.delete()
+
+
+def test_download_export_downloads_then_deletes(client, bucket, tmp_path):
+	tiles = {f"exports/image_1-0000000000-{i:010d}.tif": os.urandom(1024 + i) for i in range(12)}
+	for name, data in tiles.items():
+		bucket.blob(name).upload_from_string(data)
+	bucket.blob("exports/image_10-0000000000-0000000000.tif").upload_from_string(b"another image")
+
+	paths = google_cloud.download_export(bucket.name, tmp_path, "exports/image_1", max_workers=4, delete_batch_size=5, client=client)
+
+	assert len(paths) == len(tiles)
+	for name, data in tiles.items():
+		assert (tmp_path / name.split("/")[-1]).read_bytes() == data
+	assert [blob.name for blob in client.list_blobs(bucket.name)] == ["exports/image_10-0000000000-0000000000.tif"]
+
+
+def test_download_export_keeps_blobs_when_asked(client, bucket, tmp_path):
+	bucket.blob("exports/image_1.tif").upload_from_string(b"single tile")
+
+	google_cloud.download_export(bucket.name, tmp_path, "exports/image_1", autodelete=False, client=client)
+	paths = google_cloud.get_private_export_paths(bucket.name, "exports/image_1", client=client)
+
+	assert (tmp_path / "image_1.tif").read_bytes() == b"single tile"
+	assert paths == [f"/vsigs/{bucket.name}/exports/image_1.tif"]
+
+
+def test_download_export_never_takes_another_exports_tiles(client, bucket, tmp_path):
+	bucket.blob("exports/image_10-0000000000-0000000000.tif").upload_from_string(b"another image")
+
+	paths = google_cloud.download_export(bucket.name, tmp_path, "exports/image_1", client=client)
+
+	assert paths == [] and list(tmp_path.iterdir()) == []
+	assert [blob.name for blob in client.list_blobs(bucket.name)] == ["exports/image_10-0000000000-0000000000.tif"]
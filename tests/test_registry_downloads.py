@@ -0,0 +1,148 @@
+import os
+import threading
+import time
+
+import pytest  # noqa
+
+from eedl.image import CompletedImageRecord, EEDLImage, TaskRegistry
+from eedl.scheduler import PollScheduler
+from eedl.testing import FakeTaskBackend, add_fake_image
+
+
+def _completed_registry(num_images, download):
+	backend = FakeTaskBackend()
+	registry = TaskRegistry(status_backend=backend)
+	images = [add_fake_image(registry, backend, f"image_{i}") for i in range(num_images)]
+	for image in images:
+		backend.set_state(image.task.id, "COMPLETED")
+
+		def _download(download_location, callback=None, image=image):
+			download(image)
+			image.task_data_downloaded = True
+
+		image.download_results = _download
+	registry.update_task_statuses()
+	return registry, images
+
+
+def test_downloads_run_in_parallel():
+	barrier = threading.Barrier(4, timeout=5)  # only passes if all four downloads are running at the same time
+	registry, images = _completed_registry(4, lambda image: barrier.wait())
+	registry.download_workers = 4
+
+	registry.download_ready_images("unused")
+
+	assert all(image.task_data_downloaded for image in images)
+	assert not registry.has_pending_work
+
+
+def test_download_errors_are_captured_per_image(tmp_path):
+	def _download(image):
+		if image.filename.endswith("image_1"):
+			raise RuntimeError("simulated download failure")
+
+	registry, images = _completed_registry(3, _download)
+	registry.setup_log(tmp_path / "errors.txt")
+	registry.callback = "mark_done"
+	finished = []
+	for image in images:
+		image.mark_done = lambda image=image: finished.append(image)
+
+	registry.raise_errors = False
+	registry.download_ready_images("unused")
+
+	assert sorted(image.filename for image in finished) == ["_image_0", "_image_2"]
+	assert images[1].task_data_downloaded is False  # left to try again
+	assert registry.downloadable_tasks == [images[1]]
+
+	registry.raise_errors = True
+	with pytest.raises(RuntimeError):
+		registry.download_ready_images("unused")
+
+
+def test_wait_for_images_runs_callbacks_on_separate_pool():
+	callback_threads = set()
+	registry, images = _completed_registry(6, lambda image: None)
+	for image in images:
+		image.record_thread = lambda: callback_threads.add(threading.current_thread().name)
+	registry.download_workers = 3
+	registry.callback_workers = 2
+
+	registry.wait_for_images("unused", callback="record_thread", scheduler=PollScheduler(interval=0.01))
+
+	assert not registry.has_pending_work
+	assert all(name.startswith("eedl_callback") for name in callback_threads)
+
+
+class LocalImage(EEDLImage):
+	"""Downloads instantly and has a callback that records which process ran it"""
+
+	def download_results(self, download_location, callback=None, drive_wait=15):
+		self.output_folder = str(download_location)
+		self.task_data_downloaded = True
+
+	def stamp_mosaic(self):
+		self.mosaic_image = os.path.join(self.output_folder, f"{self.filename}_mosaic.tif")
+		self.callback_pid = os.getpid()
+
+
+def test_process_pool_callbacks_return_results():
+	backend = FakeTaskBackend()
+	registry = TaskRegistry(status_backend=backend)
+	images = [add_fake_image(registry, backend, f"image_{i}", image_class=LocalImage) for i in range(3)]
+	for image in images:
+		backend.set_state(image.task.id, "COMPLETED")
+	registry.callback_executor = "process"
+	registry.callback_workers = 2
+
+	registry.wait_for_images("downloads", callback="stamp_mosaic", scheduler=PollScheduler(interval=0.01))
+
+	for image in images:
+		assert image.mosaic_image == os.path.join("downloads", f"{image.filename}_mosaic.tif")
+		assert image.callback_pid != os.getpid()
+		assert image.task is not None  # the original image keeps its task
+
+
+def test_finished_images_are_kept_by_default():
+	registry, images = _completed_registry(2, lambda image: None)
+
+	registry.download_ready_images("unused")
+
+	assert registry.images == images
+	assert images[0].task is not None
+
+
+def test_finished_images_are_evicted_to_records():
+	registry, images = _completed_registry(3, lambda image: None)
+	registry.evict_completed = True
+	registry.max_completed_records = 2
+	registry.callback = "mark_done"
+	for image in images:
+		image.mark_done = lambda: None
+
+	registry.download_ready_images("unused")
+
+	assert not registry.has_pending_work
+	assert [record.filename for record in registry.images] == ["_image_1", "_image_2"]  # only the newest two records are kept
+	assert all(isinstance(record, CompletedImageRecord) for record in registry.complete_tasks)
+	assert registry.images[0].task_id == images[1].last_task_status["id"]
+	assert registry.images[0].last_task_status["state"] == "COMPLETED"
+	assert images[0].task is None  # the heavy objects are gone from the image too
+
+
+def test_failed_downloads_wait_for_the_next_poll(tmp_path):
+	attempts = []
+
+	def _download(image):
+		attempts.append(time.monotonic())
+		if len(attempts) < 3:
+			raise RuntimeError("simulated download failure")
+
+	registry, images = _completed_registry(1, _download)
+	registry.setup_log(tmp_path / "errors.txt")
+
+	registry.wait_for_images("unused", scheduler=PollScheduler(interval=0.2))
+
+	assert images[0].task_data_downloaded
+	assert len(attempts) == 3  # not retried in a tight loop
+	assert all(later - earlier >= 0.19 for earlier, later in zip(attempts, attempts[1:]))
@@ -0,0 +1,100 @@
+import threading
+
+import pytest  # noqa
+
+from eedl.image import TaskRegistry
+from eedl.scheduler import AdaptivePollScheduler, PollScheduler
+from eedl.testing import FakeTaskBackend, add_fake_image
+
+
+class FakeClock:
+	def __init__(self, now=1_000_000.0):
+		self.now = now
+
+	def __call__(self):
+		return self.now
+
+
+def _setup(scheduler, clock, num_images=3):
+	backend = FakeTaskBackend(clock=clock)
+	registry = TaskRegistry(status_backend=backend)
+	registry.scheduler = scheduler
+	images = [add_fake_image(registry, backend, f"image_{i}") for i in range(num_images)]
+	return registry, backend, images
+
+
+def test_adaptive_polls_at_max_interval_without_history():
+	clock = FakeClock()
+	scheduler = AdaptivePollScheduler(min_interval=1, max_interval=30, clock=clock)
+	registry, backend, images = _setup(scheduler, clock)
+
+	registry.update_task_statuses()
+
+	assert scheduler.next_poll_delay() == pytest.approx(30)
+
+
+def test_adaptive_tightens_near_expected_finish():
+	clock = FakeClock()
+	scheduler = AdaptivePollScheduler(min_interval=1, max_interval=30, clock=clock)
+	registry, backend, images = _setup(scheduler, clock)
+	registry.update_task_statuses()
+
+	clock.now += 100
+	backend.set_state(images[0].task.id, "COMPLETED")  # establishes an expected duration of 100 seconds
+	registry.update_task_statuses()
+	assert scheduler.expected_duration == pytest.approx(100)
+
+	# the others were created at the same time, so they're now due - poll at the minimum interval
+	assert scheduler.next_poll_delay() == pytest.approx(1)
+
+	# a newly added task shouldn't be polled until it gets close to the expected finish
+	late_image = add_fake_image(registry, backend, "late_image")
+	backend.set_state(images[1].task.id, "COMPLETED")
+	backend.set_state(images[2].task.id, "COMPLETED")
+	registry.update_task_statuses()
+	assert late_image.last_task_status['state'] == "READY"
+	assert scheduler.next_poll_delay() == pytest.approx(30)
+
+
+def test_latency_compared_to_fixed_interval():
+	clock = FakeClock()
+	scheduler = PollScheduler(interval=60, clock=clock)
+	registry, backend, images = _setup(scheduler, clock, num_images=1)
+	registry.update_task_statuses()
+
+	clock.now += 5
+	backend.set_state(images[0].task.id, "COMPLETED")
+	clock.now += 2  # noticed two seconds after it finished
+	registry.update_task_statuses()
+
+	summary = scheduler.latency_summary()
+	assert summary['tasks'] == 1
+	assert summary['mean_latency'] == pytest.approx(2)
+	assert summary['mean_fixed_interval_latency'] == pytest.approx(55)  # a 60 second poller would notice at t=60
+
+
+def test_notify_wakes_wait():
+	scheduler = PollScheduler(interval=60)
+	scheduler.observe([])  # schedules the next poll a minute out
+
+	timer = threading.Timer(0.05, scheduler.notify)
+	timer.start()
+	assert scheduler.wait() is True
+	assert scheduler.next_poll_delay() > 50
+
+
+def test_finished_tasks_leave_only_their_totals_behind():
+	clock = FakeClock()
+	scheduler = AdaptivePollScheduler(min_interval=1, max_interval=30, history_size=2, clock=clock)
+	registry, backend, images = _setup(scheduler, clock, num_images=4)
+	registry.update_task_statuses()
+	assert sorted(scheduler.timings) == sorted(image.task.id for image in images)  # by task, not by id(image)
+
+	for image in images:  # finishing after 10, 20, 30, and 40 seconds
+		clock.now += 10
+		backend.set_state(image.task.id, "COMPLETED")
+		registry.update_task_statuses()
+
+	assert scheduler.timings == {}
+	assert scheduler.latency_summary()['tasks'] == 4
+	assert scheduler.expected_duration == pytest.approx(35)  # only the last two tasks count
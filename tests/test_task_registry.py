@@ -0,0 +1,106 @@
+import warnings
+
+import ee
+import pytest  # noqa
+
+from eedl.image import TaskRegistry
+from eedl.task_status import EarthEngineTaskListBackend, TaskStatusBackend
+from eedl.testing import FakeTaskBackend, add_fake_image
+
+
+def _make_registry(num_images):
+	backend = FakeTaskBackend()
+	registry = TaskRegistry(status_backend=backend)
+	images = [add_fake_image(registry, backend, f"image_{i}") for i in range(num_images)]
+	return registry, backend, images
+
+
+def test_incomplete_tasks_uses_one_bulk_request():
+	registry, backend, images = _make_registry(250)
+
+	assert len(registry.incomplete_tasks) == 250
+	assert backend.list_calls == 1
+	assert backend.status_calls == 0
+
+
+def test_bulk_statuses_map_back_to_images():
+	registry, backend, images = _make_registry(5)
+	backend.set_state(images[1].task.id, "COMPLETED")
+	backend.set_state(images[3].task.id, "FAILED", error_message="out of memory")
+
+	incomplete = registry.incomplete_tasks
+
+	assert incomplete == [images[0], images[2], images[4]]
+	assert registry.downloadable_tasks == [images[1]]
+	assert registry.failed_tasks == [images[3]]
+	assert images[3].last_task_status["error_message"] == "out of memory"
+
+
+def test_tasks_missing_from_listing_fall_back_to_task_status():
+	registry, backend, images = _make_registry(3)
+	del backend.tasks[images[0].task.id]  # not in the listing yet, but the task object can still report its status
+
+	assert len(registry.incomplete_tasks) == 3
+	assert backend.list_calls == 1
+	assert backend.status_calls == 1
+
+
+def test_earth_engine_backend_lists_operations(monkeypatch):
+	operations = [
+		{"name": f"projects/test/operations/TASK{i}", "done": i == 1, "error": {"message": "out of memory"},
+			"metadata": {"state": "FAILED" if i == 1 else "RUNNING", "description": f"image_{i}", "type": "EXPORT_IMAGE"}}
+		for i in range(3)
+	]
+	monkeypatch.setattr(ee.data, "listOperations", lambda project=None: operations)
+
+	with warnings.catch_warnings():
+		warnings.simplefilter("error", DeprecationWarning)  # getTaskList is deprecated
+		statuses = EarthEngineTaskListBackend().get_statuses(["TASK1", "TASK2", "MISSING"])
+
+	assert sorted(statuses) == ["TASK1", "TASK2"]
+	assert statuses["TASK1"]["state"] == "FAILED" and statuses["TASK1"]["error_message"] == "out of memory"
+	assert statuses["TASK2"]["description"] == "image_2"
+	with pytest.raises(TypeError):
+		TaskStatusBackend()
+
+
+def test_lifecycle_indexes_follow_image_changes():
+	registry, backend, images = _make_registry(3)
+	backend.set_state(images[0].task.id, "COMPLETED")
+	registry.update_task_statuses()
+
+	assert registry.has_pending_work
+	assert registry.downloadable_tasks == [images[0]]
+
+	images[0].task_data_downloaded = True
+	assert registry.downloadable_tasks == []
+	assert registry.complete_tasks == [images[0]]
+	assert registry.images == images
+
+
+def test_submission_queue_limits_running_tasks():
+	backend = FakeTaskBackend()
+	registry = TaskRegistry(status_backend=backend)
+	registry.max_running_tasks = 2
+	priorities = [5, 1, 3, 0, 3]
+	images = [add_fake_image(registry, backend, f"image_{i}", priority=priority) for i, priority in enumerate(priorities)]
+
+	assert backend.start_calls == 2
+	assert registry.queued_tasks == [images[2], images[3], images[4]]
+
+	backend.set_state(images[0].task.id, "COMPLETED")
+	registry.update_task_statuses()
+
+	# one slot opened up, and the lowest priority number goes first
+	assert backend.start_calls == 3
+	assert images[3].task.state == "READY"
+	assert registry.queued_tasks == [images[2], images[4]]
+
+	backend.set_state(images[1].task.id, "FAILED")
+	backend.set_state(images[3].task.id, "COMPLETED")
+	registry.update_task_statuses()
+
+	# equal priorities start in the order they were submitted
+	assert backend.start_calls == 5
+	assert registry.queued_tasks == []
+	assert registry.has_pending_work
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("osgeo.gdal", reason="building VRT mosaics needs GDAL's Python bindings")
+rasterio = pytest.importorskip("rasterio")
+Affine = pytest.importorskip("affine").Affine
+
+from eedl.image import EEDLImage, TaskRegistry  # noqa: E402
+from eedl.testing import FakeTaskBackend  # noqa: E402
+
+
+def _write_tile(path, column_offset, value):
+	with rasterio.open(path, "w", driver="GTiff", width=256, height=256, count=1, dtype="float32", crs="EPSG:32610",
+						transform=Affine(30, 0, 500000 + column_offset * 30, 0, -30, 4000000)) as dataset:
+		dataset.write(np.full((1, 256, 256), value, dtype="float32"))
+
+
+@pytest.fixture
+def downloaded_image(tmp_path):
+	folder = tmp_path / "exports"
+	folder.mkdir()
+	_write_tile(folder / "image_1-0000000000-0000000000.tif", 0, 1)
+	_write_tile(folder / "image_1-0000000000-0000000256.tif", 256, 2)
+	_write_tile(folder / "image_10-0000000000-0000000512.tif", 512, 3)  # another image's tile, in the same folder
+
+	image = EEDLImage(task_registry=TaskRegistry(status_backend=FakeTaskBackend()), mosaic_mode="vrt")
+	image.filename = "image_1"
+	image.output_folder = str(folder)
+	return image
+
+
+def test_vrt_mode_mosaics_without_copying(downloaded_image, tmp_path):
+	assert not EEDLImage.check_mosaic_exists(tmp_path, "exports", "image_1")
+	downloaded_image.mosaic()
+
+	assert downloaded_image.mosaic_image.endswith("image_1_mosaic.vrt")
+	assert EEDLImage.check_mosaic_exists(tmp_path, "exports", "image_1")  # so skip_existing skips VRT mosaics too
+	with rasterio.open(downloaded_image.mosaic_image) as mosaic:
+		assert (mosaic.width, mosaic.height) == (512, 256)
+		assert mosaic.read(1, window=((0, 1), (250, 260))).tolist() == [[1] * 6 + [2] * 4]
+
+
+def test_vrt_mosaic_can_be_materialized_later(downloaded_image):
+	downloaded_image.mosaic_options = {"keep_tiles": True, "overview_levels": [2]}  # keep_tiles is only for mosaic_folder
+	downloaded_image.mosaic()
+	downloaded_image.materialize_mosaic()
+
+	assert downloaded_image.mosaic_image.endswith("image_1_mosaic.tif")
+	with rasterio.open(downloaded_image.mosaic_image) as mosaic:
+		assert mosaic.read(1)[:, 255:257].tolist() == [[1, 2]] * 256
+
+
+def test_vrt_mode_is_not_streamed_into_a_geotiff(downloaded_image):
+	downloaded_image.incremental_mosaic = True
+	downloaded_image.export_dimensions = (512, 256)
+	assert downloaded_image._incremental_mosaic_writer() is None
+
+	downloaded_image.mosaic()
+
+	assert downloaded_image.mosaic_image.endswith("image_1_mosaic.vrt")
@@ -0,0 +1,49 @@
+import fiona
+import pandas
+import pytest  # noqa
+
+from eedl import zonal
+from . import TEST_DIR
+
+RASTER = TEST_DIR / "data" / "_ee_export_test_image.tif"
+STATS = ('min', 'max', 'mean', 'median', 'std', 'count', 'sum', 'range', 'percentile_10', 'percentile_90')
+
+
+def _features():
+	with fiona.open(TEST_DIR / "data" / "test_vectors.gpkg", layer="test_polys") as collection:
+		features = [{"type": "Feature", "geometry": feature.__geo_interface__["geometry"], "properties": {"UniqueID": feature["properties"]["UniqueID"]}} for feature in collection]
+		min_x, min_y, max_x, max_y = collection.bounds
+
+	# a box over all the other polygons, so every pixel in them is shared with it, and one outside the raster
+	box = [[(min_x, min_y), (max_x, min_y), (max_x, max_y), (min_x, max_y), (min_x, min_y)]]
+	features.append({"type": "Feature", "geometry": {"type": "Polygon", "coordinates": box}, "properties": {"UniqueID": "all"}})
+	outside = [[(0, 0), (1, 0), (1, 1), (0, 1), (0, 0)]]
+	features.append({"type": "Feature", "geometry": {"type": "Polygon", "coordinates": outside}, "properties": {"UniqueID": "outside"}})
+	return features
+
+
+@pytest.mark.parametrize("all_touched", [False, True])
+@pytest.mark.parametrize("chunk_size", [zonal.LABEL_CHUNK_SIZE, 50])
+def test_label_engine_matches_rasterstats(tmp_path, all_touched, chunk_size):
+	rasterstats_csv = zonal.zonal_stats(_features(), RASTER, tmp_path, "rasterstats", ("UniqueID",), STATS, all_touched=all_touched)
+	label_csv = zonal.zonal_stats(_features(), RASTER, tmp_path, "label", ("UniqueID",), STATS, all_touched=all_touched,
+									engine="label", chunk_size=chunk_size)
+
+	expected = pandas.read_csv(rasterstats_csv)
+	results = pandas.read_csv(label_csv)
+	# rasterstats fills pixels outside the raster with nodata, which doesn't fit in this uint16 raster and turns into
+	# zeros, so only compare the features on the raster
+	pandas.testing.assert_frame_equal(results.iloc[:-1], expected.iloc[:-1])
+	assert results["count"].iloc[-1] == 0 and results["mean"].isna().iloc[-1]
+
+
+def test_label_engine_rejects_unsupported_stats(tmp_path):
+	with pytest.raises(ValueError):
+		zonal.zonal_stats(_features(), RASTER, tmp_path, "label", ("UniqueID",), ("majority",), engine="label")
+	assert not list(tmp_path.iterdir())
+
+
+def test_label_engine_rejects_unsupported_options(tmp_path):
+	with pytest.raises(ValueError, match="geojson_out"):
+		zonal.zonal_stats(_features(), RASTER, tmp_path, "label", ("UniqueID",), ("mean",), engine="label", geojson_out=True, band=1)
+	assert not list(tmp_path.iterdir())